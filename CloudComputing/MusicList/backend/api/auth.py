@@ -1,11 +1,23 @@
-from fastapi import APIRouter,HTTPException
+import asyncio
+from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel
 from typing import Optional
 from botocore.exceptions import ClientError, NoCredentialsError, BotoCoreError
-from backend.core.dynamo import DynamoManager
+from backend.api.deps import get_current_user, get_dynamodb, get_password_pool, get_session_tokens
+from backend.core.cache import MISSING, TTLCache
+from backend.core.passwords import PoolSaturatedError, needs_rehash
 
 router = APIRouter()
-dynamo = DynamoManager()
+
+LOGIN_TABLE = "login"
+
+# User records keyed by email. Unknown emails are cached for a short time too,
+# so bursts of logins with made-up emails don't reach the table.
+# Each worker has its own cache and another worker's invalidate_user doesn't reach it: a wrong password
+# against a cached record is checked against the table before rejecting (see login_user), and an email
+# registered through another worker is seen here once its negative entry expires (5 s at most).
+user_cache = TTLCache(maxsize=10000, ttl=300, negative_ttl=5)
+pending_lookups = {} # email -> Future of a get_item in flight
 
 #Pydantic model for request body
 class LoginRequest(BaseModel):
@@ -17,40 +29,128 @@ class RegisterRequest(BaseModel):
     username: str
     password: str
 
-@router.post("/login")
-def login_user(req:LoginRequest):
-    table_name = "login"
+
+async def get_user(email: str, dynamodb, use_cache: bool = True) -> tuple:
+    """
+    Returns the user record of an email, from the cache or the 'login' table.
+    :param str email: The user's email.
+    :param dynamodb: The shared async DynamoDB client.
+    :param bool use_cache: False to read the table (still shared with a lookup already in flight).
+    :return: tuple (dict with 'email', 'username' and 'password' or None if the user doesn't exist,
+             bool: True if the record came from the cache)
+    """
+    if use_cache:
+        cached = user_cache.get(email)
+        if cached is not MISSING:
+            return cached, True
+
+    # Concurrent misses for the same email share one get_item instead of each sending their own
+    pending = pending_lookups.get(email)
+    if pending is not None:
+        return await asyncio.shield(pending), False
+
+    pending = asyncio.get_running_loop().create_future()
+    pending_lookups[email] = pending
     try:
-        response = dynamo.client.get_item(
-            TableName=table_name,
-            Key={"email": {"S": req.email}}
+        response = await dynamodb.get_item(
+            TableName=LOGIN_TABLE,
+            Key={"email": {"S": email}}
         )
 
-        print("DynamoDB Response:", response)
+        user = None
+        if "Item" in response:
+            item = response["Item"]
+            # from dynamoDB get corresponding password and username
+            user = {
+                "email": email,
+                "username": item["username"]["S"],
+                "password": item["password"]["S"]
+            }
+        # invalidate_user drops our entry from pending_lookups: the record read before it may be stale
+        if pending_lookups.get(email) is pending:
+            user_cache.set(email, user) # None is cached as an unknown email
+        pending.set_result(user)
+        return user, False
+    except BaseException as e: # Also on cancellation, so the waiters are never left hanging
+        pending.set_exception(e)
+        pending.exception() # Mark as retrieved, nobody may be waiting on it
+        raise
+    finally:
+        if pending_lookups.get(email) is pending:
+            del pending_lookups[email]
+
+
+def invalidate_user(email: str):
+    """
+    Drops the cached record of a user in this worker, and detaches the lookup in flight so its result
+    isn't cached. Must be called whenever the user is created or their password changes.
+    :param str email: The user's email.
+    """
+    user_cache.invalidate(email)
+    pending_lookups.pop(email, None)
 
-        if "Item" not in response:
-            raise HTTPException(status_code=401, detail="Invalid email or password")
 
-        item = response["Item"]
-        # from dynamoDB get corresponding password and username
-        stored_password = item["password"]["S"]
-        stored_username = item["username"]["S"]
+def pool_saturated() -> HTTPException:
+    # The client should retry shortly, the other endpoints are not affected
+    return HTTPException(status_code=503, detail="Too many logins in progress, please retry",
+                         headers={"Retry-After": "1"})
 
-        print("Stored password:", stored_password)
-        print("Input password:", req.password)
 
-        # Compare password
-        if stored_password != req.password:
+async def upgrade_password(user: dict, password: str, dynamodb, password_pool):
+    """
+    Replaces a plaintext password (or a hash with old parameters) by a fresh hash after a successful login.
+    Best effort: a failure leaves the old value, which still works.
+    """
+    try:
+        new_hash = await password_pool.hash(password)
+        await dynamodb.update_item(
+            TableName=LOGIN_TABLE,
+            Key={"email": {"S": user["email"]}},
+            UpdateExpression="SET password = :new",
+            ConditionExpression="password = :old", # Unless it was changed in the meantime
+            ExpressionAttributeValues={":new": {"S": new_hash}, ":old": {"S": user["password"]}}
+        )
+    except (PoolSaturatedError, ClientError, BotoCoreError):
+        return
+    finally:
+        invalidate_user(user["email"])
+
+
+@router.post("/login")
+async def login_user(req:LoginRequest, dynamodb=Depends(get_dynamodb), password_pool=Depends(get_password_pool),
+                     session_tokens=Depends(get_session_tokens)):
+    try:
+        user, cached = await get_user(req.email, dynamodb)
+
+        # Compare password on the password pool. Unknown emails are checked against a dummy hash, so they take as long
+        password_ok = await password_pool.verify(user["password"] if user else password_pool.dummy_hash, req.password)
+        if not password_ok and cached and user is not None:
+            # The cached record may predate a change made through another worker: check the table before rejecting
+            fresh_user, _ = await get_user(req.email, dynamodb, use_cache=False)
+            if fresh_user is not None and fresh_user != user:
+                user = fresh_user
+                password_ok = await password_pool.verify(user["password"], req.password)
+        if user is None or not password_ok:
             raise HTTPException(status_code=401, detail="Invalid email or password")
 
-        # Return success message
+        if needs_rehash(user["password"]):
+            await upgrade_password(user, req.password, dynamodb, password_pool)
+
+        # Return success message, with the token to send as "Authorization: Bearer <token>"
+        session = session_tokens.issue(user["email"], user["username"])
         return {
             "status": "ok",
             "message": "Login success",
-            "username": stored_username
+            "username": user["username"],
+            "token": session["token"],
+            "token_type": "bearer",
+            "expires_at": session["expires_at"]
         }
 
-
+    except HTTPException:
+        raise
+    except PoolSaturatedError:
+        raise pool_saturated()
     except NoCredentialsError as e:
         raise HTTPException(status_code=500,
                             detail="No AWS credentials found. Please attach IAM role or configure credentials.")
@@ -62,8 +162,56 @@ def login_user(req:LoginRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.post("/register")
-def register_user(req:RegisterRequest):
-    pass
-    # 1. Query DynamoDB 'login' table by 'email' => check if email already exist
-    # 2. if exist => raise HTTPException(status_code=400, detail="Email already exists")
-    # 3. else => Insert new item => return {"status": "ok", "message": "Register success"}
+async def register_user(req:RegisterRequest, dynamodb=Depends(get_dynamodb), password_pool=Depends(get_password_pool)):
+    try:
+        password_hash = await password_pool.hash(req.password)
+    except PoolSaturatedError:
+        raise pool_saturated()
+
+    try:
+        # Insert only if the email is not taken yet, checked by DynamoDB in the same call
+        await dynamodb.put_item(
+            TableName=LOGIN_TABLE,
+            Item={
+                "email": {"S": req.email},
+                "username": {"S": req.username},
+                "password": {"S": password_hash}
+            },
+            ConditionExpression="attribute_not_exists(email)"
+        )
+    except ClientError as e:
+        if e.response["Error"]["Code"] == "ConditionalCheckFailedException":
+            raise HTTPException(status_code=400, detail="Email already exists")
+        raise HTTPException(status_code=500, detail=str(e))
+    except NoCredentialsError as e:
+        raise HTTPException(status_code=500,
+                            detail="No AWS credentials found. Please attach IAM role or configure credentials.")
+    except BotoCoreError as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        invalidate_user(req.email) # The email may be cached as unknown
+
+    return {"status": "ok", "message": "Register success"}
+
+@router.get("/me")
+async def current_user(claims=Depends(get_current_user)):
+    # Answered from the token alone
+    return {"status": "ok", "email": claims["sub"], "username": claims["name"], "expires_at": claims["exp"]}
+
+@router.post("/refresh")
+async def refresh_token(claims=Depends(get_current_user), session_tokens=Depends(get_session_tokens)):
+    # Swaps a still valid token for a new one, the old one can't be used again
+    session = session_tokens.issue(claims["sub"], claims["name"])
+    try:
+        await session_tokens.revoke(claims)
+    except (ClientError, BotoCoreError) as e:
+        raise HTTPException(status_code=500, detail=str(e)) # The new token is not handed out
+    return {"status": "ok", "token": session["token"], "token_type": "bearer", "expires_at": session["expires_at"]}
+
+@router.post("/logout")
+async def logout_user(claims=Depends(get_current_user), session_tokens=Depends(get_session_tokens)):
+    try:
+        await session_tokens.revoke(claims)
+    except (ClientError, BotoCoreError) as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    return {"status": "ok", "message": "Logout success"}
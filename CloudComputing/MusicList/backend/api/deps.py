@@ -0,0 +1,67 @@
+from fastapi import Depends, HTTPException, Request
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+from botocore.exceptions import BotoCoreError, ClientError
+from backend.core.tokens import InvalidTokenError
+
+
+# FastAPI dependencies shared by the routers.
+# The clients live on app.state, they are created once by the lifespan hook in backend/main.py.
+
+def get_aws(request: Request):
+    return request.app.state.aws
+
+
+def get_dynamodb(request: Request):
+    return request.app.state.aws.dynamodb
+
+
+def get_async_dynamo(request: Request):
+    return request.app.state.async_dynamo
+
+
+def get_s3(request: Request):
+    return request.app.state.aws.s3
+
+
+def get_password_pool(request: Request):
+    return request.app.state.password_pool
+
+
+def get_cursor_codec(request: Request):
+    return request.app.state.cursors
+
+
+def get_session_tokens(request: Request):
+    return request.app.state.session_tokens
+
+
+bearer_scheme = HTTPBearer(auto_error=False)
+
+async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(bearer_scheme),
+                           session_tokens=Depends(get_session_tokens)) -> dict:
+    """
+    Checks the "Authorization: Bearer <token>" header: signature and expiry locally, then the revoked
+    tokens shared by every worker (one key read, never the 'login' table).
+    :return: dict, the token claims ('sub' is the email, 'name' the username)
+    """
+    if credentials is None:
+        raise HTTPException(status_code=401, detail="Not authenticated", headers={"WWW-Authenticate": "Bearer"})
+    try:
+        return await session_tokens.check(credentials.credentials)
+    except InvalidTokenError as e:
+        raise HTTPException(status_code=401, detail=str(e), headers={"WWW-Authenticate": "Bearer"})
+    except (ClientError, BotoCoreError):
+        # Fail closed: a token we can't check could be a revoked one
+        raise HTTPException(status_code=503, detail="Could not check the session, please retry",
+                            headers={"Retry-After": "1"})
+
+
+LOCAL_HOSTS = ("127.0.0.1", "::1")
+
+def require_local(request: Request):
+    """
+    Lets through only requests made on the instance itself straight to the app (e.g. curl localhost:8000),
+    not through Nginx: it proxies from 127.0.0.1 too, but always adds X-Forwarded-For.
+    """
+    if request.client is None or request.client.host not in LOCAL_HOSTS or "x-forwarded-for" in request.headers:
+        raise HTTPException(status_code=404, detail="Not Found")
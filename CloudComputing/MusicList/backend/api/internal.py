@@ -0,0 +1,23 @@
+from fastapi import APIRouter, Depends
+from backend.api import auth, media
+from backend.api.deps import get_password_pool, get_session_tokens, require_local
+
+# Operator endpoints (cache and pool counters), only answered on the instance itself:
+#   curl http://127.0.0.1:8000/internal/user-cache-stats
+router = APIRouter(dependencies=[Depends(require_local)])
+
+@router.get("/user-cache-stats")
+async def user_cache_stats():
+    return auth.user_cache.stats()
+
+@router.get("/password-pool-stats")
+async def password_pool_stats(password_pool=Depends(get_password_pool)):
+    return password_pool.stats()
+
+@router.get("/token-stats")
+async def token_stats(session_tokens=Depends(get_session_tokens)):
+    return session_tokens.stats()
+
+@router.get("/media-cache-stats")
+async def url_cache_stats():
+    return media.url_cache.stats()
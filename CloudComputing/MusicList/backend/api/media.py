@@ -0,0 +1,78 @@
+import os
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException
+from pydantic import BaseModel
+from botocore.exceptions import ClientError, NoCredentialsError, BotoCoreError
+from backend.api.deps import get_current_user, get_s3
+from backend.core.cache import MISSING, TTLCache
+from backend.core.image_variants import VARIANT_FORMATS, VARIANT_SIZES, variant_of
+
+router = APIRouter()
+
+MEDIA_BUCKET = os.getenv("MEDIA_BUCKET", "media-storage-s4068959")
+ALLOWED_PREFIXES = ("artist-images/",) # Only these objects can be shared with browsers
+URL_EXPIRES_IN = 3600       # Seconds a presigned URL is valid
+URL_REFRESH_MARGIN = 300    # Stop handing out a cached URL this many seconds before it expires
+MAX_KEYS_PER_REQUEST = 200
+
+# (bucket, key) -> presigned URL, kept until shortly before the URL expires
+url_cache = TTLCache(maxsize=50000, ttl=URL_EXPIRES_IN - URL_REFRESH_MARGIN)
+
+class PresignRequest(BaseModel):
+    keys: List[str]
+    bucket: Optional[str] = None
+    size: Optional[int] = None      # With format: sign this resized variant of each key instead
+    format: Optional[str] = None
+
+
+@router.post("/presign")
+async def presign_media(req: PresignRequest, s3=Depends(get_s3), claims=Depends(get_current_user)):
+    """
+    Returns presigned GET URLs for a batch of object keys, so browsers download the images
+    straight from the private bucket instead of through the API. Logged-in users only.
+
+    The keys are the songs' img_key. With size and format (e.g. 256 and "webp") the URLs point to
+    that thumbnail of each image instead of the original; they are still returned under the img_key.
+    """
+    if len(req.keys) > MAX_KEYS_PER_REQUEST:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_KEYS_PER_REQUEST} keys per request")
+    invalid_keys = [key for key in req.keys if not key.startswith(ALLOWED_PREFIXES) or ".." in key]
+    if invalid_keys:
+        raise HTTPException(status_code=400, detail=f"Keys not allowed: {', '.join(invalid_keys[:10])}")
+
+    if (req.size is None) != (req.format is None):
+        raise HTTPException(status_code=400, detail="size and format go together")
+    if req.size is not None:
+        if req.size not in VARIANT_SIZES or req.format not in VARIANT_FORMATS:
+            raise HTTPException(status_code=400, detail=f"Variants: size in {list(VARIANT_SIZES)}, "
+                                                        f"format in {list(VARIANT_FORMATS)}")
+        if any("/variants/" in key for key in req.keys):
+            raise HTTPException(status_code=400, detail="Pass the img_key of the original image with size and format")
+
+    bucket = req.bucket or MEDIA_BUCKET
+    if bucket != MEDIA_BUCKET:
+        raise HTTPException(status_code=400, detail="Unknown bucket")
+
+    urls = {}
+    try:
+        for key in dict.fromkeys(req.keys): # Drop duplicated keys, keep the order
+            object_key = variant_of(key, req.size, req.format) if req.size is not None else key
+            url = url_cache.get((bucket, object_key))
+            if url is MISSING:
+                # Signing is done locally with the credentials, no request is sent to S3
+                url = await s3.generate_presigned_url(
+                    "get_object", Params={"Bucket": bucket, "Key": object_key}, ExpiresIn=URL_EXPIRES_IN
+                )
+                url_cache.set((bucket, object_key), url)
+            urls[key] = url
+    except NoCredentialsError as e:
+        raise HTTPException(status_code=500,
+                            detail="No AWS credentials found. Please attach IAM role or configure credentials.")
+    except (ClientError, BotoCoreError) as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    return {
+        "status": "ok",
+        "bucket": bucket,
+        "urls": urls
+    }
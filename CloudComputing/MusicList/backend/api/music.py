@@ -0,0 +1,139 @@
+from pathlib import Path
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Response
+from fastapi.responses import StreamingResponse
+from botocore.exceptions import ClientError, NoCredentialsError, BotoCoreError
+from backend.api.deps import get_async_dynamo, get_cursor_codec
+from backend.core.cursors import InvalidCursorError
+from backend.core.dynamo import DynamoManager
+from backend.core.catalog_index import CatalogIndex
+from backend.core.payloads import CatalogPayloads, encode_json
+
+router = APIRouter()
+catalog = CatalogIndex() # Filled once when the app starts, see load_catalog()
+payloads = CatalogPayloads(catalog) # Pre-encoded catalog responses, rebuilt when the catalog changes
+
+MUSIC_TABLE = "music"
+CATALOG_JSON = Path(__file__).resolve().parents[2] / "data" / "2025a1.json"
+
+# Listing of the music table
+SONG_FIELDS = ("title", "artist", "year", "album", "img_url", "img_key") # Attributes a client can ask for
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+EXPORT_PAGE_SIZE = 500  # Items read per Scan while streaming an export
+
+
+def load_catalog(table_name: str = MUSIC_TABLE, json_file: str = str(CATALOG_JSON)) -> int:
+    """
+    Builds the in-memory catalog index. The 'music' table is the source of truth;
+    if it can't be read (no credentials, table missing or empty) the JSON file is used instead.
+    :param str table_name: The name of the music table.
+    :param str json_file: The path to the catalog JSON file used as fallback.
+    :return: int (number of songs indexed)
+    """
+    try:
+        count = catalog.load_from_table(DynamoManager(), table_name)
+        if count:
+            print(f"✅ Catalog index built from table '{table_name}': {count} songs.")
+            return count
+        print(f"⚠️ Table '{table_name}' is empty, loading catalog from {json_file}.")
+    except (NoCredentialsError, ClientError, BotoCoreError) as e:
+        print(f"⚠️ Could not read table '{table_name}' ({e}), loading catalog from {json_file}.")
+
+    count = catalog.load_from_json(json_file)
+    print(f"✅ Catalog index built from {json_file}: {count} songs.")
+    return count
+
+
+@router.get("/query")
+async def query_music(title: Optional[str] = None, artist: Optional[str] = None,
+                      year: Optional[str] = None, album: Optional[str] = None, limit: Optional[int] = None):
+    if limit is not None and limit < 1:
+        raise HTTPException(status_code=400, detail="limit must be at least 1")
+    try:
+        songs = catalog.query({"title": title, "artist": artist, "year": year, "album": album}, limit=limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return {
+        "status": "ok",
+        "count": len(songs),
+        "songs": songs
+    }
+
+@router.get("/catalog")
+async def full_catalog():
+    # Served from bytes encoded once per catalog version. Right after a change the previous bytes are
+    # served while the new ones are encoded: they must not be cached under the new version's ETag
+    payload, current = await payloads.full_catalog_async()
+    headers = None if current else {"Cache-Control": "no-store"}
+    return Response(content=payload, media_type="application/json", headers=headers)
+
+@router.get("/artists/{artist}")
+async def artist_songs(artist: str):
+    payload = payloads.artist(artist)
+    if payload is None:
+        raise HTTPException(status_code=404, detail="Artist not found")
+    return Response(content=payload, media_type="application/json")
+
+
+def parse_fields(fields: Optional[str]) -> list:
+    """
+    Parses the 'fields' parameter (comma separated) into a projection, None means every attribute.
+    """
+    if not fields:
+        return None
+    projection = list(dict.fromkeys(name.strip() for name in fields.split(",") if name.strip()))
+    unknown = [name for name in projection if name not in SONG_FIELDS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown field(s): {', '.join(unknown)}")
+    return projection
+
+
+@router.get("/songs")
+async def list_songs(limit: int = DEFAULT_PAGE_SIZE, cursor: Optional[str] = None, fields: Optional[str] = None,
+                     dynamo=Depends(get_async_dynamo), cursors=Depends(get_cursor_codec)):
+    """
+    Lists the music table one page at a time. Pass the returned next_cursor to get the next page,
+    it is null on the last one. A page holds at most `limit` songs (a page can be shorter
+    than the limit, even empty, before the end).
+    """
+    if not 1 <= limit <= MAX_PAGE_SIZE:
+        raise HTTPException(status_code=400, detail=f"limit must be between 1 and {MAX_PAGE_SIZE}")
+    projection = parse_fields(fields)
+    context = f"{MUSIC_TABLE}|{','.join(projection or [])}" # A cursor only works with the same fields
+
+    try:
+        start_key = cursors.decode(cursor, context) if cursor else None
+        page = await dynamo.scan_page(MUSIC_TABLE, limit, start_key, projection)
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except NoCredentialsError as e:
+        raise HTTPException(status_code=500,
+                            detail="No AWS credentials found. Please attach IAM role or configure credentials.")
+    except (ClientError, BotoCoreError) as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    return {
+        "status": "ok",
+        "count": len(page["items"]),
+        "songs": page["items"],
+        "next_cursor": cursors.encode(page["last_evaluated_key"], context) if page["last_evaluated_key"] else None
+    }
+
+@router.get("/export")
+async def export_songs(fields: Optional[str] = None, dynamo=Depends(get_async_dynamo)):
+    """
+    Streams the whole music table as NDJSON (one song per line). The table is read page by page
+    while the response is sent, so memory stays flat however big the catalog is.
+    """
+    projection = parse_fields(fields)
+
+    async def ndjson_lines():
+        # Each page is awaited on the shared async client, the next one is read once this one is sent
+        async for page in dynamo.iter_scan_pages(MUSIC_TABLE, EXPORT_PAGE_SIZE, projection=projection):
+            if page["items"]:
+                yield b"".join(encode_json(song) + b"\n" for song in page["items"])
+
+    return StreamingResponse(ndjson_lines(), media_type="application/x-ndjson",
+                             headers={"Content-Disposition": 'attachment; filename="songs.ndjson"'})
@@ -0,0 +1,61 @@
+from fastapi import APIRouter, Depends, HTTPException
+from pydantic import BaseModel
+from botocore.exceptions import ClientError, NoCredentialsError, BotoCoreError
+from backend.api import music
+from backend.api.deps import get_async_dynamo, get_current_user
+
+router = APIRouter()
+
+SUBSCRIPTIONS_TABLE = "subscriptions"
+
+class SubscriptionRequest(BaseModel):
+    title: str
+    album: str
+
+
+@router.get("")
+async def list_subscriptions(claims=Depends(get_current_user), dynamo=Depends(get_async_dynamo)):
+    """
+    The user's subscribed songs with their details, for the main page:
+    one Query plus ceil(n / 100) concurrent BatchGetItem requests, whatever the number of songs.
+    """
+    try:
+        songs = await dynamo.get_subscribed_songs(claims["sub"], SUBSCRIPTIONS_TABLE, music.MUSIC_TABLE)
+    except NoCredentialsError as e:
+        raise HTTPException(status_code=500,
+                            detail="No AWS credentials found. Please attach IAM role or configure credentials.")
+    except (ClientError, BotoCoreError, RuntimeError) as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    return {
+        "status": "ok",
+        "count": len(songs),
+        "songs": songs
+    }
+
+@router.post("")
+async def subscribe(req: SubscriptionRequest, claims=Depends(get_current_user), dynamo=Depends(get_async_dynamo)):
+    # The in-memory catalog tells if the song exists, no read on the music table
+    if (req.title, req.album) not in music.catalog.song_ids:
+        raise HTTPException(status_code=404, detail="Song not found")
+    try:
+        await dynamo.subscribe(SUBSCRIPTIONS_TABLE, claims["sub"], req.title, req.album)
+    except NoCredentialsError as e:
+        raise HTTPException(status_code=500,
+                            detail="No AWS credentials found. Please attach IAM role or configure credentials.")
+    except (ClientError, BotoCoreError) as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    return {"status": "ok", "message": "Subscribed"}
+
+@router.delete("")
+async def unsubscribe(title: str, album: str, claims=Depends(get_current_user), dynamo=Depends(get_async_dynamo)):
+    try:
+        await dynamo.unsubscribe(SUBSCRIPTIONS_TABLE, claims["sub"], title, album)
+    except NoCredentialsError as e:
+        raise HTTPException(status_code=500,
+                            detail="No AWS credentials found. Please attach IAM role or configure credentials.")
+    except (ClientError, BotoCoreError) as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    return {"status": "ok", "message": "Unsubscribed"}
@@ -0,0 +1,199 @@
+import asyncio
+import json
+from datetime import datetime, timezone
+from boto3.dynamodb.types import TypeDeserializer, TypeSerializer
+from botocore.exceptions import ClientError
+from backend.core.throttle import THROTTLE_ERRORS, backoff_delay
+
+BATCH_GET_LIMIT = 100 # Keys per BatchGetItem request (DynamoDB maximum)
+
+serializer = TypeSerializer()
+deserializer = TypeDeserializer()
+
+
+def to_dynamodb(item: dict) -> dict:
+    # The low-level client wants typed values, e.g. {"title": {"S": "..."}}
+    return {name: serializer.serialize(value) for name, value in item.items()}
+
+
+def from_dynamodb(item: dict) -> dict:
+    return {name: deserializer.deserialize(value) for name, value in item.items()}
+
+
+def projection_kwargs(projection: list) -> dict:
+    # Placeholders, many attribute names (e.g. 'year') are DynamoDB reserved words
+    if not projection:
+        return {}
+    return {
+        "ProjectionExpression": ", ".join(f"#p{i}" for i in range(len(projection))),
+        "ExpressionAttributeNames": {f"#p{i}": name for i, name in enumerate(projection)}
+    }
+
+
+def song_key(title: str, album: str) -> str:
+    """
+    The sort key of a subscription: "<title>#<album>", with "\\" and "#" escaped in both parts,
+    so a title containing "#" can't collide with another (title, album) pair.
+    """
+    def escape(value: str) -> str:
+        return value.replace("\\", "\\\\").replace("#", "\\#")
+    return f"{escape(title)}#{escape(album)}"
+
+
+class AsyncDynamoManager:
+    """
+    DynamoDB operations of the API, on the process' shared async client (app.state.aws.dynamodb).
+
+    Same role as DynamoManager for the request path: the handlers await these calls on the event loop
+    instead of running boto3 in the thread pool. Items go in and come out as plain Python dicts.
+    """
+
+    def __init__(self, client, max_retries: int = 8, base_backoff: float = 0.05, max_backoff: float = 2.0):
+        """
+        :param client: The aioboto3 DynamoDB client.
+        :param int max_retries: Retries of the throttled requests and unprocessed keys of one call.
+        :param float base_backoff: First retry delay in seconds, doubled on each retry.
+        :param float max_backoff: Upper bound of the retry delay in seconds.
+        """
+        self.client = client
+        self.max_retries = max_retries
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+
+    async def query_all(self, **query_kwargs) -> list:
+        """
+        Runs a Query and follows LastEvaluatedKey until the end.
+        :param query_kwargs: Query parameters in the low-level (typed) form.
+        :return: list of items
+        """
+        items = []
+        while True:
+            response = await self.client.query(**query_kwargs)
+            items.extend(from_dynamodb(item) for item in response.get("Items", []))
+            if "LastEvaluatedKey" not in response:
+                return items
+            query_kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+
+    async def scan_page(self, table_name: str, page_size: int = 100, exclusive_start_key: dict = None,
+                        projection: list = None) -> dict:
+        """
+        Reads one page of the table, for paginated listings: at most page_size items are held at a time.
+        :param str table_name: The name of the table to read.
+        :param int page_size: Maximum number of items of the page (Scan Limit).
+        :param dict exclusive_start_key: (Optional) The last_evaluated_key of the previous page.
+        :param list projection: (Optional) Attribute names to return.
+        :return: dict with 'items' and 'last_evaluated_key' (None on the last page)
+        """
+        scan_kwargs = {"TableName": table_name, "Limit": page_size, **projection_kwargs(projection)}
+        if exclusive_start_key:
+            scan_kwargs["ExclusiveStartKey"] = to_dynamodb(exclusive_start_key)
+
+        response = await self.client.scan(**scan_kwargs)
+        last_evaluated_key = response.get("LastEvaluatedKey")
+        return {
+            "items": [from_dynamodb(item) for item in response.get("Items", [])],
+            "last_evaluated_key": from_dynamodb(last_evaluated_key) if last_evaluated_key else None
+        }
+
+    async def iter_scan_pages(self, table_name: str, page_size: int = 100, exclusive_start_key: dict = None,
+                              projection: list = None):
+        """
+        Reads the table page by page, e.g. for a streamed export: only one page is in memory at a time.
+        :return: async generator of pages (dicts with 'items' and 'last_evaluated_key')
+        """
+        while True:
+            page = await self.scan_page(table_name, page_size, exclusive_start_key, projection)
+            yield page
+            exclusive_start_key = page["last_evaluated_key"]
+            if not exclusive_start_key:
+                return
+
+    async def batch_get_items(self, table_name: str, keys: list, projection: list = None) -> list:
+        """
+        Fetches many items by primary key with BatchGetItem chunks of 100 sent concurrently,
+        retrying throttled requests and UnprocessedKeys with exponential backoff.
+        Raises RuntimeError if some keys are still unprocessed after max_retries.
+        :param str table_name: The name of the table.
+        :param list keys: Primary key dicts, e.g. [{"title": "...", "album": "..."}]. Duplicates are sent once.
+        :param list projection: (Optional) Attribute names to return (must include the key to match the results).
+        :return: list of the items found, in no particular order (missing keys are simply absent)
+        """
+        unique_keys = list({json.dumps(key, sort_keys=True, default=str): key for key in keys}.values())
+        request_template = projection_kwargs(projection)
+
+        async def get_chunk(chunk: list) -> list:
+            items = []
+            pending = {table_name: {**request_template, "Keys": [to_dynamodb(key) for key in chunk]}}
+            for attempt in range(self.max_retries + 1):
+                if attempt:
+                    await asyncio.sleep(backoff_delay(attempt, self.base_backoff, self.max_backoff))
+                try:
+                    response = await self.client.batch_get_item(RequestItems=pending)
+                except ClientError as e:
+                    if e.response["Error"]["Code"] not in THROTTLE_ERRORS:
+                        raise
+                    continue
+                items.extend(from_dynamodb(item) for item in response.get("Responses", {}).get(table_name, []))
+                # Keys left out when the response hit 16 MB or the table throttled us
+                pending = response.get("UnprocessedKeys") or {}
+                if not pending:
+                    return items
+            raise RuntimeError(f"❌ {len(pending[table_name]['Keys'])} key(s) of '{table_name}' still unprocessed "
+                               f"after {self.max_retries} retries.")
+
+        chunks = [unique_keys[i:i + BATCH_GET_LIMIT] for i in range(0, len(unique_keys), BATCH_GET_LIMIT)]
+        results = await asyncio.gather(*(get_chunk(chunk) for chunk in chunks))
+        return [item for items in results for item in items]
+
+    async def subscribe(self, table_name: str, email: str, title: str, album: str):
+        """
+        Subscribes a user to a song (subscribing twice keeps one item).
+        :param str table_name: The name of the subscriptions table.
+        """
+        await self.client.put_item(TableName=table_name, Item=to_dynamodb({
+            "email": email,
+            "song_key": song_key(title, album),
+            "title": title,
+            "album": album,
+            "subscribed_at": datetime.now(timezone.utc).isoformat(timespec="seconds")
+        }))
+
+    async def unsubscribe(self, table_name: str, email: str, title: str, album: str):
+        """
+        Removes a user's subscription to a song.
+        :param str table_name: The name of the subscriptions table.
+        """
+        await self.client.delete_item(TableName=table_name,
+                                      Key=to_dynamodb({"email": email, "song_key": song_key(title, album)}))
+
+    async def get_subscriptions(self, table_name: str, email: str) -> list:
+        """
+        Returns a user's subscription items with one Query (following LastEvaluatedKey).
+        :param str table_name: The name of the subscriptions table.
+        :param str email: The user's email.
+        :return: list of subscription items, ordered by song_key
+        """
+        return await self.query_all(
+            TableName=table_name,
+            KeyConditionExpression="email = :email",
+            ExpressionAttributeValues={":email": {"S": email}}
+        )
+
+    async def get_subscribed_songs(self, email: str, subscriptions_table: str = "subscriptions",
+                                   music_table: str = "music") -> list:
+        """
+        Returns the songs a user is subscribed to: one Query for the subscriptions, then the songs
+        in concurrent BatchGetItem chunks (instead of one get_item per song).
+        :param str email: The user's email.
+        :param str subscriptions_table: The name of the subscriptions table.
+        :param str music_table: The name of the music table.
+        :return: list of song dicts with 'subscribed_at', in subscription order. Songs no longer in the table are left out.
+        """
+        subscriptions = await self.get_subscriptions(subscriptions_table, email)
+        songs = await self.batch_get_items(music_table, [{"title": s["title"], "album": s["album"]} for s in subscriptions])
+        songs_by_key = {(song["title"], song["album"]): song for song in songs}
+
+        return [
+            {**songs_by_key[(s["title"], s["album"])], "subscribed_at": s.get("subscribed_at")}
+            for s in subscriptions if (s["title"], s["album"]) in songs_by_key
+        ]
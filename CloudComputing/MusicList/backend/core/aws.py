@@ -0,0 +1,47 @@
+from contextlib import AsyncExitStack
+import aioboto3
+from aiobotocore.config import AioConfig
+
+
+class AsyncAWS:
+    """
+    Holds the async AWS clients of the API process.
+
+    One aioboto3 session and one client per service are created at startup (see the lifespan hook
+    in backend/main.py) and shared by every request, so all handlers reuse the same connection pool.
+    """
+
+    def __init__(self, region='us-east-1', endpoint_url=None, max_pool_connections: int = 100):
+        """
+        :param str region: The AWS region.
+        :param str endpoint_url: (Optional) A local stand-in (DynamoDB Local, moto server) instead of AWS.
+        :param int max_pool_connections: Size of the HTTP connection pool of each client.
+        """
+        self.region = region
+        self.endpoint_url = endpoint_url
+        self.session = aioboto3.Session(region_name=region)
+        self.config = AioConfig(max_pool_connections=max_pool_connections, retries={'mode': 'standard'})
+        self._exit_stack = AsyncExitStack()
+        self.dynamodb = None
+        self.s3 = None
+
+    async def start(self):
+        """
+        Opens the clients. Call once when the app starts.
+        """
+        self.dynamodb = await self._exit_stack.enter_async_context(
+            self.session.client('dynamodb', endpoint_url=self.endpoint_url, config=self.config)
+        )
+        # Presigned URLs must use Signature Version 4
+        self.s3 = await self._exit_stack.enter_async_context(
+            self.session.client('s3', endpoint_url=self.endpoint_url,
+                                config=self.config.merge(AioConfig(signature_version='s3v4')))
+        )
+
+    async def close(self):
+        """
+        Closes the clients and their connection pools. Call once when the app shuts down.
+        """
+        await self._exit_stack.aclose()
+        self.dynamodb = None
+        self.s3 = None
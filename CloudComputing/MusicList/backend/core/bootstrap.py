@@ -0,0 +1,168 @@
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Callable, Optional
+
+
+def per_thread(factory: Callable[[], object]) -> Callable[[], object]:
+    """
+    Wraps a factory so each thread gets (and keeps) its own instance, e.g. per_thread(DynamoManager).
+    The steps run on a thread pool, and boto3 resources (Table, Instance...) must not be shared between threads.
+    :return: callable returning the calling thread's instance
+    """
+    local = threading.local()
+
+    def get():
+        if not hasattr(local, "instance"):
+            local.instance = factory()
+        return local.instance
+    return get
+
+
+@dataclass
+class BootstrapStep:
+    """
+    One step of the infrastructure bootstrap.
+
+    :param str name: Unique name, used by depends_on and in the report.
+    :param action: Does the work. Returning False marks the step as failed (the managers return bools).
+    :param is_done: (Optional) Checks the current state of the infrastructure, True skips the step.
+                    Steps without it always run, so their action must be safe to repeat.
+    :param tuple depends_on: Names of the steps that must succeed (or be skipped) first.
+    """
+    name: str
+    action: Callable[[], object]
+    is_done: Optional[Callable[[], bool]] = None
+    depends_on: tuple = ()
+
+
+@dataclass
+class StepResult:
+    name: str
+    status: str = "pending"   # done, skipped (already done), failed, blocked (a dependency failed)
+    started_at: float = 0.0   # Seconds since the start of the run
+    duration: float = 0.0     # Including the is_done check
+    error: str = None
+    waited_on: tuple = field(default_factory=tuple)
+
+    @property
+    def ok(self) -> bool:
+        return self.status in ("done", "skipped")
+
+
+class BootstrapRunner:
+    """
+    Runs bootstrap steps as a dependency graph: a step starts as soon as all its dependencies are
+    finished, so independent branches (DynamoDB tables, S3 bucket, EC2 instances) run in parallel.
+
+        runner = BootstrapRunner([
+            BootstrapStep("music_table", create_music_table, is_done=music_table_exists),
+            BootstrapStep("load_music", load_music, depends_on=("music_table",)),
+        ])
+        results = runner.run()
+        runner.print_report(results)
+    """
+
+    def __init__(self, steps: list, max_workers: int = 8):
+        """
+        :param list steps: BootstrapStep objects, in any order.
+        :param int max_workers: Maximum number of steps running at the same time.
+        """
+        self.steps = {}
+        for step in steps:
+            if step.name in self.steps:
+                raise ValueError(f"Duplicated bootstrap step '{step.name}'.")
+            self.steps[step.name] = step
+        self.max_workers = max_workers
+        self._check_graph()
+
+    def _check_graph(self):
+        # Unknown dependencies and cycles are programming errors, fail before touching AWS
+        for step in self.steps.values():
+            unknown = [name for name in step.depends_on if name not in self.steps]
+            if unknown:
+                raise ValueError(f"Step '{step.name}' depends on unknown step(s) {', '.join(unknown)}.")
+
+        remaining = {name: set(step.depends_on) for name, step in self.steps.items()}
+        while remaining:
+            ready = [name for name, depends_on in remaining.items() if not depends_on]
+            if not ready:
+                raise ValueError(f"Bootstrap steps have a dependency cycle: {', '.join(sorted(remaining))}.")
+            for name in ready:
+                del remaining[name]
+            for depends_on in remaining.values():
+                depends_on.difference_update(ready)
+
+    def _run_step(self, step: BootstrapStep, run_started_at: float) -> StepResult:
+        result = StepResult(step.name, started_at=time.perf_counter() - run_started_at)
+        started_at = time.perf_counter()
+        try:
+            if step.is_done is not None and step.is_done():
+                result.status = "skipped"
+            elif step.action() is False:
+                result.status = "failed"
+            else:
+                result.status = "done"
+        except Exception as e:
+            result.status = "failed"
+            result.error = str(e)
+        result.duration = time.perf_counter() - started_at
+        return result
+
+    def run(self) -> dict:
+        """
+        Runs every step, each at most once. A failed step blocks the steps depending on it,
+        the other branches keep going.
+        :return: dict, step name -> StepResult, in completion order
+        """
+        results = {}
+        waiting = dict(self.steps)
+        run_started_at = time.perf_counter()
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            running = {}
+
+            def schedule():
+                for name, step in list(waiting.items()):
+                    if not all(dependency in results for dependency in step.depends_on):
+                        continue
+                    del waiting[name]
+                    failed = tuple(dependency for dependency in step.depends_on if not results[dependency].ok)
+                    if failed:
+                        results[name] = StepResult(name, status="blocked", started_at=time.perf_counter() - run_started_at,
+                                                   waited_on=failed)
+                        schedule() # Its own dependents are blocked too
+                        return
+                    running[executor.submit(self._run_step, step, run_started_at)] = name
+
+            schedule()
+            while running:
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    del running[future]
+                    result = future.result()
+                    results[result.name] = result
+                    status = {"done": "✅", "skipped": "⏭️", "failed": "❌"}[result.status]
+                    print(f"{status} {result.name} {result.status} in {result.duration:.1f}s"
+                          + (f": {result.error}" if result.error else ""))
+                schedule()
+
+        return results
+
+    @staticmethod
+    def print_report(results: dict):
+        """
+        Prints the timing breakdown of a run: when each step started, how long it took,
+        and the wall time compared to running the steps one after another.
+        """
+        if not results:
+            return
+        print(f"\n{'step':<24}{'status':<10}{'start':>8}{'duration':>10}")
+        for result in sorted(results.values(), key=lambda result: result.started_at):
+            detail = f"  (needs {', '.join(result.waited_on)})" if result.waited_on else ""
+            print(f"{result.name:<24}{result.status:<10}{result.started_at:>7.1f}s{result.duration:>9.1f}s{detail}")
+
+        wall_time = max(result.started_at + result.duration for result in results.values())
+        sequential_time = sum(result.duration for result in results.values())
+        print(f"Total: {wall_time:.1f}s wall time, {sequential_time:.1f}s if run one after another")
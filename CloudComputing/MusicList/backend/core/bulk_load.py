@@ -0,0 +1,305 @@
+import json
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from decimal import Decimal
+from botocore.exceptions import ClientError
+from backend.core.throttle import THROTTLE_ERRORS, backoff_delay, estimate_write_units
+
+MAX_BATCH_SIZE = 25 # BatchWriteItem accepts at most 25 put/delete requests per call
+MAX_ERROR_SAMPLES = 10
+
+
+class _JsonStream:
+    """
+    Reads a JSON document from a file a chunk at a time, decoding one value at a time.
+    """
+
+    def __init__(self, file, chunk_size: int):
+        self.file = file
+        self.chunk_size = chunk_size
+        self.decoder = json.JSONDecoder(parse_float=Decimal) # DynamoDB rejects floats, it wants Decimal
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+
+    def _read_more(self) -> bool:
+        if self.eof:
+            return False
+        chunk = self.file.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buffer = self.buffer[self.pos:] + chunk # Drop what was already consumed
+        self.pos = 0
+        return True
+
+    def peek(self) -> str:
+        # Returns the next non-whitespace character without consuming it ('' at the end of the file)
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in " \t\r\n":
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self._read_more():
+                return ""
+
+    def expect(self, char: str, error: str):
+        if self.peek() != char:
+            raise ValueError(error)
+        self.pos += 1
+
+    def value(self):
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+                # A value touching the end of the buffer may be cut (e.g. a number), read more to be sure
+                if end < len(self.buffer) or self.eof:
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            self._read_more()
+
+
+def iter_json_array(json_file: str, array_key: str = "songs", chunk_size: int = 1 << 16):
+    """
+    Yields the elements of a top-level array (e.g. {"songs": [...]}) one by one,
+    without loading the whole file into memory.
+    :param str json_file: The path to the JSON file.
+    :param str array_key: The top-level key holding the array.
+    :param int chunk_size: Number of characters read from the file at a time.
+    :return: generator of the array elements
+    """
+    format_error = f"Invalid JSON format: missing or incorrect '{array_key}' key."
+
+    with open(json_file, "r", encoding="utf-8") as file:
+        stream = _JsonStream(file, chunk_size)
+        stream.expect("{", format_error)
+
+        while stream.peek() not in ("}", ""):
+            key = stream.value()
+            stream.expect(":", format_error)
+
+            if key != array_key:
+                stream.value() # Skip the other top-level values
+                if stream.peek() == ",":
+                    stream.pos += 1
+                continue
+
+            stream.expect("[", format_error)
+            if stream.peek() == "]":
+                return
+            while True:
+                yield stream.value()
+                next_char = stream.peek()
+                stream.pos += 1
+                if next_char == "]":
+                    return
+                if next_char != ",":
+                    raise ValueError(f"Invalid JSON format: expected ',' or ']' in '{array_key}'.")
+
+        raise ValueError(format_error)
+
+
+@dataclass
+class BulkLoadReport:
+    table_name: str
+    items_read: int = 0
+    items_written: int = 0
+    duplicates_collapsed: int = 0       # Earlier copies of a key that appears again later in the file
+    skipped_missing_keys: int = 0
+    failed_items: int = 0               # Still unprocessed after all retries, or rejected by DynamoDB
+    batches: int = 0
+    throttles: int = 0
+    retries: int = 0
+    elapsed_seconds: float = 0.0
+    duplicate_keys: list = field(default_factory=list) # A sample of the duplicated keys
+    errors: list = field(default_factory=list)         # A sample of the errors that failed whole batches
+
+    @property
+    def success(self) -> bool:
+        return self.failed_items == 0
+
+    def to_dict(self) -> dict:
+        return {name: getattr(self, name) for name in self.__dataclass_fields__} | {"success": self.success}
+
+
+class BulkLoader:
+    """
+    Loads a large JSON catalog into a DynamoDB table.
+
+    The file is read twice, incrementally: the first pass finds items missing their keys and
+    duplicated keys (before anything is written), the second pass sends 25-item BatchWriteItem
+    requests from several writer threads and retries UnprocessedItems with exponential backoff.
+    All writers share the table's AdaptiveRateController, so the load runs at the provisioned
+    write capacity instead of hitting throttling errors and sleeping.
+    """
+
+    def __init__(self, dynamo, writer_threads: int = 4, batch_size: int = MAX_BATCH_SIZE,
+                 max_retries: int = 8, base_backoff: float = 0.05, max_backoff: float = 5.0,
+                 fail_on_duplicates: bool = False, max_duplicate_samples: int = 20):
+        """
+        :param dynamo: A DynamoManager instance.
+        :param int writer_threads: Number of threads sending BatchWriteItem requests.
+        :param int batch_size: Items per request, at most 25.
+        :param int max_retries: Attempts per batch before the remaining items count as failed.
+        :param float base_backoff: First retry delay in seconds, doubled on each retry.
+        :param float max_backoff: Upper bound of the retry delay in seconds.
+        :param bool fail_on_duplicates: Don't write anything if the file contains duplicated keys.
+        :param int max_duplicate_samples: How many duplicated keys to list in the report.
+        """
+        if not 1 <= batch_size <= MAX_BATCH_SIZE:
+            raise ValueError(f"batch_size must be between 1 and {MAX_BATCH_SIZE}")
+        self.dynamo = dynamo
+        self.writer_threads = writer_threads
+        self.batch_size = batch_size
+        self.max_retries = max_retries
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.fail_on_duplicates = fail_on_duplicates
+        self.max_duplicate_samples = max_duplicate_samples
+
+    def load_json(self, table_name: str, json_file: str, partition_key: str, sort_key: str = None,
+                  array_key: str = "songs") -> BulkLoadReport:
+        """
+        Loads every item of the JSON file into the table.
+        :param str table_name: The name of the DynamoDB table.
+        :param str json_file: The path to the JSON file containing records.
+        :param str partition_key: The primary key attribute used as the partition key in the table.
+        :param str sort_key: (Optional) The attribute used as the sort key, if applicable.
+        :param str array_key: The top-level key holding the records.
+        :return: BulkLoadReport
+        """
+        started_at = time.monotonic()
+        report = BulkLoadReport(table_name=table_name)
+        key_names = [name for name in (partition_key, sort_key) if name]
+
+        def item_key(item):
+            if any(item.get(name) in (None, "") for name in key_names):
+                return None
+            return tuple(item[name] for name in key_names)
+
+        # Pass 1: find duplicated keys. With put requests the last copy wins, so we keep only that one
+        seen_keys = set()
+        last_position = {} # key -> position of its last copy, only for duplicated keys
+        for position, item in enumerate(iter_json_array(json_file, array_key)):
+            report.items_read += 1
+            key = item_key(item)
+            if key is None:
+                report.skipped_missing_keys += 1
+            elif key in seen_keys:
+                report.duplicates_collapsed += 1
+                last_position[key] = position
+                if len(report.duplicate_keys) < self.max_duplicate_samples and list(key) not in report.duplicate_keys:
+                    report.duplicate_keys.append(list(key))
+            else:
+                seen_keys.add(key)
+        del seen_keys
+
+        if report.duplicates_collapsed:
+            print(f"⚠️ {report.duplicates_collapsed} duplicated key(s) in {json_file}, only the last copy is written. "
+                  f"Examples: {report.duplicate_keys[:5]}")
+            if self.fail_on_duplicates:
+                report.elapsed_seconds = time.monotonic() - started_at
+                return report
+
+        # Pass 2: stream the items again into batches, consumed by the writer threads
+        batches = queue.Queue(maxsize=self.writer_threads * 4) # Bounded, so the reader can't run ahead
+        counters_lock = threading.Lock()
+
+        def writer():
+            while True:
+                batch = batches.get()
+                if batch is None:
+                    return
+                try:
+                    written, failed, throttles, retries = self._write_batch(table_name, batch)
+                except Exception as e:
+                    # Not retryable (validation, access denied...): the batch fails but the writer keeps
+                    # draining the queue, otherwise the reader would block forever on the full queue
+                    written, failed, throttles, retries = 0, len(batch), 0, 0
+                    with counters_lock:
+                        if len(report.errors) < MAX_ERROR_SAMPLES:
+                            report.errors.append(str(e))
+                with counters_lock:
+                    report.batches += 1
+                    report.items_written += written
+                    report.failed_items += failed
+                    report.throttles += throttles
+                    report.retries += retries
+
+        with ThreadPoolExecutor(max_workers=self.writer_threads) as executor:
+            workers = [executor.submit(writer) for _ in range(self.writer_threads)]
+            try:
+                batch = []
+                for position, item in enumerate(iter_json_array(json_file, array_key)):
+                    key = item_key(item)
+                    if key is None or last_position.get(key, position) != position:
+                        continue
+                    batch.append({'PutRequest': {'Item': item}})
+                    if len(batch) == self.batch_size:
+                        batches.put(batch)
+                        batch = []
+                if batch:
+                    batches.put(batch)
+            finally:
+                for _ in workers:
+                    batches.put(None) # One stop signal per writer
+            for worker in workers:
+                worker.result()
+
+        report.elapsed_seconds = time.monotonic() - started_at
+        return report
+
+    def _backoff(self, attempt: int):
+        time.sleep(backoff_delay(attempt, self.base_backoff, self.max_backoff))
+
+    def _write_batch(self, table_name: str, requests: list) -> tuple:
+        """
+        Sends one BatchWriteItem request and retries what DynamoDB didn't process.
+        :return: tuple (items written, items failed, throttles, retries)
+        """
+        client = self.dynamo.dynamodb.meta.client # Thread-safe, and accepts plain Python types
+        controller = self.dynamo.get_write_controller(table_name) # Paces us to the table's write capacity
+        throttles = 0
+        retries = 0
+        pending = requests
+
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                retries += 1
+                self._backoff(attempt)
+            # Reserved before sending, so the writer threads share the table's capacity instead of all
+            # going at once; settled with the consumed capacity of the response
+            reserved = sum(estimate_write_units(request['PutRequest']['Item']) for request in pending)
+            if controller:
+                controller.wait(reserved)
+            try:
+                response = client.batch_write_item(RequestItems={table_name: pending}, ReturnConsumedCapacity='INDEXES')
+            except ClientError as e:
+                if e.response['Error']['Code'] not in THROTTLE_ERRORS:
+                    raise
+                throttles += 1
+                if controller:
+                    controller.record_throttle()
+                continue
+
+            # The base table's share only: the GSI writes are billed to the indexes' own capacity,
+            # the controller's rate is the table's provisioned WCU
+            consumed = sum(c.get('Table', {}).get('CapacityUnits', c.get('CapacityUnits', 0))
+                           for c in response.get('ConsumedCapacity', []))
+            pending = response.get('UnprocessedItems', {}).get(table_name, [])
+            if controller:
+                controller.record_success(consumed, reserved)
+                if pending:
+                    controller.record_throttle() # Unprocessed items mean the table is throttling us
+            if not pending:
+                return len(requests), 0, throttles, retries
+            throttles += 1
+
+        return len(requests) - len(pending), len(pending), throttles, retries
@@ -0,0 +1,97 @@
+import threading
+import time
+from collections import OrderedDict
+
+MISSING = object() # Returned by TTLCache.get when the key is not cached (or expired)
+
+
+class TTLCache:
+    """
+    Thread-safe, bounded LRU cache whose entries expire after a time-to-live.
+
+    It also supports negative caching: set_missing(key) remembers for a shorter time that a key
+    doesn't exist, and get() then returns None instead of MISSING.
+    """
+
+    def __init__(self, maxsize: int = 10000, ttl: float = 300, negative_ttl: float = 30):
+        """
+        :param int maxsize: Maximum number of entries, the least recently used one is evicted first.
+        :param float ttl: Seconds a value stays valid.
+        :param float negative_ttl: Seconds a "doesn't exist" entry stays valid.
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self._entries = OrderedDict() # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        """
+        :param key: The cache key.
+        :return: The cached value, None for a cached "doesn't exist", or MISSING
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= time.monotonic():
+                if entry is not None:
+                    del self._entries[key] # Expired
+                self.misses += 1
+                return MISSING
+
+            self._entries.move_to_end(key) # Mark as recently used
+            if entry[1] is None:
+                self.negative_hits += 1
+            else:
+                self.hits += 1
+            return entry[1]
+
+    def set(self, key, value, ttl: float = None):
+        """
+        :param key: The cache key.
+        :param value: The value to cache (None is stored as a negative entry).
+        :param float ttl: (Optional) Overrides the default time-to-live for this entry.
+        """
+        if ttl is None:
+            ttl = self.negative_ttl if value is None else self.ttl
+
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def set_missing(self, key):
+        """
+        Remembers that the key doesn't exist, for negative_ttl seconds.
+        :param key: The cache key.
+        """
+        self.set(key, None)
+
+    def invalidate(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.negative_hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "negative_hits": self.negative_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": (self.hits + self.negative_hits) / lookups if lookups else 0.0
+            }
@@ -0,0 +1,197 @@
+import hashlib
+import json
+
+# The fields a song can be searched by. Every field gets its own postings map.
+INDEXED_FIELDS = ("title", "artist", "year", "album")
+
+
+class CatalogIndex:
+    """
+    In-memory inverted index over the music catalog.
+
+    Every indexed field keeps a postings map: normalized value -> set of song ids.
+    A multi-field query is an AND over these sets, so it never touches DynamoDB
+    and costs no read capacity units.
+    """
+
+    def __init__(self, fields: tuple = INDEXED_FIELDS, key_fields: tuple = ("title", "album")):
+        self.fields = tuple(fields)
+        self.key_fields = tuple(key_fields) # Same primary key as the 'music' table (title + album)
+        self.songs = []     # song id -> song dict (None once a song is removed)
+        self.postings = {field: {} for field in self.fields}
+        self.song_ids = {}  # primary key tuple -> song id
+        self.version = 0    # Bumped on every change (in this process), see also content_tag()
+        self._content_hash = 0      # XOR of the hashes of the songs, see content_tag()
+        self._built_version = 0     # version right after the last build
+        self._value_versions = {}   # (field, normalized value) -> version of the last change of its songs
+
+    @staticmethod
+    def normalize(value) -> str:
+        """
+        Normalize a field value so lookups are case and whitespace insensitive.
+        :param value: The raw field value.
+        :return: str
+        """
+        return str(value).strip().casefold()
+
+    def __len__(self):
+        return len(self.song_ids)
+
+    @staticmethod
+    def _song_hash(song: dict) -> int:
+        return int.from_bytes(hashlib.sha1(json.dumps(song, sort_keys=True, default=str).encode()).digest()[:12], "big")
+
+    def add_song(self, song: dict) -> int:
+        """
+        Adds a song to the index. A song with the same primary key as an existing one replaces it,
+        which matches how put_item behaves on the 'music' table.
+        :param dict song: The song record.
+        :return: int (the song id)
+        """
+        key = tuple(song.get(field) for field in self.key_fields)
+        song_id = self.song_ids.get(key)
+        self.version += 1
+
+        if song_id is None:
+            song_id = len(self.songs)
+            self.songs.append(song)
+            self.song_ids[key] = song_id
+        else:
+            self._touch(self.songs[song_id])
+            self._remove_postings(song_id) # Drop the postings of the old version first
+            self._content_hash ^= self._song_hash(self.songs[song_id])
+            self.songs[song_id] = song
+        self._content_hash ^= self._song_hash(song)
+
+        for field in self.fields:
+            if field in song:
+                self.postings[field].setdefault(self.normalize(song[field]), set()).add(song_id)
+        self._touch(song)
+        return song_id
+
+    def remove_song(self, key: dict) -> bool:
+        """
+        Removes a song from the index, e.g. when it is deleted from the 'music' table.
+        :param dict key: The song's primary key attributes, e.g. {"title": "...", "album": "..."}.
+        :return: bool (False if the song wasn't indexed)
+        """
+        song_id = self.song_ids.pop(tuple(key.get(field) for field in self.key_fields), None)
+        if song_id is None:
+            return False
+
+        self.version += 1
+        self._touch(self.songs[song_id])
+        self._remove_postings(song_id)
+        self._content_hash ^= self._song_hash(self.songs[song_id])
+        self.songs[song_id] = None
+        return True
+
+    def _touch(self, song: dict):
+        for field in self.fields:
+            if field in song:
+                self._value_versions[(field, self.normalize(song[field]))] = self.version
+
+    def value_version(self, field: str, value) -> int:
+        """
+        The version at which the songs having this field value last changed, e.g. to rebuild
+        what is derived from one artist's songs only when one of them changed.
+        :return: int, compare it with a version remembered earlier
+        """
+        return max(self._built_version, self._value_versions.get((field, self.normalize(value)), 0))
+
+    def _remove_postings(self, song_id: int):
+        old_song = self.songs[song_id]
+        for field in self.fields:
+            if field not in old_song:
+                continue
+            value = self.normalize(old_song[field])
+            ids = self.postings[field].get(value)
+            if ids is not None:
+                ids.discard(song_id)
+                if not ids:
+                    del self.postings[field][value]
+
+    def build(self, songs) -> int:
+        """
+        Rebuilds the whole index from an iterable of songs. The new postings are built aside
+        and swapped in at the end, so queries running meanwhile still see the old catalog.
+        :param songs: An iterable of song dicts.
+        :return: int (number of songs indexed)
+        """
+        new_index = CatalogIndex(self.fields, self.key_fields)
+        for song in songs:
+            new_index.add_song(song)
+
+        self.songs, self.postings, self.song_ids = new_index.songs, new_index.postings, new_index.song_ids
+        self._content_hash = new_index._content_hash
+        self.version += 1
+        self._built_version, self._value_versions = self.version, {}
+        return len(self)
+
+    def content_tag(self) -> str:
+        """
+        Identifies the current content of the catalog, e.g. for HTTP ETags. Unlike version, it only depends
+        on the songs: every process holding the same songs has the same tag, whatever the order it built
+        or changed them in, and processes holding different songs (almost surely) have different ones.
+        It is the XOR of a hash of every song, so a change updates it in O(1).
+        :return: str
+        """
+        return f"{self._content_hash:024x}"
+
+    def load_from_json(self, json_file: str) -> int:
+        """
+        Builds the index from the catalog JSON file (same format as data/2025a1.json).
+        :param str json_file: The path to the JSON file containing songs.
+        :return: int (number of songs indexed)
+        """
+        with open(json_file, "r", encoding="utf-8") as file:
+            loaded_data = json.load(file)
+
+        if 'songs' not in loaded_data or not isinstance(loaded_data['songs'], list):
+            raise ValueError("Invalid JSON format: missing or incorrect 'songs' key.")
+
+        return self.build(loaded_data['songs'])
+
+    def load_from_table(self, dynamo, table_name: str) -> int:
+        """
+        Builds the index from a full read of the DynamoDB table (segmented parallel Scan).
+        :param dynamo: A DynamoManager instance.
+        :param str table_name: The name of the music table.
+        :return: int (number of songs indexed)
+        """
+        return self.build(dynamo.parallel_scan(table_name))
+
+    def query(self, filters: dict, limit: int = None) -> list:
+        """
+        Returns the songs matching ALL the given field filters.
+        Empty filter values are ignored.
+        :param dict filters: field -> value, e.g. {"artist": "Sublime", "year": "1996"}
+        :param int limit: (Optional) Maximum number of songs to return.
+        :return: list of song dicts, in catalog order
+        """
+        if limit is not None and limit < 1:
+            raise ValueError("limit must be at least 1.")
+        terms = {field: value for field, value in filters.items() if value not in (None, "")}
+        if not terms:
+            raise ValueError("At least one query field is required.")
+
+        unknown = set(terms) - set(self.fields)
+        if unknown:
+            raise ValueError(f"Unknown query field(s): {', '.join(sorted(unknown))}")
+
+        # Look up the postings of every term; a term with no postings means no result at all
+        matches = []
+        for field, value in terms.items():
+            ids = self.postings[field].get(self.normalize(value))
+            if not ids:
+                return []
+            matches.append(ids)
+
+        # Intersect starting from the smallest postings set to keep the work minimal
+        matches.sort(key=len)
+        result_ids = [song_id for song_id in matches[0] if all(song_id in ids for ids in matches[1:])]
+        result_ids.sort()
+
+        if limit is not None:
+            result_ids = result_ids[:limit]
+        return [self.songs[song_id] for song_id in result_ids]
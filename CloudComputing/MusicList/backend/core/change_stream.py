@@ -0,0 +1,494 @@
+import asyncio
+import collections
+import itertools
+import json
+import threading
+import time
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+import boto3
+import requests
+from boto3.dynamodb.types import TypeDeserializer, TypeSerializer
+from botocore.exceptions import ClientError
+from backend.core.dynamo import DynamoManager
+
+deserializer = TypeDeserializer()
+serializer = TypeSerializer()
+
+
+@dataclass
+class ChangeRecord:
+    """
+    One item change read from a table's stream.
+    event_name is INSERT, MODIFY or REMOVE; images are plain Python dicts (None if the stream doesn't carry them).
+    """
+    table_name: str
+    event_name: str
+    keys: dict
+    new_image: dict = None
+    old_image: dict = None
+    sequence_number: str = None
+
+
+def _from_dynamodb(item: dict):
+    if item is None:
+        return None
+    return {name: deserializer.deserialize(value) for name, value in item.items()}
+
+
+def _to_dynamodb(item: dict):
+    # Typed form ({"N": "1996"}), so numbers stay Decimals on the way through the relay
+    if item is None:
+        return None
+    return {name: serializer.serialize(value) for name, value in item.items()}
+
+
+class DynamoStreamSource:
+    """
+    Tails the DynamoDB Stream of one table, following every shard from the position at start().
+
+    Shards are closed and replaced every few hours, and split when the table scales: the shard list is
+    listed again every shard_refresh seconds and new shards are read from their start (TRIM_HORIZON),
+    while the shards open at start() are read from LATEST. A child shard is only read once its parent
+    is closed and fully read, so the changes of an item are always applied in order.
+    DynamoDB allows about 2 readers per shard: one process per instance reads it (the sidecar,
+    scripts/change_stream_sidecar.py) and relays the changes to the API workers (RelayStreamSource).
+    """
+
+    def __init__(self, table_name: str, region='us-east-1', endpoint_url=None, shard_refresh: float = 30,
+                 max_records: int = 1000):
+        """
+        :param str table_name: The table whose stream is read (its stream must be enabled).
+        :param str endpoint_url: (Optional) A local stand-in instead of AWS.
+        :param float shard_refresh: Seconds between two listings of the shards.
+        :param int max_records: Maximum records per GetRecords call.
+        """
+        self.table_name = table_name
+        self.dynamo = DynamoManager(region=region, endpoint_url=endpoint_url)
+        self.streams = boto3.client('dynamodbstreams', region_name=region, endpoint_url=endpoint_url)
+        self.shard_refresh = shard_refresh
+        self.max_records = max_records
+        self.stream_arn = None
+        self._iterators = {}     # shard id -> next shard iterator, None once the shard is closed and read
+        self._parents = {}       # shard id -> parent shard id
+        self._refreshed_at = 0.0
+
+    def _list_shards(self) -> list:
+        shards = []
+        describe_kwargs = {'StreamArn': self.stream_arn}
+        while True:
+            description = self.streams.describe_stream(**describe_kwargs)['StreamDescription']
+            shards.extend(description['Shards'])
+            if not description.get('LastEvaluatedShardId'):
+                return shards
+            describe_kwargs['ExclusiveStartShardId'] = description['LastEvaluatedShardId']
+
+    def _refresh_shards(self, iterator_type: str):
+        for shard in self._list_shards():
+            if shard['ShardId'] in self._iterators:
+                continue
+            self._parents[shard['ShardId']] = shard.get('ParentShardId')
+            self._iterators[shard['ShardId']] = self.streams.get_shard_iterator(
+                StreamArn=self.stream_arn, ShardId=shard['ShardId'], ShardIteratorType=iterator_type
+            )['ShardIterator']
+        self._refreshed_at = time.monotonic()
+
+    def start(self):
+        """
+        Positions the source at the end of the stream: changes made from now on will be returned by poll().
+        Raises ValueError if the table has no stream.
+        """
+        self.stream_arn = self.dynamo.get_stream_arn(self.table_name, refresh=True)
+        if self.stream_arn is None:
+            raise ValueError(f"❌ Table '{self.table_name}' has no stream enabled.")
+        self._iterators = {}
+        self._parents = {}
+        self._refresh_shards('LATEST')
+
+    def _readable(self, shard_id: str) -> bool:
+        # A parent trimmed from the stream (not listed) counts as read
+        parent = self._parents.get(shard_id)
+        return parent is None or self._iterators.get(parent) is None
+
+    def _read_shard(self, shard_id: str) -> list:
+        try:
+            response = self.streams.get_records(ShardIterator=self._iterators[shard_id], Limit=self.max_records)
+        except ClientError as e:
+            if e.response['Error']['Code'] != 'ExpiredIteratorException':
+                raise
+            # Not read for 15 minutes: start again from the oldest record still in the shard,
+            # replaying is safe since the handlers are idempotent
+            self._iterators[shard_id] = self.streams.get_shard_iterator(
+                StreamArn=self.stream_arn, ShardId=shard_id, ShardIteratorType='TRIM_HORIZON'
+            )['ShardIterator']
+            return []
+
+        records = []
+        for record in response.get('Records', []):
+            change = record['dynamodb']
+            records.append(ChangeRecord(
+                table_name=self.table_name,
+                event_name=record['eventName'],
+                keys=_from_dynamodb(change['Keys']),
+                new_image=_from_dynamodb(change.get('NewImage')),
+                old_image=_from_dynamodb(change.get('OldImage')),
+                sequence_number=change.get('SequenceNumber')
+            ))
+        # Advanced only once the records are built: a failed read is retried from the same position
+        self._iterators[shard_id] = response.get('NextShardIterator') # None: closed shard, fully read
+        return records
+
+    def poll(self) -> list:
+        """
+        Reads what was written since the last poll, on every shard.
+        A shard that fails (throttling, network...) is skipped and read again from the same position
+        on the next poll, the records of the other shards are still returned.
+        Raises the error only if no shard could be read, so the caller backs off.
+        :return: list of ChangeRecord, in stream order within each shard
+        """
+        if time.monotonic() - self._refreshed_at > self.shard_refresh:
+            try:
+                self._refresh_shards('TRIM_HORIZON') # Shards created since the last listing
+            except ClientError as e:
+                print(f"⚠️ Failed to list the shards of '{self.table_name}': {e}")
+
+        records = []
+        error = None
+        for shard_id in list(self._iterators):
+            if self._iterators[shard_id] is None or not self._readable(shard_id):
+                continue
+            try:
+                records.extend(self._read_shard(shard_id))
+            except ClientError as e:
+                error = e
+                print(f"⚠️ Failed to read shard {shard_id} of '{self.table_name}': {e}")
+        if error is not None and not records:
+            raise error
+        return records
+
+
+class FakeStreamSource:
+    """
+    In-memory stand-in for DynamoStreamSource, for tests and local runs without AWS:
+    push changes with put() (or record_put/record_delete), the consumer reads them with poll().
+    """
+
+    def __init__(self, table_name: str):
+        self.table_name = table_name
+        self._pending = collections.deque()
+        self._sequence = 0
+        self._lock = threading.Lock()
+
+    def start(self):
+        pass
+
+    def put(self, event_name: str, keys: dict, new_image: dict = None, old_image: dict = None):
+        with self._lock:
+            self._sequence += 1
+            self._pending.append(ChangeRecord(self.table_name, event_name, keys, new_image, old_image,
+                                              str(self._sequence)))
+
+    def record_put(self, key_fields: tuple, item: dict, old_item: dict = None):
+        # What a put_item produces on a NEW_AND_OLD_IMAGES stream
+        keys = {name: item[name] for name in key_fields}
+        self.put('MODIFY' if old_item else 'INSERT', keys, new_image=item, old_image=old_item)
+
+    def record_delete(self, keys: dict, old_item: dict = None):
+        self.put('REMOVE', keys, old_image=old_item)
+
+    def poll(self) -> list:
+        with self._lock:
+            records = list(self._pending)
+            self._pending.clear()
+        return records
+
+
+class ChangeRelay:
+    """
+    Hands the changes read by the instance's single stream reader (the sidecar) to every API worker
+    of the instance: each record gets a position, the workers fetch the records after their last
+    position over HTTP on 127.0.0.1 (RelayStreamSource). DynamoDB Streams then has one reader per
+    instance, however many gunicorn workers run.
+
+    The last max_records records are kept; a worker that falls further behind is told it missed changes.
+    """
+
+    def __init__(self, max_records: int = 10000):
+        """
+        :param int max_records: Records kept for the workers to read.
+        """
+        self._records = collections.deque(maxlen=max_records) # (position, table name, serialized record)
+        self.position = 0 # Position of the last record added
+        self._lock = threading.Lock()
+
+    def handler(self, record: ChangeRecord):
+        """
+        Consumer handler (register it for every relayed table): adds the record for the workers.
+        """
+        serialized = {
+            "table_name": record.table_name,
+            "event_name": record.event_name,
+            "keys": _to_dynamodb(record.keys),
+            "new_image": _to_dynamodb(record.new_image),
+            "old_image": _to_dynamodb(record.old_image),
+            "sequence_number": record.sequence_number
+        }
+        with self._lock:
+            self.position += 1
+            self._records.append((self.position, record.table_name, serialized))
+
+    def read(self, after: int, table_name: str = None, limit: int = 1000) -> dict:
+        """
+        :param int after: The position of the last record the worker has.
+        :param str table_name: (Optional) Only the records of this table.
+        :param int limit: Maximum records scanned.
+        :return: dict with 'position' (pass it as `after` next time), 'missed' (records after `after`
+                 were dropped, or the relay restarted) and 'records'
+        """
+        with self._lock:
+            restarted = after > self.position # Positions start again from 0 with a new sidecar process
+            if restarted:
+                after = 0
+            oldest = self._records[0][0] if self._records else self.position + 1
+            missed = restarted or after + 1 < oldest
+            start = max(after + 1, oldest)
+            selected = list(itertools.islice(self._records, start - oldest, start - oldest + limit))
+        return {
+            "position": selected[-1][0] if selected else max(after, oldest - 1),
+            "missed": missed,
+            "records": [serialized for _, table, serialized in selected if table_name in (None, table)]
+        }
+
+    def serve(self, host: str = "127.0.0.1", port: int = 8081) -> ThreadingHTTPServer:
+        """
+        Starts the HTTP endpoint of the workers in a background thread:
+        GET /changes?after=<position>&table=<name>, and GET /position for the current position.
+        :return: the server, call shutdown() to stop it
+        """
+        relay = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                url = urlparse(self.path)
+                query = parse_qs(url.query)
+                if url.path == "/position":
+                    body = {"position": relay.position}
+                elif url.path == "/changes":
+                    try:
+                        after = int(query.get("after", ["0"])[0])
+                    except ValueError:
+                        self.send_error(400, "after must be an integer")
+                        return
+                    body = relay.read(after, query.get("table", [None])[0])
+                else:
+                    self.send_error(404)
+                    return
+                payload = json.dumps(body).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, *args):
+                pass # Polled every second by every worker
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=server.serve_forever, name="change-relay", daemon=True).start()
+        return server
+
+
+class RelayStreamSource:
+    """
+    Stream source of an API worker in production: reads one table's changes from the instance's
+    ChangeRelay (the sidecar) instead of DynamoDB Streams. Same interface as DynamoStreamSource.
+    """
+
+    def __init__(self, table_name: str, url: str = "http://127.0.0.1:8081", timeout: float = 5,
+                 start_timeout: float = 60):
+        """
+        :param str table_name: The table whose changes are read.
+        :param str url: The base URL of the relay.
+        :param float timeout: Seconds per HTTP request.
+        :param float start_timeout: Seconds start() waits for the relay to come up.
+        """
+        self.table_name = table_name
+        self.url = url.rstrip("/")
+        self.timeout = timeout
+        self.start_timeout = start_timeout
+        self.position = None
+        self.session = requests.Session() # Keep-alive to the relay
+
+    def start(self):
+        """
+        Positions the source at the relay's current position, waiting for the sidecar if it is starting too.
+        """
+        deadline = time.monotonic() + self.start_timeout
+        while True:
+            try:
+                response = self.session.get(f"{self.url}/position", timeout=self.timeout)
+                response.raise_for_status()
+                self.position = response.json()["position"]
+                return
+            except requests.RequestException:
+                if time.monotonic() > deadline:
+                    raise
+                time.sleep(1)
+
+    def poll(self) -> list:
+        """
+        Reads the records relayed since the last poll. Records the relay dropped before this worker
+        read them are reported in the log: the worker's caches may then be stale until it restarts.
+        :return: list of ChangeRecord, in stream order
+        """
+        response = self.session.get(f"{self.url}/changes", params={"after": self.position, "table": self.table_name},
+                                    timeout=self.timeout)
+        response.raise_for_status()
+        body = response.json()
+        self.position = body["position"]
+        records = [ChangeRecord(
+            table_name=record["table_name"],
+            event_name=record["event_name"],
+            keys=_from_dynamodb(record["keys"]),
+            new_image=_from_dynamodb(record["new_image"]),
+            old_image=_from_dynamodb(record["old_image"]),
+            sequence_number=record["sequence_number"]
+        ) for record in body["records"]]
+        if body["missed"]:
+            print(f"❌ Changes of '{self.table_name}' were dropped by the relay before this worker read them.")
+        return records
+
+
+def catalog_handler(catalog):
+    """
+    Applies song changes to a CatalogIndex: inserts and updates replace the song, removals drop it.
+    Needs a NEW_AND_OLD_IMAGES (or NEW_IMAGE) stream.
+    """
+    def apply(record: ChangeRecord):
+        if record.event_name == 'REMOVE':
+            catalog.remove_song(record.keys)
+        elif record.new_image is not None:
+            catalog.add_song(record.new_image)
+    return apply
+
+
+def cache_invalidation_handler(cache, key_attribute: str):
+    """
+    Drops the cached entry of every changed item, e.g. the user records cached by email.
+    Works with any stream view type, only the keys are used.
+    """
+    def apply(record: ChangeRecord):
+        cache.invalidate(record.keys[key_attribute])
+    return apply
+
+
+class ChangeStreamConsumer:
+    """
+    Tails table streams and applies every change to the registered caches and indexes,
+    so they stay exact without periodic full reloads.
+
+    In the API process run() is an asyncio task: sources are polled in a thread and the handlers
+    run on the event loop, the thread the catalog queries run on, so they never see a half-applied change.
+    The sidecar (scripts/change_stream_sidecar.py, or tests) calls poll_once() / run_forever() instead.
+    """
+
+    def __init__(self, poll_interval: float = 1.0, max_backoff: float = 30.0):
+        """
+        :param float poll_interval: Seconds between two polls when the streams are idle.
+        :param float max_backoff: Upper bound of the delay after consecutive polling errors.
+        """
+        self.poll_interval = poll_interval
+        self.max_backoff = max_backoff
+        self.sources = []
+        self.handlers = {} # table name -> list of handlers
+        self.stats = {'records': 0, 'applied': 0, 'handler_errors': 0, 'poll_errors': 0, 'last_record_at': None}
+
+    def register(self, source, *handlers):
+        """
+        Adds a stream source and the handlers its changes are applied to.
+        :param source: A DynamoStreamSource or FakeStreamSource.
+        :param handlers: Callables taking a ChangeRecord, e.g. catalog_handler(catalog).
+        """
+        if source not in self.sources:
+            self.sources.append(source)
+        self.handlers.setdefault(source.table_name, []).extend(handlers)
+
+    def start(self):
+        """
+        Positions every source at the end of its stream. Call it BEFORE loading the caches:
+        changes written during the load are then applied afterwards instead of being missed.
+        """
+        for source in self.sources:
+            source.start()
+
+    def _poll_sources(self) -> tuple:
+        # A failing source doesn't discard what the others returned
+        records = []
+        failed = 0
+        for source in self.sources:
+            try:
+                records.extend(source.poll())
+            except Exception as e:
+                failed += 1
+                self.stats['poll_errors'] += 1
+                print(f"⚠️ Change stream poll of '{source.table_name}' failed ({e}), retrying.")
+        return records, failed
+
+    def apply(self, records: list) -> int:
+        """
+        Applies records to their table's handlers. A failing handler is counted and skipped,
+        it doesn't stop the others.
+        :return: int, the number of records applied
+        """
+        for record in records:
+            self.stats['records'] += 1
+            for handler in self.handlers.get(record.table_name, []):
+                try:
+                    handler(record)
+                    self.stats['applied'] += 1
+                except Exception as e:
+                    self.stats['handler_errors'] += 1
+                    print(f"❌ Failed to apply {record.event_name} {record.keys} of '{record.table_name}': {e}")
+        if records:
+            self.stats['last_record_at'] = time.time()
+        return len(records)
+
+    def poll_once(self) -> int:
+        """
+        Polls every source once and applies what it returned (on the calling thread).
+        :return: int, the number of records applied
+        """
+        records, _ = self._poll_sources()
+        return self.apply(records)
+
+    def _retry_delay(self, failures: int) -> float:
+        if failures:
+            return min(self.max_backoff, self.poll_interval * (2 ** failures))
+        return self.poll_interval
+
+    async def run(self):
+        """
+        Polls forever, until the task is cancelled. Failing sources are retried with exponential backoff.
+        """
+        failures = 0
+        while True:
+            records, failed = await asyncio.to_thread(self._poll_sources)
+            self.apply(records)
+            failures = failures + 1 if failed else 0
+            if failed or not records:
+                await asyncio.sleep(self._retry_delay(failures))
+
+    def run_forever(self, stop_event: threading.Event = None):
+        """
+        Blocking variant of run() for a sidecar process or thread.
+        :param threading.Event stop_event: (Optional) Set it to stop the loop.
+        """
+        stop_event = stop_event or threading.Event()
+        failures = 0
+        while not stop_event.is_set():
+            records, failed = self._poll_sources()
+            self.apply(records)
+            failures = failures + 1 if failed else 0
+            if failed or not records:
+                stop_event.wait(self._retry_delay(failures))
@@ -0,0 +1,66 @@
+import base64
+import hashlib
+import hmac
+import json
+from boto3.dynamodb.types import TypeDeserializer, TypeSerializer
+from backend.core.tokens import session_secret
+
+
+class InvalidCursorError(Exception):
+    """
+    Raised when a pagination cursor was tampered with, is malformed, or belongs to another listing.
+    """
+
+
+class CursorCodec:
+    """
+    Turns a DynamoDB LastEvaluatedKey into an opaque, signed cursor and back.
+
+    Clients can't forge or alter the key (it's HMAC-SHA256 signed), and a cursor is bound to the listing
+    that issued it (table, projection...), so it can't be replayed against another one.
+    Key values are stored in DynamoDB's typed JSON form, so numeric keys come back as numbers.
+    """
+
+    def __init__(self, secret: str):
+        """
+        :param str secret: The signing key, the same for every worker and instance.
+        """
+        self._key = secret.encode()
+        self._serializer = TypeSerializer()
+        self._deserializer = TypeDeserializer()
+
+    @classmethod
+    def from_env(cls) -> "CursorCodec":
+        # Derived from the session secret (shared by every worker and instance) but distinct from the
+        # token key, so a cursor signature can never be replayed as a token one or the other way round
+        return cls(hmac.new(session_secret().encode(), b"musiclist-page-cursors", hashlib.sha256).hexdigest())
+
+    def _sign(self, payload: bytes, context: str) -> bytes:
+        return hmac.new(self._key, context.encode() + b"\0" + payload, hashlib.sha256).digest()[:16]
+
+    def encode(self, last_evaluated_key: dict, context: str = "") -> str:
+        """
+        :param dict last_evaluated_key: The LastEvaluatedKey of a Scan/Query page (plain Python values).
+        :param str context: Describes the listing, e.g. "music|title,artist".
+        :return: str, URL-safe cursor
+        """
+        typed_key = {name: self._serializer.serialize(value) for name, value in last_evaluated_key.items()}
+        payload = json.dumps(typed_key, separators=(",", ":"), sort_keys=True).encode()
+        return base64.urlsafe_b64encode(self._sign(payload, context) + payload).rstrip(b"=").decode("ascii")
+
+    def decode(self, cursor: str, context: str = "") -> dict:
+        """
+        Raises InvalidCursorError if the cursor wasn't issued for this context.
+        :param str cursor: The cursor sent by the client.
+        :param str context: Must be the context given to encode().
+        :return: dict, the ExclusiveStartKey for the next page
+        """
+        try:
+            raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        except (ValueError, UnicodeEncodeError):
+            raise InvalidCursorError("Malformed cursor")
+
+        signature, payload = raw[:16], raw[16:]
+        if len(signature) < 16 or not hmac.compare_digest(signature, self._sign(payload, context)):
+            raise InvalidCursorError("Invalid cursor")
+        return {name: self._deserializer.deserialize(value) for name, value in json.loads(payload).items()}
@@ -1,12 +1,31 @@
 import boto3
 import json
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from boto3.dynamodb.conditions import Attr, Key
 from botocore.exceptions import ClientError
+from backend.core.bulk_load import BulkLoader
+from backend.core.throttle import AdaptiveRateController, RateLimiter, estimate_write_units
 
 
 class DynamoManager:
-    def __init__(self, region='us-east-1'):
-        self.dynamodb = boto3.resource('dynamodb', region_name=region) #High-level interface to interact with DynamoDB
-        self.client = boto3.client('dynamodb', region_name=region) #Create a low-level client so we can interact with DynamoDB in more detailed ways
+    def __init__(self, region='us-east-1', endpoint_url=None, table_cache_ttl: float = 300):
+        # endpoint_url lets us point at a local DynamoDB stand-in (DynamoDB Local, moto server) instead of AWS
+        self.dynamodb = boto3.resource('dynamodb', region_name=region, endpoint_url=endpoint_url) #High-level interface to interact with DynamoDB
+        self.client = boto3.client('dynamodb', region_name=region, endpoint_url=endpoint_url) #Create a low-level client so we can interact with DynamoDB in more detailed ways
+
+        # Table metadata cache, so we don't call list_tables/describe_table before every write
+        self.table_cache_ttl = table_cache_ttl # Seconds before a cached entry is fetched again
+        self._table_cache = {}         # table name -> (cached_at, description or None if the table doesn't exist)
+        self._table_names = None       # set of names from the last full listing
+        self._table_names_cached_at = 0.0
+        self._table_cache_lock = threading.Lock()
+
+        # One write rate controller per table, shared by every writer thread of this manager
+        self._write_controllers = {}
+        self._write_controllers_lock = threading.Lock()
 
     def create_table(self, table_name: str, schema: dict) -> bool:
         """
@@ -15,19 +34,39 @@ class DynamoManager:
         :return: bool
         """
         # Check if the table already exists
-        existing_table = self.client.list_tables()['TableNames']
-        if table_name in existing_table:
+        if self.table_exists(table_name):
             return False # Table already exists
 
         # Create a table
         try:
             table = self.dynamodb.create_table(TableName= table_name, **schema)
             table.wait_until_exists() # Wait until the table exists
+            self._cache_table(table_name, table.meta.data) # The create response already describes the table
             return True
         except Exception as e:
+            self.invalidate_table_cache(table_name)
             print(f"❌ Fail to create table: {e}")
             return False
 
+    def delete_table(self, table_name: str) -> bool:
+        """
+        Deletes a DynamoDB table and waits until it is gone.
+        :param str table_name: The name of the table.
+        :return: bool
+        """
+        try:
+            table = self.dynamodb.Table(table_name)
+            table.delete()
+            table.wait_until_not_exists()
+            self._cache_table(table_name, None)
+            with self._write_controllers_lock:
+                self._write_controllers.pop(table_name, None)
+            return True
+        except ClientError as e:
+            self.invalidate_table_cache(table_name)
+            print(f"❌ Fail to delete table: {e}")
+            return False
+
     def insert_data(self, table_name: str, data:dict) -> bool:
         """
         Inserts a record into the specified DynamoDB table.
@@ -38,69 +77,510 @@ class DynamoManager:
         :param dict data: A dictionary of data to insert
         :return: bool
         """
-        # Ensure the table exists
-        existing_tables = self.client.list_tables()['TableNames']
-        if table_name not in existing_tables:
-            raise ValueError(f"❌ Table '{table_name}' does not exist. Please create it first.")
+        # Ensure the table exists and the item has its keys (checked locally from the table cache)
+        self.validate_item(table_name, data)
 
+        controller = self.get_write_controller(table_name)
+        reserved = estimate_write_units(data)
         try:
+            if controller:
+                controller.wait(reserved)
             table = self.dynamodb.Table(table_name)
-            table.put_item(Item=data)
+            response = table.put_item(Item=data, ReturnConsumedCapacity='TOTAL')
+            if controller:
+                controller.record_success(response.get('ConsumedCapacity', {}).get('CapacityUnits', 0), reserved)
             return True
 
 
         except ClientError as e:
+            if controller and e.response['Error']['Code'] == 'ProvisionedThroughputExceededException':
+                controller.record_throttle()
             print(f"Failed to insert data: {e}")
             return False
 
-    def load_data_from_json_into_table(self, table_name: str, json_file: str, partition_key: str, sort_key: str = None) -> bool:
+    def get_write_controller(self, table_name: str):
         """
-        Loads data from a JSON file and inserts it into the DynamoDB table.
-        :param str table_name: The name of the DynamoDB table.
-        :param str json_file: The path to the JSON file containing records.
-        :param str partition_key: The primary key attribute used as the partition key in the table.
-        :param str sort_key: (Optional) The attribute used as the sort key, if applicable.
+        Returns the adaptive write rate controller of a table, created from its provisioned
+        WriteCapacityUnits. On-demand tables have no provisioned capacity and get no controller.
+        :param str table_name: The name of the table.
+        :return: AdaptiveRateController, or None for on-demand tables
+        """
+        with self._write_controllers_lock:
+            if table_name in self._write_controllers:
+                return self._write_controllers[table_name]
+
+        description = self.describe_table(table_name)
+        write_capacity = description.get('ProvisionedThroughput', {}).get('WriteCapacityUnits', 0)
+        controller = AdaptiveRateController(write_capacity) if write_capacity else None
+
+        with self._write_controllers_lock:
+            return self._write_controllers.setdefault(table_name, controller)
+
+    def get_write_rates(self) -> dict:
+        """
+        Current write rate of every table written through this manager, for monitoring.
+        :return: dict, table name -> controller stats
+        """
+        with self._write_controllers_lock:
+            controllers = dict(self._write_controllers)
+        return {name: controller.stats() for name, controller in controllers.items() if controller}
+
+    def _cache_table(self, table_name: str, description):
+        with self._table_cache_lock:
+            self._table_cache[table_name] = (time.monotonic(), description)
+            if self._table_names is not None:
+                if description is None:
+                    self._table_names.discard(table_name)
+                else:
+                    self._table_names.add(table_name)
+
+    def invalidate_table_cache(self, table_name: str = None):
+        """
+        Drops cached table metadata, so the next lookup goes back to DynamoDB.
+        :param str table_name: (Optional) Only forget this table, by default the whole cache is cleared.
+        """
+        with self._table_cache_lock:
+            if table_name is None:
+                self._table_cache.clear()
+            else:
+                self._table_cache.pop(table_name, None)
+            self._table_names = None
+
+    def list_table_names(self, refresh: bool = False) -> set:
+        """
+        Returns the names of all tables. list_tables returns at most 100 names per call,
+        so every page is read. The result is cached for table_cache_ttl seconds.
+        :param bool refresh: Ignore the cache and list again.
+        :return: set of table names
+        """
+        with self._table_cache_lock:
+            if not refresh and self._table_names is not None \
+                    and time.monotonic() - self._table_names_cached_at < self.table_cache_ttl:
+                return set(self._table_names)
+
+        table_names = set()
+        for page in self.client.get_paginator('list_tables').paginate():
+            table_names.update(page['TableNames'])
+
+        with self._table_cache_lock:
+            self._table_names = table_names
+            self._table_names_cached_at = time.monotonic()
+        return set(table_names)
+
+    def get_table_metadata(self, table_name: str, refresh: bool = False):
+        """
+        Returns the cached description of a table, calling describe_table when it is missing or expired.
+        :param str table_name: The name of the table.
+        :param bool refresh: Ignore the cache and describe the table again.
+        :return: dict, or None if the table doesn't exist
+        """
+        with self._table_cache_lock:
+            cached = self._table_cache.get(table_name)
+        if not refresh and cached and time.monotonic() - cached[0] < self.table_cache_ttl:
+            return cached[1]
+
+        try:
+            description = self.client.describe_table(TableName=table_name)['Table']
+        except ClientError as e:
+            if e.response['Error']['Code'] != 'ResourceNotFoundException':
+                raise
+            description = None
+
+        self._cache_table(table_name, description)
+        return description
+
+    def table_exists(self, table_name: str) -> bool:
+        """
+        Checks if a table exists, using the cache when possible.
+        :param str table_name: The name of the table.
+        :return: bool
+        """
+        with self._table_cache_lock:
+            cached = self._table_cache.get(table_name)
+            if cached and time.monotonic() - cached[0] < self.table_cache_ttl:
+                return cached[1] is not None
+            if self._table_names is not None and time.monotonic() - self._table_names_cached_at < self.table_cache_ttl:
+                return table_name in self._table_names
+        return self.get_table_metadata(table_name) is not None
+
+    def enable_stream(self, table_name: str, view_type: str = 'NEW_AND_OLD_IMAGES') -> bool:
+        """
+        Turns on the DynamoDB Stream of an existing table (new tables get it from their schema).
+        :param str table_name: The name of the table.
+        :param str view_type: KEYS_ONLY, NEW_IMAGE, OLD_IMAGE or NEW_AND_OLD_IMAGES.
+        :return: bool
+        """
+        try:
+            self.client.update_table(TableName=table_name,
+                                     StreamSpecification={'StreamEnabled': True, 'StreamViewType': view_type})
+            self.client.get_waiter('table_exists').wait(TableName=table_name)
+            return True
+        except ClientError as e:
+            print(f"❌ Failed to enable the stream of '{table_name}': {e}")
+            return False
+        finally:
+            self.invalidate_table_cache(table_name)
+
+    def enable_ttl(self, table_name: str, attribute_name: str) -> bool:
+        """
+        Turns on Time to Live: DynamoDB deletes the items once the epoch seconds in attribute_name are past.
+        :param str table_name: The name of the table.
+        :param str attribute_name: The attribute holding the expiry.
         :return: bool
         """
         try:
-            with open(json_file, "r", encoding="utf-8") as file:
-                loaded_data = json.load(file) # Load the JSON file
+            self.client.update_time_to_live(TableName=table_name,
+                                            TimeToLiveSpecification={'Enabled': True, 'AttributeName': attribute_name})
+            return True
+        except ClientError as e:
+            print(f"❌ Failed to enable the TTL of '{table_name}': {e}")
+            return False
 
-            # Check if the JSON file contains a list of songs
-            if 'songs' not in loaded_data or not isinstance(loaded_data['songs'], list):
-                raise ValueError("Invalid JSON format: missing or incorrect 'songs' key.")
+    def ttl_enabled(self, table_name: str) -> bool:
+        description = self.client.describe_time_to_live(TableName=table_name)['TimeToLiveDescription']
+        return description.get('TimeToLiveStatus') in ('ENABLED', 'ENABLING')
 
-            songs = loaded_data['songs']
-            table = self.dynamodb.Table(table_name)
+    def get_stream_arn(self, table_name: str, refresh: bool = False):
+        """
+        :param str table_name: The name of the table.
+        :param bool refresh: Ignore the table cache.
+        :return: str, the ARN of the table's current stream, or None if its stream is off
+        """
+        description = self.describe_table(table_name, refresh)
+        if not description.get('StreamSpecification', {}).get('StreamEnabled'):
+            return None
+        return description.get('LatestStreamArn')
+
+    def get_key_schema(self, table_name: str) -> dict:
+        """
+        Returns the primary key attribute names of a table.
+        :param str table_name: The name of the table.
+        :return: dict, e.g. {"HASH": "title", "RANGE": "album"}
+        """
+        description = self.describe_table(table_name)
+        return {key['KeyType']: key['AttributeName'] for key in description['KeySchema']}
+
+    def validate_item(self, table_name: str, item: dict):
+        """
+        Checks locally that an item carries all the primary key attributes of the table.
+        Raises ValueError if the table doesn't exist or a key attribute is missing.
+        :param str table_name: The name of the table.
+        :param dict item: The item to check.
+        """
+        missing_keys = [name for name in self.get_key_schema(table_name).values() if item.get(name) in (None, "")]
+        if missing_keys:
+            raise ValueError(f"❌ Item is missing key attribute(s) {', '.join(missing_keys)} for table '{table_name}'.")
+
+    def scan_table(self, table_name: str):
+        """
+        Reads every item of the table, following LastEvaluatedKey across pages.
+        Items are yielded one by one, so callers don't need to hold the whole table in memory.
+        :param str table_name: The name of the table to read.
+        :return: generator of item dicts
+        """
+        table = self.dynamodb.Table(table_name)
+        scan_kwargs = {}
 
-            with table.batch_writer() as batch:
-                for item in songs:
-                    # Check if the partition key exists
-                    if partition_key not in item:
-                        continue  # jump to the item if the partition key is missing
+        while True:
+            response = table.scan(**scan_kwargs)
+            yield from response.get('Items', [])
 
-                    # Build the item with required keys and additional attributes
-                    item_data = {partition_key: item[partition_key]}
+            # A Scan page is at most 1 MB, keep going while DynamoDB says there is more
+            if 'LastEvaluatedKey' not in response:
+                break
+            scan_kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
 
-                    # Add the sort key if it exists
-                    if sort_key:
-                        if sort_key not in item:
-                            continue  # jump to the item if the sort key is missing
-                        item_data[sort_key] = item[sort_key]
+    def count_items(self, table_name: str) -> int:
+        """
+        Counts the items of a table exactly (describe_table's ItemCount is only refreshed every ~6 hours).
+        Uses a COUNT scan, so it reads the whole table but returns no items.
+        :param str table_name: The name of the table.
+        :return: int
+        """
+        table = self.dynamodb.Table(table_name)
+        scan_kwargs = {'Select': 'COUNT'}
+        count = 0
 
-                    # Include additional attributes
-                    for key, value in item.items():
-                        if key not in (partition_key, sort_key):  # Avoid duplicating primary keys
-                            item_data[key] = value
+        while True:
+            response = table.scan(**scan_kwargs)
+            count += response['Count']
+            if 'LastEvaluatedKey' not in response:
+                return count
+            scan_kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
 
-                    # Add the item to the batch
-                    batch.put_item(Item=item_data)
-            return True
+    def set_image_keys(self, table_name: str, keys_by_url: dict) -> int:
+        """
+        Stores on every song the S3 key of its image ('img_key'), from the image sync manifest,
+        so the API can hand the synced object to clients next to the song. Songs already holding
+        the right key are not written again.
+        :param str table_name: The name of the music table.
+        :param dict keys_by_url: img_url -> S3 key (SyncManifest.keys_by_url()).
+        :return: int (number of songs updated)
+        """
+        table = self.dynamodb.Table(table_name)
+        key_names = list(self.get_key_schema(table_name).values())
+        updated = 0
+        for song in self.parallel_scan(table_name, projection=key_names + ['img_url', 'img_key']):
+            img_key = keys_by_url.get(song.get('img_url'))
+            if img_key is None or song.get('img_key') == img_key:
+                continue
+            try:
+                table.update_item(
+                    Key={name: song[name] for name in key_names},
+                    UpdateExpression='SET img_key = :img_key',
+                    ConditionExpression='attribute_exists(#pk)', # Never recreate a song deleted meanwhile
+                    ExpressionAttributeNames={'#pk': key_names[0]},
+                    ExpressionAttributeValues={':img_key': img_key}
+                )
+                updated += 1
+            except ClientError as e:
+                if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+                    raise
+        return updated
+
+    def parallel_scan(self, table_name: str, segments: int = 4, projection: list = None,
+                      filter_expression=None, max_read_units_per_second: float = None,
+                      queue_size: int = 1000, stats: dict = None):
+        """
+        Reads the whole table with a segmented parallel Scan and yields items as they arrive.
+        Each segment runs on its own thread and pushes items into a bounded queue,
+        so memory stays flat no matter how big the table is.
+        :param str table_name: The name of the table to read.
+        :param int segments: Number of Scan segments (TotalSegments), one thread each.
+        :param list projection: (Optional) Attribute names to return, to cut the payload size.
+        :param filter_expression: (Optional) A boto3 condition (Attr(...)) applied on the server side.
+        :param float max_read_units_per_second: (Optional) Read capacity budget shared by all segments.
+        :param int queue_size: Maximum number of items buffered between the workers and the caller.
+        :param dict stats: (Optional) Filled with 'pages' and 'consumed_capacity' once the scan finishes.
+        :return: generator of item dicts (in no particular order)
+        """
+        client = self.dynamodb.meta.client # Thread-safe, and returns plain Python types like Table.scan
+        limiter = RateLimiter(max_read_units_per_second) if max_read_units_per_second else None
+        items_queue = queue.Queue(maxsize=queue_size)
+        stop_event = threading.Event() # Set when the caller stops iterating early
+        done_marker = object()
+        counters = {"pages": 0, "consumed_capacity": 0.0}
+        counters_lock = threading.Lock()
+
+        scan_kwargs = {'TableName': table_name, 'TotalSegments': segments, 'ReturnConsumedCapacity': 'TOTAL'}
+        if projection:
+            # Use placeholders, many attribute names (e.g. 'year') are DynamoDB reserved words
+            scan_kwargs['ProjectionExpression'] = ", ".join(f"#p{i}" for i in range(len(projection)))
+            scan_kwargs['ExpressionAttributeNames'] = {f"#p{i}": name for i, name in enumerate(projection)}
+        if filter_expression is not None:
+            scan_kwargs['FilterExpression'] = filter_expression
+
+        def put(value) -> bool:
+            # Block while the queue is full, but give up if the caller went away
+            while not stop_event.is_set():
+                try:
+                    items_queue.put(value, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def scan_segment(segment: int):
+            request_kwargs = dict(scan_kwargs, Segment=segment)
+            try:
+                while not stop_event.is_set():
+                    if limiter:
+                        limiter.wait()
+                    response = client.scan(**request_kwargs)
+
+                    consumed = response.get('ConsumedCapacity', {}).get('CapacityUnits', 0)
+                    if limiter:
+                        limiter.consume(consumed)
+                    with counters_lock:
+                        counters['pages'] += 1
+                        counters['consumed_capacity'] += consumed
+
+                    for item in response.get('Items', []):
+                        if not put(item):
+                            return
+                    if 'LastEvaluatedKey' not in response:
+                        break
+                    request_kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+            except Exception as e:
+                put(e) # Re-raised in the caller's thread
+            finally:
+                put(done_marker)
+
+        executor = ThreadPoolExecutor(max_workers=segments)
+        try:
+            for segment in range(segments):
+                executor.submit(scan_segment, segment)
+
+            finished_segments = 0
+            while finished_segments < segments:
+                value = items_queue.get()
+                if value is done_marker:
+                    finished_segments += 1
+                elif isinstance(value, Exception):
+                    raise value
+                else:
+                    yield value
+        finally:
+            stop_event.set()
+            executor.shutdown(wait=True)
+            if stats is not None:
+                stats.update(counters)
+
+    def describe_table(self, table_name: str, refresh: bool = False) -> dict:
+        """
+        Returns the table description (key schema, indexes, throughput...), served from the table cache.
+        Raises ValueError if the table doesn't exist.
+        :param str table_name: The name of the table.
+        :param bool refresh: Ignore the cache and describe the table again.
+        :return: dict
+        """
+        description = self.get_table_metadata(table_name, refresh)
+        if description is None:
+            raise ValueError(f"❌ Table '{table_name}' does not exist. Please create it first.")
+        return description
+
+    def plan_query(self, table_name: str, filters: dict) -> dict:
+        """
+        Chooses the cheapest access path for a set of equality filters:
+        GetItem > Query on the base table > Query on a GSI > Scan.
+        :param str table_name: The name of the table.
+        :param dict filters: attribute -> value, every filter must match.
+        :return: dict with 'access_path', 'index_name', 'key' (the key attributes used) and 'filter' (the rest)
+        """
+        filters = {name: value for name, value in filters.items() if value not in (None, "")}
+        if not filters:
+            raise ValueError("At least one filter is required.")
+        description = self.describe_table(table_name)
+
+        def key_names(key_schema):
+            hash_key = next(k['AttributeName'] for k in key_schema if k['KeyType'] == 'HASH')
+            range_key = next((k['AttributeName'] for k in key_schema if k['KeyType'] == 'RANGE'), None)
+            return hash_key, range_key
+
+        def build_plan(access_path, index_name, key_attributes):
+            key = {name: filters[name] for name in key_attributes}
+            rest = {name: value for name, value in filters.items() if name not in key}
+            return {"access_path": access_path, "index_name": index_name, "key": key, "filter": rest}
+
+        # 1. Full primary key -> GetItem (one item, cheapest read)
+        hash_key, range_key = key_names(description['KeySchema'])
+        if hash_key in filters and (range_key is None or range_key in filters):
+            return build_plan("get_item", None, [k for k in (hash_key, range_key) if k])
 
+        # 2. Partition key of the base table -> Query
+        if hash_key in filters:
+            return build_plan("query", None, [hash_key])
+
+        # 3. Partition key of a GSI -> Query on that index, prefer one whose sort key is filtered too
+        best_index = None
+        for index in description.get('GlobalSecondaryIndexes', []):
+            if index.get('Projection', {}).get('ProjectionType') != 'ALL':
+                continue # Items from a partial projection would be missing attributes
+            index_hash, index_range = key_names(index['KeySchema'])
+            if index_hash not in filters:
+                continue
+            key_attributes = [index_hash] + ([index_range] if index_range in filters else [])
+            if best_index is None or len(key_attributes) > len(best_index[1]):
+                best_index = (index['IndexName'], key_attributes)
+
+        if best_index:
+            return build_plan("query_index", best_index[0], best_index[1])
+
+        # 4. Nothing usable -> Scan with a filter
+        return build_plan("scan", None, [])
+
+    def query_items(self, table_name: str, filters: dict) -> dict:
+        """
+        Finds the items matching all the given equality filters, using the access path chosen by plan_query.
+        :param str table_name: The name of the table.
+        :param dict filters: attribute -> value, e.g. {"artist": "Sublime", "year": "1996"}
+        :return: dict with 'access_path', 'index_name', 'items' and 'consumed_capacity'
+        """
+        plan = self.plan_query(table_name, filters)
+        table = self.dynamodb.Table(table_name)
+        items = []
+        consumed_capacity = 0.0
+
+        # Attributes that are not part of the key are checked with a FilterExpression
+        filter_expression = None
+        for name, value in plan['filter'].items():
+            condition = Attr(name).eq(value)
+            filter_expression = condition if filter_expression is None else filter_expression & condition
+
+        if plan['access_path'] == "get_item":
+            response = table.get_item(Key=plan['key'], ReturnConsumedCapacity='TOTAL')
+            consumed_capacity += response.get('ConsumedCapacity', {}).get('CapacityUnits', 0)
+            item = response.get('Item')
+            if item and all(item.get(name) == value for name, value in plan['filter'].items()):
+                items.append(item)
+
+        elif plan['access_path'] == "scan":
+            # Last resort: read all segments in parallel, the filter is applied on the server side
+            stats = {}
+            items.extend(self.parallel_scan(table_name, filter_expression=filter_expression, stats=stats))
+            consumed_capacity += stats.get('consumed_capacity', 0)
+
+        else:
+            key_condition = None
+            for name, value in plan['key'].items():
+                condition = Key(name).eq(value)
+                key_condition = condition if key_condition is None else key_condition & condition
+
+            request_kwargs = {'KeyConditionExpression': key_condition, 'ReturnConsumedCapacity': 'TOTAL'}
+            if filter_expression is not None:
+                request_kwargs['FilterExpression'] = filter_expression
+            if plan['index_name']:
+                request_kwargs['IndexName'] = plan['index_name']
+
+            # Follow LastEvaluatedKey, a page is at most 1 MB before filtering
+            while True:
+                response = table.query(**request_kwargs)
+                consumed_capacity += response.get('ConsumedCapacity', {}).get('CapacityUnits', 0)
+                items.extend(response.get('Items', []))
+                if 'LastEvaluatedKey' not in response:
+                    break
+                request_kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+        return {
+            "access_path": plan['access_path'],
+            "index_name": plan['index_name'],
+            "items": items,
+            "consumed_capacity": consumed_capacity
+        }
+
+    def bulk_load_json(self, table_name: str, json_file: str, partition_key: str, sort_key: str = None, **loader_options):
+        """
+        Loads a (possibly very large) JSON file into the table with the bulk-load pipeline.
+        The file is parsed incrementally, duplicated keys are reported before anything is written,
+        and items are sent as 25-item BatchWriteItem requests by several writer threads.
+        :param str table_name: The name of the DynamoDB table.
+        :param str json_file: The path to the JSON file containing records.
+        :param str partition_key: The primary key attribute used as the partition key in the table.
+        :param str sort_key: (Optional) The attribute used as the sort key, if applicable.
+        :param loader_options: Passed to BulkLoader (writer_threads, max_retries, fail_on_duplicates...).
+        :return: BulkLoadReport
+        """
+        self.describe_table(table_name) # Fail early if the table doesn't exist
+        return BulkLoader(self, **loader_options).load_json(table_name, json_file, partition_key, sort_key)
+
+    def load_data_from_json_into_table(self, table_name: str, json_file: str, partition_key: str, sort_key: str = None) -> bool:
+        """
+        Loads data from a JSON file and inserts it into the DynamoDB table.
+        :param str table_name: The name of the DynamoDB table.
+        :param str json_file: The path to the JSON file containing records.
+        :param str partition_key: The primary key attribute used as the partition key in the table.
+        :param str sort_key: (Optional) The attribute used as the sort key, if applicable.
+        :return: bool
+        """
+        try:
+            report = self.bulk_load_json(table_name, json_file, partition_key, sort_key)
         except Exception as e:
             print(f"❌ Fail to load data from JSON file: {e}")
             return False
 
-
-# To-do:
-# 1. No checking logic for duplicate data in json，後者會覆蓋前者
\ No newline at end of file
+        print(f"Bulk load into '{table_name}': {report.items_written}/{report.items_read} written, "
+              f"{report.duplicates_collapsed} duplicates collapsed, {report.skipped_missing_keys} skipped (missing keys), "
+              f"{report.failed_items} failed, {report.throttles} throttles, {report.elapsed_seconds:.2f}s")
+        if report.errors:
+            print(f"❌ Some batches were rejected: {report.errors[:3]}")
+        return report.success
@@ -1,12 +1,46 @@
 import boto3
+import time
+import urllib.request
+from urllib.error import URLError
+from botocore.exceptions import ClientError
+from backend.core.throttle import backoff_delay
 
-class EC2Manager:
-    def __init__(self, region='us-east-1'):
-        self.ec2 = boto3.resource('ec2', region_name=region)
-        self.ec2_client = boto3.client('ec2', region_name=region)
+# Drop-in override of scripts/deploy/musiclist-backend.service for instances booted from an artifact:
+# the app lives in /opt/musiclist and gunicorn serves port 80 itself (no nginx to install)
+ARTIFACT_BACKEND_OVERRIDE = """[Service]
+WorkingDirectory=/opt/musiclist
+ExecStart=
+ExecStart=/opt/musiclist/venv/bin/gunicorn -c backend/gunicorn_conf.py backend.main:app
+Environment=BIND=0.0.0.0:80
+AmbientCapabilities=CAP_NET_BIND_SERVICE
+"""
+
+ARTIFACT_CHANGE_STREAM_OVERRIDE = """[Service]
+WorkingDirectory=/opt/musiclist
+ExecStart=
+ExecStart=/opt/musiclist/venv/bin/python -m scripts.change_stream_sidecar --port 8081
+"""
+
+ARTIFACT_FRONTEND_SERVICE = """[Unit]
+Description=MusicList frontend (static React build)
+After=network-online.target
+
+[Service]
+User=ubuntu
+ExecStart=/usr/bin/python3 /opt/musiclist/scripts/deploy/serve_static.py --root /opt/musiclist/frontend --port 80
+AmbientCapabilities=CAP_NET_BIND_SERVICE
+Restart=always
+RestartSec=2
+
+[Install]
+WantedBy=multi-user.target
+"""
+
+LAB_INSTANCE_PROFILE_ARN = 'arn:aws:iam::102358803566:instance-profile/LabInstanceProfile'
+ROLE_TAG = 'Role' # Tag used to find the instances of a role (backend / frontend) when scaling
 
-    def create_backend_instance(self, ami_image, instance_type, key_name, security_group_ids, name='MyBackend'):
-        user_data_script = r"""#!/bin/bash
+# Default boot scripts: install everything from apt/git/pip (see artifact_user_data for the fast path)
+BACKEND_USER_DATA = r"""#!/bin/bash
     # 1. Update & install system packages
     sudo apt update -y
     sudo apt install python3-pip python3-venv git nginx -y
@@ -22,8 +56,14 @@ class EC2Manager:
     backend/venv/bin/pip install --upgrade pip
     backend/venv/bin/pip install -r backend/requirements.txt
 
-    # 4. Run FastAPI on port 8000 (0.0.0.0)
-    nohup backend/venv/bin/uvicorn backend.main:app --host 0.0.0.0 --port 8000 > /home/ubuntu/backend.log 2>&1 &
+    # 4. Run FastAPI with gunicorn (one uvicorn worker per core) as a systemd service on port 8000
+    #    systemd restarts it if it crashes and starts it again on reboot.
+    #    The session secret comes from SSM, shared by every instance and kept across restarts
+    sudo backend/venv/bin/python -m scripts.deploy.write_env_file
+    sudo cp scripts/deploy/musiclist-change-stream.service /etc/systemd/system/musiclist-change-stream.service
+    sudo cp scripts/deploy/musiclist-backend.service /etc/systemd/system/musiclist-backend.service
+    sudo systemctl daemon-reload
+    sudo systemctl enable --now musiclist-change-stream musiclist-backend
 
     # 5. Configure Nginx to expose port 80 -> proxy to 127.0.0.1:8000
     sudo rm /etc/nginx/sites-enabled/default
@@ -32,6 +72,11 @@ class EC2Manager:
         listen 80;
         server_name _;
     
+        # Operator endpoints stay on the instance (the app also refuses them through the proxy)
+        location /internal/ {
+            return 404;
+        }
+
         location / {
             proxy_pass http://127.0.0.1:8000;
             proxy_http_version 1.1;
@@ -48,31 +93,7 @@ class EC2Manager:
     sudo systemctl restart nginx
     """
 
-        instances = self.ec2.create_instances(
-            ImageId=ami_image,
-            MinCount=1,
-            MaxCount=1,
-            InstanceType=instance_type,
-            KeyName=key_name,
-            SecurityGroupIds=security_group_ids,
-            TagSpecifications=[{
-                'ResourceType': 'instance',
-                'Tags': [{'Key': 'Name', 'Value': name}]
-            }],
-            UserData=user_data_script,
-            IamInstanceProfile = {
-                'Arn': 'arn:aws:iam::102358803566:instance-profile/LabInstanceProfile'
-            }
-        )
-
-        instance = instances[0]
-        instance.wait_until_running()
-        instance.load()
-
-        return instance.id, instance.public_dns_name
-
-    def create_frontend_instance(self, ami_image, instance_type, key_name, security_group_ids, name='MyFrontend'):
-        user_data_script = r"""#!/bin/bash
+FRONTEND_USER_DATA = r"""#!/bin/bash
     sudo apt update -y
     sudo apt install nginx git -y
 
@@ -106,28 +127,263 @@ class EC2Manager:
     sudo nginx -t && sudo systemctl restart nginx
     """
 
+DEFAULT_USER_DATA = {'backend': BACKEND_USER_DATA, 'frontend': FRONTEND_USER_DATA}
+DEFAULT_INSTANCE_NAMES = {'backend': 'MyBackend', 'frontend': 'MyFrontend'}
+
+
+class EC2Manager:
+    def __init__(self, region='us-east-1'):
+        self.ec2 = boto3.resource('ec2', region_name=region)
+        self.ec2_client = boto3.client('ec2', region_name=region)
+
+    def create_backend_instance(self, ami_image, instance_type, key_name, security_group_ids, name='MyBackend',
+                                user_data=None):
+        # user_data: (Optional) replaces the default boot script, e.g. artifact_user_data('backend', url)
+        fleet = self.launch_fleet('backend', 1, ami_image, instance_type, key_name, security_group_ids,
+                                  name=name, user_data=user_data)
+        instance = fleet['instances'][0]
+        return instance['id'], instance['public_dns']
+
+    def create_frontend_instance(self, ami_image, instance_type, key_name, security_group_ids, name='MyFrontend',
+                                 user_data=None):
+        fleet = self.launch_fleet('frontend', 1, ami_image, instance_type, key_name, security_group_ids,
+                                  name=name, user_data=user_data)
+        instance = fleet['instances'][0]
+        return instance['id'], instance['public_dns']
+
+    def _create_role_instances(self, role, count, ami_image, instance_type, key_name, security_group_ids,
+                               name=None, user_data=None) -> list:
+        # Starts `count` instances of a role with ONE RunInstances call, without waiting for them
+        if role not in DEFAULT_USER_DATA:
+            raise ValueError(f"Unknown role '{role}', choose from {', '.join(DEFAULT_USER_DATA)}")
+
         instances = self.ec2.create_instances(
             ImageId=ami_image,
-            MinCount=1,
-            MaxCount=1,
+            MinCount=count,
+            MaxCount=count,
             InstanceType=instance_type,
             KeyName=key_name,
             SecurityGroupIds=security_group_ids,
             TagSpecifications=[{
                 'ResourceType': 'instance',
-                'Tags': [{'Key': 'Name', 'Value': name}]
+                'Tags': [
+                    {'Key': 'Name', 'Value': name or DEFAULT_INSTANCE_NAMES[role]},
+                    {'Key': ROLE_TAG, 'Value': role}
+                ]
             }],
-            UserData=user_data_script,
-            IamInstanceProfile={
-                'Arn': 'arn:aws:iam::102358803566:instance-profile/LabInstanceProfile'
+            UserData=user_data or DEFAULT_USER_DATA[role],
+            IamInstanceProfile = {
+                'Arn': LAB_INSTANCE_PROFILE_ARN
             }
         )
+        return [instance.id for instance in instances]
+
+    def describe_fleet(self, instance_ids: list, max_retries: int = 6) -> list:
+        """
+        Describes instances with batched describe_instances calls.
+        Right after run_instances the new IDs may not be visible yet (eventual consistency):
+        InvalidInstanceID.NotFound is retried with backoff for a few seconds.
+        :param list instance_ids: The instance IDs.
+        :param int max_retries: Retries of InvalidInstanceID.NotFound.
+        :return: list of dicts with 'id', 'role', 'state', 'public_dns', 'private_ip' and 'launch_time'
+        """
+        paginator = self.ec2_client.get_paginator('describe_instances')
+        for attempt in range(max_retries + 1):
+            if attempt:
+                time.sleep(backoff_delay(attempt, 0.25, 5.0))
+            try:
+                fleet = []
+                for page in paginator.paginate(InstanceIds=instance_ids):
+                    for reservation in page['Reservations']:
+                        for instance in reservation['Instances']:
+                            fleet.append(self._instance_summary(instance))
+                return fleet
+            except ClientError as e:
+                if e.response['Error']['Code'] != 'InvalidInstanceID.NotFound' or attempt == max_retries:
+                    raise
+
+    @staticmethod
+    def _instance_summary(instance: dict) -> dict:
+        tags = {tag['Key']: tag['Value'] for tag in instance.get('Tags', [])}
+        return {
+            'id': instance['InstanceId'],
+            'role': tags.get(ROLE_TAG),
+            'state': instance['State']['Name'],
+            'public_dns': instance.get('PublicDnsName', ''),
+            'private_ip': instance.get('PrivateIpAddress'),
+            'launch_time': instance['LaunchTime'].isoformat() if 'LaunchTime' in instance else None
+        }
+
+    def wait_for_fleet(self, instance_ids: list, state: str = 'running'):
+        """
+        Waits for many instances at once: the waiter polls them all with one describe_instances per round,
+        instead of one wait_until_running() per instance.
+        :param list instance_ids: The instance IDs.
+        :param str state: 'running' or 'terminated'.
+        """
+        if instance_ids:
+            waiter = self.ec2_client.get_waiter(f'instance_{state}')
+            waiter.wait(InstanceIds=instance_ids, WaiterConfig={'Delay': 5, 'MaxAttempts': 120})
+
+    def launch_fleet(self, role, count, ami_image, instance_type, key_name, security_group_ids,
+                     name=None, user_data=None, wait=True) -> dict:
+        """
+        Launches `count` instances of a role in one call.
+        :param str role: 'backend' or 'frontend'.
+        :param int count: Number of instances.
+        :param str name: (Optional) Name tag, defaults to MyBackend / MyFrontend.
+        :param str user_data: (Optional) Boot script, defaults to the role's script.
+        :param bool wait: Wait until all instances are running (their DNS names are known only then).
+        :return: dict manifest {'role': ..., 'instances': [{'id', 'public_dns', ...}]}
+        """
+        return self.launch_fleets({role: count}, ami_image, instance_type, key_name, security_group_ids,
+                                  names={role: name} if name else None,
+                                  user_data={role: user_data} if user_data else None, wait=wait)[role]
+
+    def launch_fleets(self, counts: dict, ami_image, instance_type, key_name, security_group_ids,
+                      names: dict = None, user_data: dict = None, wait=True) -> dict:
+        """
+        Launches several roles at once, e.g. {'backend': 3, 'frontend': 1}. All RunInstances calls are sent
+        first, then every instance is waited for together.
+        :param dict counts: role -> number of instances.
+        :param dict names: (Optional) role -> Name tag.
+        :param dict user_data: (Optional) role -> boot script.
+        :param bool wait: Wait until all instances are running.
+        :return: dict, role -> manifest {'role': ..., 'instances': [...]}
+        """
+        names = names or {}
+        user_data = user_data or {}
+        ids_by_role = {
+            role: self._create_role_instances(role, count, ami_image, instance_type, key_name, security_group_ids,
+                                              name=names.get(role), user_data=user_data.get(role))
+            for role, count in counts.items() if count > 0
+        }
+        all_ids = [instance_id for ids in ids_by_role.values() for instance_id in ids]
+        if wait:
+            self.wait_for_fleet(all_ids)
 
-        instance = instances[0]
-        instance.wait_until_running()
-        instance.load()
+        described = {instance['id']: instance for instance in self.describe_fleet(all_ids)} if all_ids else {}
+        return {
+            role: {'role': role, 'instances': [described[instance_id] for instance_id in ids_by_role.get(role, [])]}
+            for role in counts
+        }
+
+    def list_role_instances(self, role: str) -> list:
+        """
+        Lists the live (pending or running) instances of a role, found by their Role tag.
+        :param str role: 'backend' or 'frontend'.
+        :return: list of instance summaries, oldest first
+        """
+        fleet = []
+        paginator = self.ec2_client.get_paginator('describe_instances')
+        for page in paginator.paginate(Filters=[
+            {'Name': f'tag:{ROLE_TAG}', 'Values': [role]},
+            {'Name': 'instance-state-name', 'Values': ['pending', 'running']}
+        ]):
+            for reservation in page['Reservations']:
+                for instance in reservation['Instances']:
+                    fleet.append(self._instance_summary(instance))
+        return sorted(fleet, key=lambda instance: instance['launch_time'] or '')
+
+    def scale_role(self, role: str, target_count: int, ami_image=None, instance_type=None, key_name=None,
+                   security_group_ids=None, user_data=None, wait=True) -> dict:
+        """
+        Scales a role up or down to target_count instances. Scaling up launches the missing instances in one
+        call (the launch parameters are then required); scaling down terminates the newest instances first.
+        :param str role: 'backend' or 'frontend'.
+        :param int target_count: The wanted number of instances.
+        :param bool wait: Wait until the new instances run / the removed ones are terminated.
+        :return: dict manifest {'role', 'instances', 'launched', 'terminated'}
+        """
+        current = self.list_role_instances(role)
+        launched, terminated = [], []
+
+        if len(current) < target_count:
+            if not (ami_image and instance_type and key_name and security_group_ids):
+                raise ValueError("ami_image, instance_type, key_name and security_group_ids are needed to scale up")
+            fleet = self.launch_fleet(role, target_count - len(current), ami_image, instance_type, key_name,
+                                      security_group_ids, user_data=user_data, wait=wait)
+            launched = [instance['id'] for instance in fleet['instances']]
+            current += fleet['instances']
+
+        elif len(current) > target_count:
+            extra = current[target_count:] # Newest ones
+            terminated = [instance['id'] for instance in extra]
+            self.ec2_client.terminate_instances(InstanceIds=terminated)
+            if wait:
+                self.wait_for_fleet(terminated, state='terminated')
+            current = current[:target_count]
 
-        return instance.id, instance.public_dns_name
+        return {'role': role, 'instances': current, 'launched': launched, 'terminated': terminated}
+
+    @staticmethod
+    def artifact_user_data(role: str, artifact_url: str) -> str:
+        """
+        Lean boot script for an instance started from a pre-built artifact (see scripts/build_artifact.py).
+        It only downloads and unpacks the artifact and starts the service: no apt, no git clone,
+        Python packages are installed offline from the artifact's wheelhouse.
+        :param str role: 'backend' or 'frontend'.
+        :param str artifact_url: A (presigned) URL of the artifact tarball.
+        :return: str
+        """
+        if role not in ('backend', 'frontend'):
+            raise ValueError(f"Unknown role '{role}'")
+
+        script = f"""#!/bin/bash
+set -euo pipefail
+mkdir -p /opt/musiclist
+cd /opt/musiclist
+curl -fsSL --retry 5 '{artifact_url}' | tar -xz --strip-components=1
+chown -R ubuntu:ubuntu /opt/musiclist
+"""
+        if role == 'backend':
+            script += f"""
+# The venv module works without the python3-venv package when pip is not bootstrapped
+python3 -m venv --without-pip venv
+PIP_WHEEL=$(ls wheelhouse/pip-*.whl | head -n 1)
+venv/bin/python "$PIP_WHEEL/pip" install --quiet --no-index --find-links wheelhouse -r backend/requirements.txt
+chown -R ubuntu:ubuntu /opt/musiclist/venv
+venv/bin/python -m scripts.deploy.write_env_file
+
+cp scripts/deploy/musiclist-change-stream.service /etc/systemd/system/musiclist-change-stream.service
+mkdir -p /etc/systemd/system/musiclist-change-stream.service.d
+cat > /etc/systemd/system/musiclist-change-stream.service.d/artifact.conf <<'EOF'
+{ARTIFACT_CHANGE_STREAM_OVERRIDE}EOF
+cp scripts/deploy/musiclist-backend.service /etc/systemd/system/musiclist-backend.service
+mkdir -p /etc/systemd/system/musiclist-backend.service.d
+cat > /etc/systemd/system/musiclist-backend.service.d/artifact.conf <<'EOF'
+{ARTIFACT_BACKEND_OVERRIDE}EOF
+systemctl daemon-reload
+systemctl enable --now musiclist-change-stream musiclist-backend
+"""
+        else:
+            script += f"""
+cat > /etc/systemd/system/musiclist-frontend.service <<'EOF'
+{ARTIFACT_FRONTEND_SERVICE}EOF
+systemctl daemon-reload
+systemctl enable --now musiclist-frontend
+"""
+        return script
+
+    @staticmethod
+    def wait_until_serving(url: str, timeout: float = 900, interval: float = 5) -> float:
+        """
+        Polls a URL until it answers 200, e.g. http://<public dns>/readyz of a new backend.
+        :param str url: The URL to poll.
+        :param float timeout: Seconds before giving up.
+        :param float interval: Seconds between two polls.
+        :return: float, seconds waited (raises TimeoutError after timeout)
+        """
+        started_at = time.monotonic()
+        while time.monotonic() - started_at < timeout:
+            try:
+                with urllib.request.urlopen(url, timeout=5) as response:
+                    if response.status == 200:
+                        return time.monotonic() - started_at
+            except (URLError, OSError):
+                pass # Not up yet
+            time.sleep(interval)
+        raise TimeoutError(f"{url} did not answer 200 within {timeout}s")
 
     def create_security_group(self):
         try:
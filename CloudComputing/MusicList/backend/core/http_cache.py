@@ -0,0 +1,216 @@
+import asyncio
+import gzip
+import hashlib
+from backend.core.cache import MISSING, TTLCache
+
+try:
+    import brotli
+except ImportError: # Optional: without it responses are only gzip-compressed
+    brotli = None
+
+COMPRESSIBLE_TYPES = ("application/json", "application/x-ndjson", "text/")
+
+
+class CachePolicy:
+    """
+    HTTP caching rules of the routes under a path prefix.
+
+    :param str prefix: Path prefix, e.g. "/music/query". The longest matching prefix wins.
+    :param str cache_control: The Cache-Control header to set, e.g. "public, max-age=60" or "no-store".
+    :param str etag: None (no ETag), "version" (from the version tag: answered with 304 before the
+                     route even runs) or "body" (hash of the response body: saves the bandwidth only).
+    """
+
+    def __init__(self, prefix: str, cache_control: str = None, etag: str = None):
+        if etag not in (None, "version", "body"):
+            raise ValueError(f"Unknown etag mode '{etag}', choose from version, body.")
+        self.prefix = prefix
+        self.cache_control = cache_control
+        self.etag = etag
+
+
+def accepted_encoding(accept_encoding: str):
+    """
+    Picks the response encoding from an Accept-Encoding header: brotli if available, then gzip.
+    :return: str or None
+    """
+    offered = {}
+    for part in accept_encoding.lower().split(","):
+        name, _, params = part.strip().partition(";")
+        quality = 1.0
+        if params.strip().startswith("q="):
+            try:
+                quality = float(params.strip()[2:])
+            except ValueError:
+                quality = 0.0
+        offered[name.strip()] = quality
+
+    for encoding in ("br", "gzip"):
+        if encoding == "br" and brotli is None:
+            continue
+        if offered.get(encoding, offered.get("*", 0)) > 0:
+            return encoding
+    return None
+
+
+def if_none_match(header: str, etag: str) -> bool:
+    # Weak comparison, as required for If-None-Match
+    candidates = [tag.strip() for tag in header.split(",")]
+    return "*" in candidates or any(tag.removeprefix("W/") == etag.removeprefix("W/") for tag in candidates)
+
+
+class HTTPCacheMiddleware:
+    """
+    ASGI middleware for the read endpoints: Cache-Control per route, ETags and 304 answers to
+    If-None-Match, and gzip/brotli compression of large bodies.
+
+    "version" ETags are built from version_tag() (e.g. the catalog content tag) and the request URL,
+    so a repeated page load is answered with an empty 304 without running the route at all.
+    The same ETag always stands for the same body, so its compressed versions are kept per
+    (ETag, encoding): e.g. the pre-encoded /music/catalog is compressed once per catalog version.
+    """
+
+    def __init__(self, app, policies: list, version_tag=None, minimum_size: int = 1024,
+                 gzip_level: int = 6, brotli_quality: int = 5, offload_size: int = 32 * 1024,
+                 compressed_cache_size: int = 256):
+        """
+        :param app: The ASGI app.
+        :param list policies: CachePolicy objects.
+        :param version_tag: (Optional) Callable returning a string that changes whenever the data changes.
+        :param int minimum_size: Bodies smaller than this many bytes are sent uncompressed.
+        :param int gzip_level: gzip compression level (1-9).
+        :param int brotli_quality: brotli quality (0-11), 4-6 is a good speed/size balance for dynamic bodies.
+        :param int offload_size: Bodies of at least this many bytes are compressed in a worker thread
+                                 (zlib and brotli release the GIL), smaller ones inline: the thread hop costs more.
+        :param int compressed_cache_size: Compressed bodies of "version" ETag responses kept (LRU).
+        """
+        self.app = app
+        self.policies = sorted(policies, key=lambda policy: len(policy.prefix), reverse=True)
+        self.version_tag = version_tag
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.offload_size = offload_size
+        # (ETag, encoding) -> compressed body. A new data version means new ETags, the old entries age out
+        self.compressed = TTLCache(maxsize=compressed_cache_size, ttl=24 * 3600)
+
+    def _policy(self, path: str):
+        return next((policy for policy in self.policies if path.startswith(policy.prefix)), None)
+
+    def _compress(self, body: bytes, encoding: str) -> bytes:
+        if encoding == "br":
+            return brotli.compress(body, quality=self.brotli_quality)
+        return gzip.compress(body, compresslevel=self.gzip_level)
+
+    async def _compress_off_loop(self, body: bytes, encoding: str) -> bytes:
+        # A large body takes milliseconds to compress, the event loop keeps serving meanwhile
+        if len(body) >= self.offload_size:
+            return await asyncio.to_thread(self._compress, body, encoding)
+        return self._compress(body, encoding)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_headers = {name.decode("latin-1"): value.decode("latin-1") for name, value in scope["headers"]}
+        policy = self._policy(scope["path"])
+        cacheable = scope["method"] in ("GET", "HEAD") and policy is not None
+        # A HEAD response has no body: no body ETag, and its Content-Length must stay the GET one
+        head = scope["method"] == "HEAD"
+        encoding = None if head else accepted_encoding(request_headers.get("accept-encoding", ""))
+
+        etag = None
+        if cacheable and policy.etag == "version" and self.version_tag is not None:
+            url_hash = hashlib.sha1(scope["path"].encode() + b"?" + scope["query_string"]).hexdigest()[:12]
+            etag = f'W/"{self.version_tag()}-{url_hash}"'
+            if if_none_match(request_headers.get("if-none-match", ""), etag):
+                await self._send_not_modified(send, etag, policy)
+                return
+
+        response = {"start": None, "body": [], "streaming": False}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                response["start"] = message # Held until the body is known
+                return
+            if message["type"] != "http.response.body" or response["streaming"]:
+                await send(message)
+                return
+
+            more_body = message.get("more_body", False)
+            if more_body and not response["body"] and not self._is_buffered(response["start"]):
+                # A streamed response (e.g. the NDJSON export) is passed through as it comes
+                response["streaming"] = True
+                await send(self._with_policy_headers(response["start"], policy if cacheable else None, None))
+                await send(message)
+                return
+
+            response["body"].append(message.get("body", b""))
+            if not more_body:
+                await self._send_complete(send, response["start"], b"".join(response["body"]),
+                                          policy if cacheable else None, etag, encoding, request_headers, head)
+
+        await self.app(scope, receive, send_wrapper)
+
+    @staticmethod
+    def _is_buffered(start_message) -> bool:
+        # Responses with a Content-Length are complete bodies split in chunks, they can be buffered
+        return any(name.lower() == b"content-length" for name, _ in start_message["headers"])
+
+    @staticmethod
+    def _with_policy_headers(start_message: dict, policy, etag) -> dict:
+        headers = [(name, value) for name, value in start_message["headers"]
+                   if not (policy and policy.cache_control and name.lower() == b"cache-control")]
+        if policy and policy.cache_control:
+            headers.append((b"cache-control", policy.cache_control.encode()))
+        if etag:
+            headers.append((b"etag", etag.encode()))
+        return {**start_message, "headers": headers}
+
+    async def _send_not_modified(self, send, etag: str, policy):
+        # Same Vary as the 200 it stands for, so shared caches keep the encodings apart
+        headers = [(b"etag", etag.encode()), (b"vary", b"Accept-Encoding")]
+        if policy.cache_control:
+            headers.append((b"cache-control", policy.cache_control.encode()))
+        await send({"type": "http.response.start", "status": 304, "headers": headers})
+        await send({"type": "http.response.body", "body": b""})
+
+    async def _send_complete(self, send, start_message: dict, body: bytes, policy, etag, encoding, request_headers,
+                             head: bool = False):
+        status = start_message["status"]
+        headers = dict((name.lower(), value) for name, value in start_message["headers"])
+        content_type = headers.get(b"content-type", b"").decode("latin-1")
+
+        if b"no-store" in headers.get(b"cache-control", b""):
+            policy, etag = None, None # The route marked this response as not cacheable, keep its headers
+        if status == 200 and policy is not None:
+            if policy.etag == "body" and etag is None and not head:
+                # Weak: the hash is of the uncompressed body, shared by its gzip, br and identity versions
+                etag = f'W/"{hashlib.sha1(body).hexdigest()[:20]}"'
+                if if_none_match(request_headers.get("if-none-match", ""), etag):
+                    await self._send_not_modified(send, etag, policy)
+                    return
+        else:
+            etag = None # Errors are never cached as if they were the resource
+        start_message = self._with_policy_headers(start_message, policy if status == 200 else None, etag)
+
+        compressible = content_type.startswith(COMPRESSIBLE_TYPES) and b"content-encoding" not in headers
+        if compressible:
+            start_message["headers"].append((b"vary", b"Accept-Encoding"))
+        if compressible and encoding and len(body) >= self.minimum_size:
+            # Only "version" ETags are known before the body, a body ETag is a hash of this very body
+            memoize = etag is not None and policy.etag == "version"
+            compressed = self.compressed.get((etag, encoding)) if memoize else MISSING
+            if compressed is MISSING:
+                compressed = await self._compress_off_loop(body, encoding)
+                if memoize:
+                    self.compressed.set((etag, encoding), compressed)
+            body = compressed
+            start_message["headers"] = [(name, value) for name, value in start_message["headers"]
+                                        if name.lower() != b"content-length"]
+            start_message["headers"] += [(b"content-encoding", encoding.encode()),
+                                         (b"content-length", str(len(body)).encode())]
+
+        await send(start_message)
+        await send({"type": "http.response.body", "body": body})
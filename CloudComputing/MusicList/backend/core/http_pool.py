@@ -0,0 +1,90 @@
+import threading
+import time
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from backend.core.throttle import backoff_delay
+
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
+
+class PooledDownloader:
+    """
+    HTTP downloader shared by the ingestion threads.
+
+    All requests go through one requests.Session, whose adapter keeps a pool of keep-alive
+    connections per host: most catalog images come from the same host, so after the first
+    requests every download reuses an open TCP/TLS connection instead of doing a new handshake.
+    Each host also gets a concurrency limit, and failed requests are retried with jittered backoff.
+    """
+
+    def __init__(self, max_connections_per_host: int = 8, max_hosts: int = 10, max_retries: int = 3,
+                 base_backoff: float = 0.2, max_backoff: float = 5.0, timeout: float = 10):
+        """
+        :param int max_connections_per_host: Requests in flight to the same host (and pooled connections kept).
+        :param int max_hosts: Number of hosts whose connection pool is kept open.
+        :param int max_retries: Retries after a connection error or a 429/5xx response.
+        :param float base_backoff: First retry delay in seconds, doubled on each retry.
+        :param float max_backoff: Upper bound of the retry delay in seconds.
+        :param float timeout: Connect/read timeout of each request in seconds.
+        """
+        self.max_connections_per_host = max_connections_per_host
+        self.max_retries = max_retries
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.timeout = timeout
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=max_hosts, pool_maxsize=max_connections_per_host, pool_block=True)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+        self._host_slots = {} # host -> BoundedSemaphore
+        self._host_slots_lock = threading.Lock()
+
+    def _slot(self, url: str) -> threading.BoundedSemaphore:
+        host = urlparse(url).netloc
+        with self._host_slots_lock:
+            if host not in self._host_slots:
+                self._host_slots[host] = threading.BoundedSemaphore(self.max_connections_per_host)
+            return self._host_slots[host]
+
+    def _backoff(self, attempt: int, retry_after: str = None):
+        delay = backoff_delay(attempt, self.base_backoff, self.max_backoff)
+        if retry_after and retry_after.isdigit():
+            delay = max(delay, min(float(retry_after), self.max_backoff))
+        time.sleep(delay)
+
+    def fetch(self, url: str, headers: dict = None) -> requests.Response:
+        """
+        Downloads a URL (body read into memory) through the shared pool.
+        :param str url: The URL to download.
+        :param dict headers: (Optional) Extra request headers, e.g. If-None-Match.
+        :return: requests.Response (any status, the caller decides what is an error)
+        """
+        retry_after = None
+        with self._slot(url):
+            for attempt in range(self.max_retries + 1):
+                if attempt:
+                    self._backoff(attempt, retry_after)
+                retry_after = None
+                try:
+                    response = self.session.get(url, headers=headers, timeout=self.timeout)
+                except (requests.ConnectionError, requests.Timeout):
+                    if attempt == self.max_retries:
+                        raise
+                    continue
+
+                if response.status_code not in RETRY_STATUS_CODES or attempt == self.max_retries:
+                    return response
+                retry_after = response.headers.get('Retry-After')
+
+    def close(self):
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
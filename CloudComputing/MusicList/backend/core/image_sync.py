@@ -0,0 +1,77 @@
+import json
+import os
+import threading
+
+
+class SyncManifest:
+    """
+    Local record of the images already synced to S3, saved as a JSON file.
+
+    One entry per source URL: the S3 key (content-addressed: the SHA-256 of the image),
+    the hash, the source ETag / Last-Modified and the artists using the image.
+    It is saved every few records, so an interrupted sync resumes where it stopped.
+
+        {"version": 1, "entries": {"https://.../TaylorSwift.jpg": {"key": "artist-images/3f1c....jpg", ...}}}
+    """
+
+    VERSION = 1
+
+    def __init__(self, path: str, flush_every: int = 20):
+        """
+        :param str path: The manifest file, created on the first save if it doesn't exist.
+        :param int flush_every: Save to disk after this many new records.
+        """
+        self.path = path
+        self.flush_every = flush_every
+        self.entries = {}
+        self._unsaved = 0
+        self._lock = threading.Lock()
+
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as file:
+                loaded = json.load(file)
+            if loaded.get("version") == self.VERSION:
+                self.entries = loaded.get("entries", {})
+
+    def get(self, source_url: str):
+        with self._lock:
+            return self.entries.get(source_url)
+
+    def record(self, source_url: str, entry: dict):
+        """
+        Adds or replaces the entry of a source URL, saving the manifest every flush_every records.
+        :param str source_url: The image URL.
+        :param dict entry: 'key', 'sha256', 'size', 'source_etag', 'source_last_modified', 'artists'.
+        """
+        with self._lock:
+            self.entries[source_url] = entry
+            self._unsaved += 1
+            if self._unsaved >= self.flush_every:
+                self._save_locked()
+
+    def save(self):
+        with self._lock:
+            self._save_locked()
+
+    def _save_locked(self):
+        # Write to a temporary file first, so a crash never leaves a half-written manifest
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as file:
+            json.dump({"version": self.VERSION, "entries": self.entries}, file, indent=2, sort_keys=True)
+        os.replace(temp_path, self.path)
+        self._unsaved = 0
+
+    def keys_by_url(self) -> dict:
+        """
+        Maps every synced source URL to its S3 key, to tag the songs with the key of their image.
+        :return: dict, source URL -> S3 key
+        """
+        with self._lock:
+            return {source_url: entry["key"] for source_url, entry in self.entries.items()}
+
+
+def default_manifest_path(json_file: str) -> str:
+    # The manifest lives next to the catalog JSON it was built from
+    return os.path.join(os.path.dirname(os.path.abspath(json_file)), "image_manifest.json")
@@ -0,0 +1,57 @@
+import io
+import os
+from PIL import Image
+
+VARIANT_SIZES = (64, 256, 1024)     # Longest side in pixels
+VARIANT_FORMATS = ("webp", "jpeg")
+CONTENT_TYPES = {"webp": "image/webp", "jpeg": "image/jpeg"}
+EXTENSIONS = {"webp": "webp", "jpeg": "jpg"}
+
+
+def variant_key(prefix: str, sha256: str, size: int, image_format: str) -> str:
+    """
+    S3 key of a resized variant. Variants are keyed by the hash of the original image,
+    e.g. artist-images/variants/3f1c.../256.webp
+    :param str prefix: The key prefix of the images in the bucket.
+    :param str sha256: The content hash of the original image.
+    :param int size: The longest side of the variant in pixels.
+    :param str image_format: 'webp' or 'jpeg'.
+    :return: str
+    """
+    return f"{prefix}variants/{sha256}/{size}.{EXTENSIONS[image_format]}"
+
+
+def variant_of(image_key: str, size: int, image_format: str) -> str:
+    """
+    S3 key of a variant of a synced original, from the original's content-addressed key
+    (the song's img_key), e.g. artist-images/3f1c....jpg -> artist-images/variants/3f1c.../256.webp
+    :param str image_key: The key of the original, {prefix}{sha256}{extension}.
+    :param int size: The longest side of the variant in pixels.
+    :param str image_format: 'webp' or 'jpeg'.
+    :return: str
+    """
+    prefix, _, file_name = image_key.rpartition("/")
+    return variant_key(f"{prefix}/" if prefix else "", os.path.splitext(file_name)[0], size, image_format)
+
+
+def render_variants(image_bytes: bytes, variants: list, quality: int = 80) -> list:
+    """
+    Resizes one image into several variants. Runs in a worker process (CPU bound).
+    Images smaller than a variant size are not upscaled.
+    :param bytes image_bytes: The original image.
+    :param list variants: (size, format) pairs to produce.
+    :param int quality: The WebP/JPEG quality.
+    :return: list of (size, format, encoded bytes)
+    """
+    with Image.open(io.BytesIO(image_bytes)) as original:
+        original.load()
+        results = []
+        for size, image_format in variants:
+            image = original.copy()
+            image.thumbnail((size, size), Image.LANCZOS) # Keeps the aspect ratio
+            if image_format == "jpeg" and image.mode not in ("RGB", "L"):
+                image = image.convert("RGB") # JPEG has no alpha channel
+            output = io.BytesIO()
+            image.save(output, format=image_format.upper(), quality=quality, optimize=True)
+            results.append((size, image_format, output.getvalue()))
+        return results
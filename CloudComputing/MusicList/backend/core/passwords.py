@@ -0,0 +1,140 @@
+import asyncio
+import hmac
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from argon2 import PasswordHasher
+from argon2.exceptions import InvalidHashError, VerificationError
+
+# Argon2id with the OWASP minimum (19 MiB, 2 passes): about 20-40 ms of one core per hash,
+# and little enough memory for several workers on a t2.micro
+hasher = PasswordHasher(time_cost=2, memory_cost=19 * 1024, parallelism=1)
+
+
+class PoolSaturatedError(Exception):
+    """
+    Raised when the password pool already has its maximum number of jobs running and queued.
+    """
+
+
+def is_password_hash(value: str) -> bool:
+    # Accounts created before hashing still hold the plaintext password
+    return value.startswith("$argon2")
+
+
+def hash_password(password: str) -> str:
+    """
+    Hashes a password with Argon2id (CPU heavy, call it through PasswordPool in the API).
+    :param str password: The plaintext password.
+    :return: str, the encoded hash with its salt and parameters
+    """
+    return hasher.hash(password)
+
+
+def verify_password(stored: str, password: str) -> bool:
+    """
+    Checks a password against the stored value, an Argon2 hash or a legacy plaintext password.
+    :param str stored: The 'password' attribute of the login table.
+    :param str password: The password sent by the user.
+    :return: bool
+    """
+    if not is_password_hash(stored):
+        return hmac.compare_digest(stored.encode(), password.encode()) # Constant time, like the hash check
+    try:
+        return hasher.verify(stored, password)
+    except (VerificationError, InvalidHashError):
+        return False
+
+
+def needs_rehash(stored: str) -> bool:
+    """
+    True if the stored value is plaintext or a hash made with older parameters.
+    """
+    return not is_password_hash(stored) or hasher.check_needs_rehash(stored)
+
+
+class PasswordPool:
+    """
+    Dedicated, size-capped thread pool for password hashing and verification.
+
+    argon2 releases the GIL while hashing, so threads use several cores without blocking the event loop,
+    and the KDF doesn't compete with boto3 calls in the default thread pool. At most
+    workers + max_queue jobs are accepted; beyond that PoolSaturatedError is raised at once,
+    so a login burst gets fast 503s instead of every request timing out in a growing queue.
+
+    By default the queue holds what the workers hash within queue_budget_ms, measured on this machine:
+    a burst waits up to that long before logins are shed.
+    """
+
+    def __init__(self, workers: int = None, max_queue: int = None, queue_budget_ms: float = 1000):
+        """
+        :param int workers: Hashing threads, defaults to the number of CPUs.
+        :param int max_queue: Jobs allowed to wait for a thread, defaults to the jobs done in queue_budget_ms.
+        :param float queue_budget_ms: Longest wait in the queue when max_queue is not given.
+        """
+        self.workers = workers or os.cpu_count() or 1
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="password")
+        self._in_flight = 0 # Running + queued, only touched from the event loop thread
+        self.completed = 0
+        self.rejected = 0
+        self.peak_in_flight = 0
+        self._busy_seconds = 0.0
+        self._busy_lock = threading.Lock()
+
+        # Unknown emails are checked against this hash, so they take as long as a wrong password.
+        # Its timing is the job cost used to size the queue (a verification costs the same as a hash).
+        started_at = time.perf_counter()
+        self.dummy_hash = hash_password(os.urandom(16).hex())
+        job_ms = max((time.perf_counter() - started_at) * 1000, 1.0)
+        self.max_queue = max_queue if max_queue is not None else \
+            max(self.workers, int(self.workers * queue_budget_ms / job_ms))
+
+    def _timed(self, function, *args):
+        started_at = time.perf_counter()
+        try:
+            return function(*args)
+        finally:
+            with self._busy_lock:
+                self._busy_seconds += time.perf_counter() - started_at
+
+    async def _run(self, function, *args):
+        if self._in_flight >= self.workers + self.max_queue:
+            self.rejected += 1
+            raise PoolSaturatedError(f"{self._in_flight} password jobs in flight")
+
+        self._in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self._in_flight)
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, self._timed, function, *args)
+        finally:
+            self._in_flight -= 1
+            self.completed += 1
+
+    async def verify(self, stored: str, password: str) -> bool:
+        """
+        Checks a password on the pool (see verify_password).
+        Raises PoolSaturatedError if the pool is full.
+        """
+        return await self._run(verify_password, stored, password)
+
+    async def hash(self, password: str) -> str:
+        """
+        Hashes a password on the pool (see hash_password).
+        Raises PoolSaturatedError if the pool is full.
+        """
+        return await self._run(hash_password, password)
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "max_queue": self.max_queue,
+            "in_flight": self._in_flight,
+            "peak_in_flight": self.peak_in_flight,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "avg_job_ms": round(self._busy_seconds / self.completed * 1000, 2) if self.completed else 0.0
+        }
+
+    def close(self):
+        self._executor.shutdown(wait=True, cancel_futures=True)
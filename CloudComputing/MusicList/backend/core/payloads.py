@@ -0,0 +1,98 @@
+import asyncio
+import threading
+from decimal import Decimal
+import orjson
+
+
+def json_default(value):
+    # Numbers read from DynamoDB are Decimals, orjson doesn't know them
+    if isinstance(value, Decimal):
+        return int(value) if value == value.to_integral_value() else float(value)
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+def encode_json(content) -> bytes:
+    return orjson.dumps(content, default=json_default)
+
+
+def _songs_payload(songs: list) -> bytes:
+    return encode_json({"status": "ok", "count": len(songs), "songs": songs})
+
+
+class CatalogPayloads:
+    """
+    Pre-encoded JSON bodies of the hot, rarely changing catalog responses: the full catalog
+    and the song list of every artist.
+
+    They are encoded once and served as bytes, so a request does no serialization at all.
+    After a catalog change the full catalog is re-encoded in a worker thread while the previous bytes
+    keep being served (full_catalog_async), and an artist's list is re-encoded on its next request,
+    only if one of that artist's songs changed.
+    """
+
+    def __init__(self, catalog):
+        """
+        :param catalog: The CatalogIndex the payloads are built from.
+        """
+        self.catalog = catalog
+        self._full = (None, b"")  # (catalog version, bytes), swapped as one value
+        self._full_task = None    # The full catalog encoding in progress, if any
+        self._by_artist = {}      # normalized artist -> (catalog version, bytes)
+        self._lock = threading.Lock()
+        self.rebuilds = 0
+
+    def _snapshot(self) -> tuple:
+        # Copying the list of references is cheap next to encoding, and the encoding thread then
+        # never sees a change applied halfway. Removed songs (None) are filtered out in the thread.
+        return self.catalog.version, list(self.catalog.songs)
+
+    def _encode_full(self, version: int, songs: list):
+        payload = _songs_payload([song for song in songs if song is not None])
+        with self._lock:
+            if self._full[0] is None or version > self._full[0]: # A slower, older build never wins
+                self._full = (version, payload)
+                self.rebuilds += 1
+
+    def full_catalog(self) -> bytes:
+        """
+        The full catalog, re-encoded on the calling thread if the catalog changed (scripts, benchmarks).
+        :return: bytes, {"status": "ok", "count": n, "songs": [...]}
+        """
+        if self._full[0] != self.catalog.version:
+            self._encode_full(*self._snapshot())
+        return self._full[1]
+
+    async def full_catalog_async(self) -> tuple:
+        """
+        The full catalog for the request handlers: a stale payload is re-encoded in a worker thread
+        and the previous bytes are returned meanwhile, so the event loop never encodes the whole catalog.
+        Only the very first call waits for the encoding.
+        :return: tuple (bytes, bool: False if the bytes are from an older catalog version)
+        """
+        if self._full[0] != self.catalog.version and (self._full_task is None or self._full_task.done()):
+            self._full_task = asyncio.ensure_future(asyncio.to_thread(self._encode_full, *self._snapshot()))
+        if self._full[0] is None:
+            await asyncio.shield(self._full_task)
+        version, payload = self._full
+        return payload, version == self.catalog.version
+
+    def artist(self, artist: str):
+        """
+        One artist's songs, re-encoded only when one of them changed since the last encoding.
+        :param str artist: The artist name (case and whitespace insensitive).
+        :return: bytes (same shape as full_catalog), or None if the artist has no song
+        """
+        normalized = self.catalog.normalize(artist)
+        song_ids = self.catalog.postings["artist"].get(normalized)
+        if not song_ids:
+            self._by_artist.pop(normalized, None)
+            return None
+
+        cached = self._by_artist.get(normalized)
+        if cached is not None and cached[0] >= self.catalog.value_version("artist", normalized):
+            return cached[1]
+
+        version = self.catalog.version
+        payload = _songs_payload([self.catalog.songs[song_id] for song_id in sorted(song_ids)])
+        self._by_artist[normalized] = (version, payload)
+        return payload
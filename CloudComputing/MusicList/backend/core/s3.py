@@ -1,14 +1,77 @@
 import requests
 
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from urllib.parse import urlparse
 from botocore.exceptions import ClientError
+from boto3.s3.transfer import TransferConfig, create_transfer_manager
+from s3transfer.subscribers import BaseSubscriber
 import boto3
+import hashlib
+import io
 import json
+import os
+import threading
+import time
+from backend.core.bulk_load import iter_json_array
+from backend.core.http_pool import PooledDownloader
+from backend.core.image_sync import SyncManifest, default_manifest_path
+from backend.core.image_variants import CONTENT_TYPES, VARIANT_FORMATS, VARIANT_SIZES, render_variants, variant_key
+
+MB = 1024 * 1024
+
+# Transfer settings per kind of upload (see boto3 TransferConfig).
+# Files above multipart_threshold are split into multipart_chunksize parts, uploaded max_concurrency at a time.
+TRANSFER_PROFILES = {
+    # Artist images: a few hundred KB, never multipart
+    "small_files": {"multipart_threshold": 64 * MB, "multipart_chunksize": 8 * MB, "max_concurrency": 10, "use_threads": True},
+    # boto3 defaults
+    "default": {"multipart_threshold": 8 * MB, "multipart_chunksize": 8 * MB, "max_concurrency": 10, "use_threads": True},
+    # Audio previews and high resolution artwork: bigger parts, more of them in parallel
+    "large_media": {"multipart_threshold": 16 * MB, "multipart_chunksize": 16 * MB, "max_concurrency": 20, "use_threads": True},
+    # Shared or slow links: one thread, bandwidth capped at 1 MB/s
+    "low_bandwidth": {"multipart_threshold": 8 * MB, "multipart_chunksize": 8 * MB, "max_concurrency": 1, "use_threads": False,
+                      "max_bandwidth": 1 * MB},
+}
+
+
+class _TransferTimer(BaseSubscriber):
+    """
+    Records when an upload really started sending bytes and when it finished.
+    """
+
+    def __init__(self):
+        self.started_at = None
+        self.finished_at = None
+        self.bytes_sent = 0
+        self._lock = threading.Lock()
+
+    def on_progress(self, future, bytes_transferred, **kwargs):
+        with self._lock:
+            if self.started_at is None:
+                self.started_at = time.perf_counter()
+            self.bytes_sent += bytes_transferred
+
+    def on_done(self, future, **kwargs):
+        self.finished_at = time.perf_counter()
+
 
 class S3Manager:
-    def __init__(self, region='us-east-1'):
+    def __init__(self, region='us-east-1', transfer_profile: str = 'default'):
         self.s3_client = boto3.client('s3', region_name=region) # Create an S3 client
         self.region = region
+        self.transfer_config = self.get_transfer_config(transfer_profile) # Used by every upload of this manager
+
+    @staticmethod
+    def get_transfer_config(profile: str = 'default', **overrides) -> TransferConfig:
+        """
+        Builds a TransferConfig from one of the TRANSFER_PROFILES.
+        :param str profile: The profile name.
+        :param overrides: Settings replacing the profile's ones, e.g. max_concurrency=4.
+        :return: TransferConfig
+        """
+        if profile not in TRANSFER_PROFILES:
+            raise ValueError(f"Unknown transfer profile '{profile}', choose from {', '.join(TRANSFER_PROFILES)}.")
+        return TransferConfig(**{**TRANSFER_PROFILES[profile], **overrides})
 
     def create_s3_bucket(self, bucket_name:str) -> bool:
         """
@@ -30,15 +93,36 @@ class S3Manager:
             print(f"Failed to create bucket: {e}")
             return False
 
-    def upload_from_url_to_bucket(self, img_url: str, bucket_name: str, s3_key: str) -> bool:
+    def bucket_exists(self, bucket_name: str) -> bool:
+        """
+        Checks if the bucket exists and we can access it.
+        :param bucket_name: The name of the S3 bucket.
+        :return: bool
+        """
+        try:
+            self.s3_client.head_bucket(Bucket=bucket_name)
+            return True
+        except ClientError:
+            return False
+
+    def upload_from_url_to_bucket(self, img_url: str, bucket_name: str, s3_key: str,
+                                  downloader: PooledDownloader = None) -> bool:
         """
         Uploads an image from a URL to the specified S3 bucket without saving it locally.
         :param img_url: The URL of the image to upload.
         :param bucket_name: The name of the S3 bucket.
         :param s3_key: The S3 object key (file path in S3).
+        :param downloader: (Optional) A shared PooledDownloader, to reuse keep-alive connections across uploads.
         :return: bool
         """
         try:
+            if downloader:
+                response = downloader.fetch(img_url)
+                response.raise_for_status()
+                self.s3_client.upload_fileobj(io.BytesIO(response.content), bucket_name, s3_key,
+                                              Config=self.transfer_config)
+                return True
+
             # Download image content as a stream to avoid loading the entire file into memory
             response = requests.get(img_url, stream=True, timeout=10)
             response.raise_for_status() # Raise an exception for any non-200 HTTP responses
@@ -46,103 +130,291 @@ class S3Manager:
             # Ensure raw content is decoded correctly, especially for compressed responses
             response.raw.decode_content = True
 
-            self.s3_client.upload_fileobj(response.raw, bucket_name, s3_key)
+            self.s3_client.upload_fileobj(response.raw, bucket_name, s3_key, Config=self.transfer_config)
             return True
 
         except Exception as e:
             print(f"❌ Failed to upload image from {img_url} to S3: {e}")
             return False
 
-    def upload_img_from_json(self, json_file: str, bucket_name: str, max_workers: int =10) -> (bool, int):
+    def list_objects(self, bucket_name: str, prefix: str = '') -> dict:
         """
-        Reads image URLs from a JSON file and uploads each image directly to S3 concurrently.
-        Uses a pre-check of existing objects in S3 to avoid duplicate uploads.
-        :param str json_file: The path to the JSON file containing song data.
-                              Expected format:
-                              {
-                                  "songs": [
-                                      {
-                                          "artist": "Artist Name",
-                                          "img_url": "https://example.com/image.jpg"
-                                      },
-                                      ...
-                                  ]
-                              }
-        :param str bucket_name: The name of the destination S3 bucket.
-        :param max_workers: Maximum number of threads to run concurrently.
-        :return: bool, int (number of images being skipped)
+        Lists every object under a prefix. list_objects_v2 returns at most 1000 keys per call,
+        so all pages are read.
+        :param bucket_name: The name of the S3 bucket.
+        :param prefix: Only keys starting with this prefix.
+        :return: dict, key -> ETag
         """
-        try:
-            # Load the JSON file
-            with open(json_file, 'r', encoding='utf-8') as file:
-                loaded_data = json.load(file)
-
-            if 'songs' not in loaded_data or not isinstance(loaded_data['songs'], list):
-                raise ValueError("Invalid JSON format: missing or incorrect 'songs' key.")
-
-            songs = loaded_data['songs']
-            tasks = []
-
-            # Create an empty set to store the keys (filenames) of existing S3 objects, using to check duplicates in subsequent upload actions
-            existing_keys = set()
-
-            ## Call the S3 API to list objects in the bucket that start with the prefix 'artist-images/'
-            response = self.s3_client.list_objects_v2(Bucket=bucket_name, Prefix='artist-images/')
-
-            ## The API response is a dictionary. If there are any matching objects,
-            ## it will include a key 'Contents', which is a list of objects.
-            if 'Contents' in response:
-                for obj in response['Contents']:
-                    existing_keys.add(obj['Key'])
-
-            # CHECK FOR FIRST RUN
-            # Create a set to track keys already queued during this run
-            queued_keys = set()
-            skipped_count = 0
-
-            # Set up a ThreadPoolExecutor to upload images concurrently
-            # max_workers is the number of threads to run concurrently, default is 10
-            with ThreadPoolExecutor(max_workers=max_workers) as executor:
-
-                # Loop through each song in the list to get the image URL
-                for each_song in songs:
-                    img_url = each_song.get("img_url", None) # Get the image URL
-                    artist = each_song.get("artist", "unknown").replace(" ", "_") # Get the artist name and replace spaces with underscores
+        objects = {}
+        for page in self.s3_client.get_paginator('list_objects_v2').paginate(Bucket=bucket_name, Prefix=prefix):
+            for obj in page.get('Contents', []):
+                objects[obj['Key']] = obj['ETag'].strip('"')
+        return objects
+
+    def _sync_image(self, img_url: str, artists: list, bucket_name: str, prefix: str, existing_objects: dict,
+                    manifest: SyncManifest, downloader: PooledDownloader, verify_source: bool) -> str:
+        """
+        Syncs one source image. Returns what happened: 'unchanged', 'uploaded', 'deduplicated' or 'failed'.
+        """
+        entry = manifest.get(img_url)
+        headers = {}
+
+        if entry and entry['key'] in existing_objects:
+            if not verify_source:
+                if entry.get('artists') != artists:
+                    manifest.record(img_url, dict(entry, artists=artists))
+                return 'unchanged'
+            # Ask the source if the image changed since we downloaded it
+            if entry.get('source_etag'):
+                headers['If-None-Match'] = entry['source_etag']
+            if entry.get('source_last_modified'):
+                headers['If-Modified-Since'] = entry['source_last_modified']
 
-                    if not img_url:
-                        print(f"⚠️ Skipping {artist}: No image URL provided.")
-                        continue
+        try:
+            response = downloader.fetch(img_url, headers=headers)
+            if response.status_code == 304:
+                manifest.record(img_url, dict(entry, artists=artists))
+                return 'unchanged'
+            response.raise_for_status()
+
+            content = response.content
+            digest = hashlib.sha256(content).hexdigest()
+            extension = os.path.splitext(urlparse(img_url).path)[1].lower() or '.jpg'
+            s3_key = f"{prefix}{digest}{extension}" # Same picture -> same key, whatever the artist
+
+            status = 'deduplicated'
+            if s3_key not in existing_objects:
+                self.s3_client.upload_fileobj(
+                    io.BytesIO(content), bucket_name, s3_key,
+                    ExtraArgs={
+                        'ContentType': response.headers.get('Content-Type', 'image/jpeg'),
+                        'Metadata': {'sha256': digest, 'source-url': img_url}
+                    },
+                    Config=self.transfer_config
+                )
+                status = 'uploaded'
+
+            manifest.record(img_url, {
+                'key': s3_key,
+                'sha256': digest,
+                'size': len(content),
+                'source_etag': response.headers.get('ETag'),
+                'source_last_modified': response.headers.get('Last-Modified'),
+                'artists': artists
+            })
+            return status
 
-                    s3_key = f"artist-images/{artist}.jpg"
+        except Exception as e:
+            print(f"❌ Failed to sync image from {img_url} to S3: {e}")
+            return 'failed'
 
-                    # First, check against S3 pre-fetched keys
-                    if s3_key in existing_keys:
-                        continue
+    def sync_images_from_json(self, json_file: str, bucket_name: str, manifest_path: str,
+                              prefix: str = 'artist-images/', max_workers: int = 10,
+                              max_connections_per_host: int = 8, verify_sources: bool = False) -> dict:
+        """
+        Incrementally syncs the images of the catalog to S3.
 
-                    # Then, check if this key has already been queued for upload during this run
-                    if s3_key in queued_keys:
-                        continue
+        Images are stored under content-addressed keys ({prefix}{sha256}.jpg), so the same picture is
+        stored once whatever the number of artists using it. A local manifest remembers every source URL
+        already synced: re-running on an unchanged catalog only costs the listing calls, and a sync that
+        crashed halfway resumes from the manifest.
+        :param str json_file: The path to the JSON file containing song data (artist + img_url per song).
+        :param str bucket_name: The name of the destination S3 bucket.
+        :param str manifest_path: The path of the local manifest file.
+        :param str prefix: The key prefix of the images in the bucket.
+        :param int max_workers: Maximum number of threads to run concurrently.
+        :param int max_connections_per_host: Downloads in flight to the same host. They share a pool of
+                                             keep-alive connections, so handshakes are paid once per connection.
+        :param bool verify_sources: Also ask each source (conditional GET) whether its image changed.
+        :return: dict with the number of images per outcome
+        """
+        # Group the songs by image URL, many songs share the same artist picture
+        artists_by_url = {}
+        report = {'images': 0, 'unchanged': 0, 'uploaded': 0, 'deduplicated': 0, 'failed': 0, 'no_url': 0}
+        for each_song in iter_json_array(json_file, 'songs'):
+            img_url = each_song.get("img_url")
+            if not img_url:
+                report['no_url'] += 1
+                continue
+            artists = artists_by_url.setdefault(img_url, [])
+            artist = each_song.get("artist", "unknown")
+            if artist not in artists:
+                artists.append(artist)
+        report['images'] = len(artists_by_url)
+
+        manifest = SyncManifest(manifest_path)
+        existing_objects = self.list_objects(bucket_name, prefix)
 
-                    # Mark this key as queued for upload
-                    queued_keys.add(s3_key)
+        try:
+            with PooledDownloader(max_connections_per_host=max_connections_per_host) as downloader, \
+                    ThreadPoolExecutor(max_workers=max_workers) as executor:
+                tasks = [
+                    executor.submit(self._sync_image, img_url, sorted(artists), bucket_name, prefix,
+                                    existing_objects, manifest, downloader, verify_sources)
+                    for img_url, artists in artists_by_url.items()
+                ]
+                for future in as_completed(tasks):
+                    report[future.result()] += 1
+        finally:
+            manifest.save()
 
-                    # Submit the upload task to the thread pool
-                    task = executor.submit(self.upload_from_url_to_bucket, img_url, bucket_name, s3_key)
-                    tasks.append(task)
+        return report
 
-                skipped_count = len(queued_keys) + len(existing_keys)
+    def generate_image_variants(self, bucket_name: str, manifest_path: str, prefix: str = 'artist-images/',
+                                sizes: tuple = VARIANT_SIZES, formats: tuple = VARIANT_FORMATS,
+                                processes: int = None, max_workers: int = 10) -> dict:
+        """
+        Produces resized variants (e.g. 64/256/1024 px, WebP and JPEG) of every synced image, so list pages
+        can load a small thumbnail instead of the original. Resizing runs in a process pool; downloads and
+        uploads run in a thread pool. Variants are keyed by the original's content hash, and variants
+        already in the bucket are skipped.
+        :param str bucket_name: The name of the S3 bucket holding the originals.
+        :param str manifest_path: The manifest written by sync_images_from_json.
+        :param str prefix: The key prefix of the images in the bucket.
+        :param tuple sizes: Longest side of each variant in pixels.
+        :param tuple formats: Output formats ('webp', 'jpeg').
+        :param int processes: (Optional) Worker processes for resizing, defaults to the CPU count.
+        :param int max_workers: Threads for S3 downloads and uploads.
+        :return: dict with 'originals', 'variants_created', 'variants_existing' and 'failed'
+        """
+        manifest = SyncManifest(manifest_path)
+        originals = {entry['sha256']: entry['key'] for entry in manifest.entries.values()}
+        existing_keys = self.list_objects(bucket_name, f"{prefix}variants/")
+        report = {'originals': len(originals), 'variants_created': 0, 'variants_existing': 0, 'failed': 0}
+
+        # Only the (size, format) pairs missing from the bucket are rendered
+        pending = {}
+        for sha256 in originals:
+            missing = [(size, image_format) for size in sizes for image_format in formats
+                       if variant_key(prefix, sha256, size, image_format) not in existing_keys]
+            report['variants_existing'] += len(sizes) * len(formats) - len(missing)
+            if missing:
+                pending[sha256] = missing
+
+        def download(sha256):
+            return self.s3_client.get_object(Bucket=bucket_name, Key=originals[sha256])['Body'].read()
+
+        def upload(sha256, size, image_format, data):
+            self.s3_client.upload_fileobj(
+                io.BytesIO(data), bucket_name, variant_key(prefix, sha256, size, image_format),
+                ExtraArgs={'ContentType': CONTENT_TYPES[image_format], 'CacheControl': 'public, max-age=31536000, immutable'},
+                Config=self.transfer_config
+            )
 
-                # Wait for all tasks to complete
-                for future in as_completed(tasks):
-                    # The upload_from_url_to_bucket function prints its own success/failure messages.
-                    pass
+        with ThreadPoolExecutor(max_workers=max_workers) as threads, ProcessPoolExecutor(max_workers=processes) as workers:
+            renders = {}
+            for sha256, future in [(sha256, threads.submit(download, sha256)) for sha256 in pending]:
+                try:
+                    renders[workers.submit(render_variants, future.result(), pending[sha256])] = sha256
+                except Exception as e:
+                    print(f"❌ Failed to download {originals[sha256]} from S3: {e}")
+                    report['failed'] += len(pending[sha256])
+
+            uploads = []
+            for render in as_completed(renders):
+                sha256 = renders[render]
+                try:
+                    for size, image_format, data in render.result():
+                        uploads.append(threads.submit(upload, sha256, size, image_format, data))
+                except Exception as e:
+                    print(f"❌ Failed to resize {originals[sha256]}: {e}")
+                    report['failed'] += len(pending[sha256])
+
+            for future in as_completed(uploads):
+                try:
+                    future.result()
+                    report['variants_created'] += 1
+                except Exception as e:
+                    print(f"❌ Failed to upload an image variant to S3: {e}")
+                    report['failed'] += 1
+
+        return report
 
-            return True, skipped_count
+    def upload_img_from_json(self, json_file: str, bucket_name: str, max_workers: int =10) -> (bool, int):
+        """
+        Reads image URLs from a JSON file and uploads each image to S3 concurrently.
+        Kept for the existing callers, the work is done by sync_images_from_json with the manifest
+        stored next to the JSON file, followed by generate_image_variants for the thumbnails.
+        :param str json_file: The path to the JSON file containing song data.
+        :param str bucket_name: The name of the destination S3 bucket.
+        :param max_workers: Maximum number of threads to run concurrently.
+        :return: bool, int (number of images being skipped)
+        """
+        manifest_path = default_manifest_path(json_file)
+        try:
+            report = self.sync_images_from_json(json_file, bucket_name, manifest_path, max_workers=max_workers)
+            print(f"Image sync: {report}")
 
+            # Thumbnails for the list pages, only the missing ones are produced
+            variants_report = self.generate_image_variants(bucket_name, manifest_path, max_workers=max_workers)
+            print(f"Image variants: {variants_report}")
         except Exception as e:
             print(f"Error while processing JSON file: {e}")
             return False, 0
 
+        return report['failed'] == 0 and variants_report['failed'] == 0, report['unchanged'] + report['deduplicated']
+
+    def put_many(self, files: list, bucket_name: str, profile: str = None, extra_args: dict = None) -> dict:
+        """
+        Uploads many files with one shared transfer manager (one thread pool and connection pool
+        for all of them) and reports the throughput of each object and of the whole batch.
+        :param list files: (source, s3_key) pairs, source is a local path or a binary file object.
+        :param str bucket_name: The name of the destination S3 bucket.
+        :param str profile: (Optional) A TRANSFER_PROFILES name, by default the manager's own profile.
+        :param dict extra_args: (Optional) ExtraArgs for every object, e.g. {'ContentType': 'audio/mpeg'}.
+        :return: dict with 'objects' (key, bytes, seconds, bytes_per_second, error per object),
+                 'total_bytes', 'elapsed_seconds', 'bytes_per_second' and 'failed'
+        """
+        config = self.get_transfer_config(profile) if profile else self.transfer_config
+        uploads = []
+        started_at = time.perf_counter()
+
+        with create_transfer_manager(self.s3_client, config) as manager:
+            for source, s3_key in files:
+                timer = _TransferTimer()
+                future = manager.upload(source, bucket_name, s3_key, extra_args=extra_args, subscribers=[timer])
+                uploads.append((s3_key, future, timer))
+
+            objects = []
+            for s3_key, future, timer in uploads:
+                error = None
+                try:
+                    future.result()
+                except Exception as e:
+                    error = str(e)
+                    print(f"❌ Failed to upload {s3_key} to S3: {e}")
+
+                seconds = (timer.finished_at or time.perf_counter()) - (timer.started_at or started_at)
+                objects.append({
+                    "key": s3_key,
+                    "bytes": timer.bytes_sent,
+                    "seconds": round(seconds, 4),
+                    "bytes_per_second": round(timer.bytes_sent / seconds) if seconds > 0 else 0,
+                    "error": error
+                })
+
+        elapsed = time.perf_counter() - started_at
+        total_bytes = sum(obj["bytes"] for obj in objects)
+        return {
+            "objects": objects,
+            "total_bytes": total_bytes,
+            "elapsed_seconds": round(elapsed, 4),
+            "bytes_per_second": round(total_bytes / elapsed) if elapsed > 0 else 0,
+            "failed": sum(1 for obj in objects if obj["error"])
+        }
+
+    def presign_get(self, bucket_name: str, s3_key: str, expires_in: int = 3600) -> str:
+        """
+        Returns a presigned GET URL, so a client without AWS credentials (e.g. a booting instance) can download the object.
+        :param bucket_name: The name of the S3 bucket.
+        :param s3_key: The S3 object key.
+        :param expires_in: Seconds the URL stays valid.
+        :return: str
+        """
+        return self.s3_client.generate_presigned_url(
+            'get_object', Params={'Bucket': bucket_name, 'Key': s3_key}, ExpiresIn=expires_in
+        )
+
     def enable_block_public_access(self, bucket_name: str) -> bool:
         """
        Enables AWS S3's Block Public Access settings to fully restrict public access to the bucket.
@@ -167,6 +439,19 @@ class S3Manager:
             print(f"❌ Error setting public access block: {e}")
             return False
 
+    def is_public_access_blocked(self, bucket_name: str) -> bool:
+        """
+        Checks if all four Block Public Access settings are enabled on the bucket.
+        :param bucket_name: The name of the S3 bucket.
+        :return: bool
+        """
+        try:
+            configuration = self.s3_client.get_public_access_block(Bucket=bucket_name)['PublicAccessBlockConfiguration']
+        except ClientError:
+            return False # NoSuchPublicAccessBlockConfiguration
+        return all(configuration.get(setting) for setting in
+                   ('BlockPublicAcls', 'IgnorePublicAcls', 'BlockPublicPolicy', 'RestrictPublicBuckets'))
+
     def set_bucket_policy_block_public_access(self, bucket_name: str) -> bool:
         """
         Sets a bucket policy to deny public read access to objects via non-HTTPS requests.
@@ -206,9 +491,14 @@ class S3Manager:
             print(f"❌ Failed to set bucket policy: {e}")
             return False
 
-
-
-# To-do:
-# 1. 現在一個歌手只能有一張圖，因為是用歌手名稱當作 key，如果有重複的歌手名稱，會跳過第二張圖
-
-
+    def has_bucket_policy(self, bucket_name: str) -> bool:
+        """
+        Checks if the bucket has a bucket policy.
+        :param bucket_name: The name of the S3 bucket.
+        :return: bool
+        """
+        try:
+            self.s3_client.get_bucket_policy(Bucket=bucket_name)
+            return True
+        except ClientError:
+            return False # NoSuchBucketPolicy
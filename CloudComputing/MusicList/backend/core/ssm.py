@@ -0,0 +1,45 @@
+import secrets
+import boto3
+from botocore.exceptions import ClientError
+
+# SecureString parameter holding the key that signs session tokens and pagination cursors
+SESSION_SECRET_PARAMETER = '/musiclist/session-secret'
+
+
+class SSMManager:
+    """
+    Reads and creates the app's secrets in SSM Parameter Store, so every instance gets the same ones.
+    """
+
+    def __init__(self, region='us-east-1'):
+        self.ssm_client = boto3.client('ssm', region_name=region)
+
+    def get_parameter(self, name: str):
+        """
+        :param str name: The parameter name, e.g. SESSION_SECRET_PARAMETER.
+        :return: str (decrypted), or None if the parameter doesn't exist
+        """
+        try:
+            return self.ssm_client.get_parameter(Name=name, WithDecryption=True)['Parameter']['Value']
+        except ClientError as e:
+            if e.response['Error']['Code'] == 'ParameterNotFound':
+                return None
+            raise
+
+    def ensure_secret(self, name: str, nbytes: int = 32) -> bool:
+        """
+        Creates a random SecureString parameter if it doesn't exist yet. An existing one is never replaced:
+        that would log every user out and break every page cursor.
+        :param str name: The parameter name.
+        :param int nbytes: Random bytes of the secret (hex encoded).
+        :return: bool, True if the parameter was created
+        """
+        try:
+            self.ssm_client.put_parameter(Name=name, Value=secrets.token_hex(nbytes), Type='SecureString',
+                                          Overwrite=False)
+            print(f"✅ Secret '{name}' created.")
+            return True
+        except ClientError as e:
+            if e.response['Error']['Code'] == 'ParameterAlreadyExists':
+                return False
+            raise
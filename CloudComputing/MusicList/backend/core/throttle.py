@@ -0,0 +1,153 @@
+import json
+import math
+import random
+import threading
+import time
+
+# DynamoDB errors meaning "slow down": retried with backoff instead of failing the request
+THROTTLE_ERRORS = ('ProvisionedThroughputExceededException', 'ThrottlingException', 'RequestLimitExceeded')
+
+
+def backoff_delay(attempt: int, base_backoff: float, max_backoff: float) -> float:
+    """
+    Exponential backoff with full jitter: a random delay up to base_backoff * 2^attempt (capped),
+    so concurrent callers retrying after the same failure don't retry in lockstep.
+    :param int attempt: The retry number, from 1.
+    :param float base_backoff: Seconds, doubled on each retry.
+    :param float max_backoff: Upper bound of the delay in seconds.
+    :return: float, seconds to wait
+    """
+    return random.uniform(0, min(max_backoff, base_backoff * (2 ** attempt)))
+
+
+def estimate_write_units(item: dict) -> int:
+    """
+    Write capacity units a put of this item should cost: one per started KB of item.
+    The JSON size is close to DynamoDB's item size (attribute names + values).
+    """
+    return max(1, math.ceil(len(json.dumps(item, default=str).encode()) / 1024))
+
+
+class RateLimiter:
+    """
+    Thread-safe token bucket measured in capacity units per second.
+
+    Callers reserve the estimated cost with wait(units) before sending a request, so concurrent
+    writers can't all pass at once, then settle() the reservation with what DynamoDB reports as
+    consumed. A cost unknown in advance (a Scan page) is waited for with wait() and taken
+    afterwards with consume(). The bucket may go negative, later requests then wait until it refills.
+    """
+
+    def __init__(self, rate: float, burst: float = None):
+        """
+        :param float rate: Capacity units added to the bucket per second.
+        :param float burst: (Optional) Bucket size, defaults to one second worth of capacity.
+        """
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = float(rate)
+        self.burst = float(burst) if burst else self.rate
+        self.tokens = self.burst
+        self.updated_at = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def wait(self, units: float = 0.0):
+        """
+        Blocks until the bucket holds the units (or is full, for a request bigger than the bucket),
+        then takes them out of it. With no units, only waits until the bucket is no longer in debt.
+        :param float units: The estimated capacity units of the request about to be sent.
+        """
+        while True:
+            with self.lock:
+                self._refill()
+                needed = min(units, self.burst)
+                if self.tokens > 0 and self.tokens >= needed:
+                    self.tokens -= units
+                    return
+                sleep_for = (max(needed, 0.0) - self.tokens) / self.rate
+            time.sleep(max(sleep_for, 0.001))
+
+    def consume(self, units: float):
+        """
+        Takes the consumed capacity out of the bucket.
+        :param float units: The capacity units used by the last request.
+        """
+        with self.lock:
+            self._refill()
+            self.tokens -= units
+
+    def settle(self, reserved: float, consumed: float):
+        """
+        Corrects a reservation made by wait(units) once the real cost is known.
+        :param float reserved: The units passed to wait().
+        :param float consumed: The capacity units the request actually used.
+        """
+        with self.lock:
+            self._refill()
+            self.tokens = min(self.burst, self.tokens + reserved - consumed)
+
+
+class AdaptiveRateController(RateLimiter):
+    """
+    Token bucket whose rate follows what the table can sustain.
+
+    It starts at the table's provisioned capacity, halves its rate when DynamoDB throttles us
+    and creeps back up after every successful request (AIMD), never above the provisioned capacity.
+    """
+
+    def __init__(self, max_rate: float, min_rate: float = 1.0, increase_ratio: float = 0.05,
+                 decrease_factor: float = 0.5):
+        """
+        :param float max_rate: The provisioned capacity units per second of the table.
+        :param float min_rate: The rate never goes below this.
+        :param float increase_ratio: Part of max_rate added back after each successful request.
+        :param float decrease_factor: The rate is multiplied by this on each throttle.
+        """
+        super().__init__(max_rate)
+        self.max_rate = float(max_rate)
+        self.min_rate = min(float(min_rate), self.max_rate)
+        self.increase_step = self.max_rate * increase_ratio
+        self.decrease_factor = decrease_factor
+        self.throttles = 0
+        self.consumed_total = 0.0
+
+    @property
+    def current_rate(self) -> float:
+        return self.rate
+
+    def record_success(self, consumed: float, reserved: float = 0.0):
+        """
+        Call after a request went through, with the capacity DynamoDB reports as consumed.
+        :param float consumed: ConsumedCapacity.CapacityUnits of the response.
+        :param float reserved: The units reserved for it with wait(units).
+        """
+        self.settle(reserved, consumed)
+        with self.lock:
+            self.consumed_total += consumed
+            self.rate = min(self.max_rate, self.rate + self.increase_step)
+            self.burst = self.rate
+
+    def record_throttle(self):
+        """
+        Call when DynamoDB throttled the request (ProvisionedThroughputExceededException or unprocessed items).
+        """
+        with self.lock:
+            self._refill()
+            self.throttles += 1
+            self.rate = max(self.min_rate, self.rate * self.decrease_factor)
+            self.burst = self.rate
+            self.tokens = min(self.tokens, self.burst)
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {
+                "current_rate": self.rate,
+                "max_rate": self.max_rate,
+                "throttles": self.throttles,
+                "consumed_total": self.consumed_total
+            }
@@ -0,0 +1,164 @@
+import base64
+import hashlib
+import hmac
+import json
+import os
+import secrets
+import time
+from backend.core.cache import MISSING, TTLCache
+
+
+class InvalidTokenError(Exception):
+    """
+    Raised when a session token is malformed, badly signed, expired or revoked.
+    """
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+
+def _b64decode(text: str) -> bytes:
+    return base64.urlsafe_b64decode(text + "=" * (-len(text) % 4))
+
+
+def session_secret() -> str:
+    """
+    The signing key of the session tokens, from SESSION_SECRET.
+    Locally a random one is used when it's not set (valid only for this process); in production
+    (MUSICLIST_ENV=production) it raises instead, since the other instances would reject our tokens.
+    """
+    secret = os.getenv("SESSION_SECRET")
+    if secret:
+        return secret
+    if os.getenv("MUSICLIST_ENV") == "production":
+        raise RuntimeError("SESSION_SECRET is not set, refusing to sign sessions with a per-process key.")
+    return secrets.token_hex(32)
+
+
+class RevokedTokenStore:
+    """
+    The revoked token ids shared by every worker and instance, in the 'revoked_tokens' table
+    (see backend/schemas/revoked_tokens_table_schema.py). Items expire with the token through the table's TTL.
+    """
+
+    def __init__(self, client, table_name: str = "revoked_tokens"):
+        """
+        :param client: The shared async DynamoDB client.
+        :param str table_name: The name of the revoked tokens table.
+        """
+        self.client = client
+        self.table_name = table_name
+
+    async def add(self, jti: str, expires_at: int):
+        await self.client.put_item(TableName=self.table_name,
+                                   Item={"jti": {"S": jti}, "expires_at": {"N": str(int(expires_at))}})
+
+    async def contains(self, jti: str) -> bool:
+        # Strongly consistent: a logout on another worker must be seen by the very next request
+        response = await self.client.get_item(TableName=self.table_name, Key={"jti": {"S": jti}},
+                                              ProjectionExpression="jti", ConsistentRead=True)
+        return "Item" in response
+
+
+class SessionTokens:
+    """
+    Issues and checks short-lived session tokens signed with HMAC-SHA256.
+
+    A token is base64url(JSON claims) + "." + base64url(signature). Checking the signature is a local
+    computation, so authenticated requests never read the 'login' table.
+    Refreshed and logged-out tokens are revoked until they would have expired anyway: in the shared
+    store (one strongly consistent read per authenticated request), so every worker rejects them,
+    and in a local denylist that answers for the tokens already known to be revoked.
+    """
+
+    def __init__(self, secret: str, ttl: int = 900, max_revoked: int = 100000, store: RevokedTokenStore = None):
+        """
+        :param str secret: The signing key, the same for every worker and instance.
+        :param int ttl: Seconds a token is valid.
+        :param int max_revoked: Size of the local denylist.
+        :param RevokedTokenStore store: (Optional) The shared revoked tokens. Without it a revocation
+                                        only holds in this process (single process development only).
+        """
+        if len(secret) < 32:
+            raise ValueError("The session secret must be at least 32 characters long.")
+        self._key = secret.encode()
+        self.ttl = ttl
+        self.denylist = TTLCache(maxsize=max_revoked, ttl=ttl)
+        self.store = store
+
+    @classmethod
+    def from_env(cls, dynamodb=None) -> "SessionTokens":
+        """
+        Reads SESSION_SECRET (see session_secret), SESSION_TTL and REVOKED_TOKENS_TABLE.
+        :param dynamodb: (Optional) The shared async DynamoDB client, for the shared revoked tokens.
+        """
+        store = RevokedTokenStore(dynamodb, os.getenv("REVOKED_TOKENS_TABLE", "revoked_tokens")) if dynamodb else None
+        return cls(session_secret(), ttl=int(os.getenv("SESSION_TTL", 900)), store=store)
+
+    def _sign(self, payload: str) -> str:
+        return _b64encode(hmac.new(self._key, payload.encode("ascii"), hashlib.sha256).digest())
+
+    def issue(self, email: str, username: str) -> dict:
+        """
+        Creates a token for a user who just logged in.
+        :param str email: The user's email.
+        :param str username: The user's name.
+        :return: dict with 'token', 'expires_at' (epoch seconds) and 'claims'
+        """
+        now = int(time.time())
+        claims = {"sub": email, "name": username, "iat": now, "exp": now + self.ttl, "jti": secrets.token_urlsafe(12)}
+        payload = _b64encode(json.dumps(claims, separators=(",", ":")).encode())
+        return {"token": f"{payload}.{self._sign(payload)}", "expires_at": claims["exp"], "claims": claims}
+
+    def verify(self, token: str) -> dict:
+        """
+        Checks the signature, expiry and local denylist of a token (no I/O; see check for the shared store).
+        Raises InvalidTokenError if the token can't be used.
+        :param str token: The token sent by the client.
+        :return: dict, the claims
+        """
+        try:
+            payload, signature = token.split(".")
+            valid_signature = hmac.compare_digest(signature, self._sign(payload))
+        except (ValueError, UnicodeEncodeError):
+            raise InvalidTokenError("Malformed token")
+        if not valid_signature:
+            raise InvalidTokenError("Invalid token signature")
+
+        try:
+            claims = json.loads(_b64decode(payload))
+        except ValueError:
+            raise InvalidTokenError("Malformed token")
+        if claims.get("exp", 0) <= time.time():
+            raise InvalidTokenError("Token expired")
+        if self.denylist.get(claims.get("jti")) is not MISSING:
+            raise InvalidTokenError("Token revoked")
+        return claims
+
+    async def check(self, token: str) -> dict:
+        """
+        Checks a token like verify, then against the revocations made by every worker.
+        Raises InvalidTokenError if the token can't be used; store errors are raised as they are.
+        :param str token: The token sent by the client.
+        :return: dict, the claims
+        """
+        claims = self.verify(token)
+        if self.store is not None and await self.store.contains(claims["jti"]):
+            self.denylist.set(claims["jti"], True, ttl=claims["exp"] - time.time())
+            raise InvalidTokenError("Token revoked")
+        return claims
+
+    async def revoke(self, claims: dict):
+        """
+        Denies a token until its expiry, e.g. on logout or once it was refreshed.
+        :param dict claims: The claims returned by verify() or check().
+        """
+        remaining = claims["exp"] - time.time()
+        if remaining > 0:
+            if self.store is not None:
+                await self.store.add(claims["jti"], claims["exp"])
+            self.denylist.set(claims["jti"], True, ttl=remaining)
+
+    def stats(self) -> dict:
+        return {"ttl": self.ttl, "shared_revocations": self.store is not None, "revoked": self.denylist.stats()}
@@ -0,0 +1,35 @@
+# Gunicorn settings of the production backend (see scripts/deploy/musiclist-backend.service).
+# Run from the MusicList folder: gunicorn -c backend/gunicorn_conf.py backend.main:app
+import multiprocessing
+import os
+import secrets
+
+# One async (uvicorn) worker per core: each worker runs its own event loop, so it needs no extra threads
+workers = int(os.getenv("WEB_CONCURRENCY", max(2, multiprocessing.cpu_count())))
+worker_class = "uvicorn.workers.UvicornWorker"
+bind = os.getenv("BIND", "0.0.0.0:8000") # Nginx proxies port 80 to here
+
+# Graceful lifecycle: on SIGTERM/HUP a worker stops accepting and gets graceful_timeout seconds
+# to finish its in-flight requests. HUP starts new workers before the old ones are drained.
+graceful_timeout = int(os.getenv("GRACEFUL_TIMEOUT", 30))
+timeout = int(os.getenv("WORKER_TIMEOUT", 60))
+keepalive = 5
+
+# Recycle workers now and then, so a slow leak can't grow forever (jitter: not all at once)
+max_requests = 10000
+max_requests_jitter = 1000
+
+# Preloading imports the app once in the master and forks it (faster boot, shared memory),
+# but then a HUP reload keeps serving the old code. Off by default so deploys can reload with HUP.
+preload_app = os.getenv("GUNICORN_PRELOAD", "0") == "1"
+
+# Session tokens and cursors must be signed with the same key by every worker and instance.
+# In production (MUSICLIST_ENV=production, set by the systemd unit) SESSION_SECRET is required;
+# locally the master picks one that its workers inherit.
+if os.getenv("MUSICLIST_ENV") == "production" and not os.getenv("SESSION_SECRET"):
+    raise RuntimeError("SESSION_SECRET is not set (see scripts/deploy/write_env_file.py), refusing to start.")
+os.environ.setdefault("SESSION_SECRET", secrets.token_hex(32))
+
+accesslog = "-"
+errorlog = "-"
+loglevel = os.getenv("LOG_LEVEL", "info")
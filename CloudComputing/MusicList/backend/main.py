@@ -1,8 +1,88 @@
+import asyncio
+import os
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
-from backend.api import auth
+from backend.api import auth, internal, media, music, subscriptions
+from backend.core.async_dynamo import AsyncDynamoManager
+from backend.core.aws import AsyncAWS
+from backend.core.change_stream import (ChangeStreamConsumer, DynamoStreamSource, RelayStreamSource,
+                                        cache_invalidation_handler, catalog_handler)
+from backend.core.cursors import CursorCodec
+from backend.core.http_cache import CachePolicy, HTTPCacheMiddleware
+from backend.core.passwords import PasswordPool
+from backend.core.tokens import SessionTokens
 
-app = FastAPI()
+# Changes of the music and login tables applied to the catalog index and the user cache
+# (the tables need their stream enabled, see backend/schemas):
+#   CHANGE_STREAM=relay   read from the instance's sidecar (scripts/change_stream_sidecar.py), production
+#   CHANGE_STREAM=direct  every worker tails the streams itself: single-worker development only,
+#                         DynamoDB allows about 2 readers per shard
+CHANGE_STREAM = os.getenv("CHANGE_STREAM", "off")
+CHANGE_RELAY_URL = os.getenv("CHANGE_RELAY_URL", "http://127.0.0.1:8081")
+if CHANGE_STREAM not in ("off", "relay", "direct"):
+    raise RuntimeError(f"Unknown CHANGE_STREAM '{CHANGE_STREAM}', choose from off, relay, direct.")
+if CHANGE_STREAM == "direct" and os.getenv("MUSICLIST_ENV") == "production":
+    raise RuntimeError("CHANGE_STREAM=direct makes every worker read the streams, use relay in production.")
+
+
+def stream_source(table_name: str):
+    if CHANGE_STREAM == "relay":
+        return RelayStreamSource(table_name, CHANGE_RELAY_URL)
+    return DynamoStreamSource(table_name)
+
+# While this file exists /readyz answers 503, so the load balancer drains the instance before a deploy
+DRAIN_FILE = os.getenv("DRAIN_FILE", "/tmp/musiclist.drain")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # One AWS session and connection pool per process, shared by every request
+    app.state.aws = AsyncAWS()
+    await app.state.aws.start()
+    app.state.async_dynamo = AsyncDynamoManager(app.state.aws.dynamodb)
+    # Page cursors of the listings, signed with a key derived from the session secret
+    app.state.cursors = CursorCodec.from_env()
+
+    # Password hashing runs on its own bounded pool, see backend/core/passwords.py
+    app.state.password_pool = PasswordPool(
+        workers=int(os.getenv("PASSWORD_WORKERS", "0")) or None,
+        max_queue=int(os.environ["PASSWORD_QUEUE_DEPTH"]) if "PASSWORD_QUEUE_DEPTH" in os.environ else None,
+        queue_budget_ms=float(os.getenv("PASSWORD_QUEUE_BUDGET_MS", "1000"))
+    )
+
+    change_stream = None
+    if CHANGE_STREAM != "off":
+        change_stream = ChangeStreamConsumer()
+        change_stream.register(stream_source(music.MUSIC_TABLE), catalog_handler(music.catalog))
+        change_stream.register(stream_source(auth.LOGIN_TABLE), cache_invalidation_handler(auth.user_cache, "email"))
+        # Positioned before the catalog load, so writes made during the load are applied after it
+        await asyncio.to_thread(change_stream.start)
+    app.state.change_stream = change_stream
+
+    # Build the song index once per process, queries are then served from memory
+    await asyncio.to_thread(music.load_catalog)
+    change_stream_task = asyncio.create_task(change_stream.run()) if change_stream else None
+
+    # Signed session tokens, checked locally by every authenticated endpoint. Revocations (logout, refresh)
+    # go to the 'revoked_tokens' table, so every worker and instance rejects the token
+    app.state.session_tokens = SessionTokens.from_env(app.state.aws.dynamodb)
+
+    app.state.ready = True
+    yield
+    app.state.ready = False # Shutting down: not ready anymore, in-flight requests still finish
+
+    if change_stream_task:
+        change_stream_task.cancel()
+        await asyncio.gather(change_stream_task, return_exceptions=True)
+
+    await app.state.aws.close()
+    app.state.password_pool.close()
+
+
+# orjson for every response: several times faster than the stdlib json encoder
+app = FastAPI(lifespan=lifespan, default_response_class=ORJSONResponse)
 
 origins = [
     "http://ec2-54-165-19-130.compute-1.amazonaws.com",  # e.g. http://ec2-xx-xxx-xxx-xxx.compute-1.amazonaws.com
@@ -11,6 +91,27 @@ origins = [
     "http://127.0.0.1:3000"
 ]
 
+# Caching rules per route. Catalog queries get an ETag from the catalog content, so a repeated
+# request with If-None-Match is a 304 without running the query. Per-user data is never cached.
+app.add_middleware(
+    HTTPCacheMiddleware,
+    policies=[
+        CachePolicy("/music/query", "public, max-age=60, stale-while-revalidate=300", etag="version"),
+        CachePolicy("/music/catalog", "public, max-age=60, stale-while-revalidate=300", etag="version"),
+        CachePolicy("/music/artists", "public, max-age=60, stale-while-revalidate=300", etag="version"),
+        CachePolicy("/music/songs", "no-cache", etag="body"),
+        CachePolicy("/music/export", "no-store"),
+        CachePolicy("/auth", "no-store"),
+        CachePolicy("/subscriptions", "private, no-store"),
+        CachePolicy("/media", "private, no-store"),
+        CachePolicy("/internal", "no-store"),
+        CachePolicy("/healthz", "no-store"),
+        CachePolicy("/readyz", "no-store"),
+    ],
+    version_tag=music.catalog.content_tag
+)
+
+# Added last so it wraps the cache middleware: 304 answers get the CORS headers too
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -20,9 +121,30 @@ app.add_middleware(
 )
 
 app.include_router(auth.router, prefix="/auth", tags=["auth"])
+app.include_router(music.router, prefix="/music", tags=["music"])
+app.include_router(media.router, prefix="/media", tags=["media"])
+app.include_router(subscriptions.router, prefix="/subscriptions", tags=["subscriptions"])
+app.include_router(internal.router, prefix="/internal", tags=["internal"], include_in_schema=False)
+
+@app.get("/healthz")
+async def liveness():
+    # The process is up and its event loop answers
+    return {"status": "ok"}
+
+@app.get("/readyz")
+async def readiness():
+    # Ready to take traffic: AWS clients opened, catalog loaded and not draining
+    checks = {
+        "started": getattr(app.state, "ready", False),
+        "catalog_loaded": len(music.catalog) > 0,
+        "not_draining": not os.path.exists(DRAIN_FILE)
+    }
+    ready = all(checks.values())
+    return JSONResponse(status_code=200 if ready else 503,
+                        content={"status": "ok" if ready else "unavailable", "checks": checks})
 
 @app.get("/hello")
-def say_hello():
+async def say_hello():
     return {"message": "Hello from Backend!"}
 
 
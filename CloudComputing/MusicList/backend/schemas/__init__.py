@@ -1,2 +1,4 @@
 from .login_table_schema import login_table_schema
-from .music_table_schema import music_table_schema
\ No newline at end of file
+from .music_table_schema import music_table_schema
+from .revoked_tokens_table_schema import revoked_tokens_table_schema
+from .subscription_table_schema import subscription_table_schema
\ No newline at end of file
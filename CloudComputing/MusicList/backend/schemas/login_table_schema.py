@@ -1,6 +1,7 @@
 login_table_schema = {
     "KeySchema": [{"AttributeName": "email", "KeyType": "HASH"}],
     "AttributeDefinitions": [{"AttributeName": "email", "AttributeType": "S"}],
-    "ProvisionedThroughput": {"ReadCapacityUnits": 5, "WriteCapacityUnits": 5}
+    "ProvisionedThroughput": {"ReadCapacityUnits": 5, "WriteCapacityUnits": 5},
+    # Only the keys: enough to invalidate cached users, and no password hash is copied to the stream
+    "StreamSpecification": {"StreamEnabled": True, "StreamViewType": "KEYS_ONLY"}
 }
-
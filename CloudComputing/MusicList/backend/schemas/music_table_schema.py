@@ -6,6 +6,31 @@ music_table_schema = {
     "AttributeDefinitions": [
         {"AttributeName": "title", "AttributeType": "S"},
         {"AttributeName": "album", "AttributeType": "S"},
+        {"AttributeName": "artist", "AttributeType": "S"},
+        {"AttributeName": "year", "AttributeType": "S"},
     ],
-    "ProvisionedThroughput": {"ReadCapacityUnits": 5, "WriteCapacityUnits": 5}
-}
\ No newline at end of file
+    # Secondary access paths, so lookups by artist or year are a Query instead of a full Scan
+    "GlobalSecondaryIndexes": [
+        {
+            "IndexName": "artist-year-index",
+            "KeySchema": [
+                {"AttributeName": "artist", "KeyType": "HASH"},
+                {"AttributeName": "year", "KeyType": "RANGE"}
+            ],
+            "Projection": {"ProjectionType": "ALL"},
+            "ProvisionedThroughput": {"ReadCapacityUnits": 5, "WriteCapacityUnits": 5}
+        },
+        {
+            "IndexName": "year-title-index",
+            "KeySchema": [
+                {"AttributeName": "year", "KeyType": "HASH"},
+                {"AttributeName": "title", "KeyType": "RANGE"}
+            ],
+            "Projection": {"ProjectionType": "ALL"},
+            "ProvisionedThroughput": {"ReadCapacityUnits": 5, "WriteCapacityUnits": 5}
+        }
+    ],
+    "ProvisionedThroughput": {"ReadCapacityUnits": 5, "WriteCapacityUnits": 5},
+    # Change stream read by the change stream sidecar and relayed to the API workers to keep their catalog index up to date (see scripts/change_stream_sidecar.py)
+    "StreamSpecification": {"StreamEnabled": True, "StreamViewType": "NEW_AND_OLD_IMAGES"}
+}
@@ -0,0 +1,9 @@
+# One item per revoked session token (logout, refresh), read by every authenticated request of every worker.
+# 'expires_at' (epoch seconds, the token's own expiry) is the table's TTL attribute, turned on by
+# scripts/init_aws.py: DynamoDB deletes the items once the tokens would be rejected as expired anyway.
+# On-demand: the read rate follows the API traffic, not a provisioned guess
+revoked_tokens_table_schema = {
+    "KeySchema": [{"AttributeName": "jti", "KeyType": "HASH"}],
+    "AttributeDefinitions": [{"AttributeName": "jti", "AttributeType": "S"}],
+    "BillingMode": "PAY_PER_REQUEST"
+}
@@ -0,0 +1,14 @@
+# One item per (user, song): the user's subscriptions are a single Query on the email.
+# song_key is "<title>#<album>" with '#' escaped (see async_dynamo.song_key), the primary key of the song
+# in the 'music' table (title and album are stored on the item too, so the songs can be fetched without parsing it)
+subscription_table_schema = {
+    "KeySchema": [
+        {"AttributeName": "email", "KeyType": "HASH"},     # Partition key
+        {"AttributeName": "song_key", "KeyType": "RANGE"}  # Sort key
+    ],
+    "AttributeDefinitions": [
+        {"AttributeName": "email", "AttributeType": "S"},
+        {"AttributeName": "song_key", "AttributeType": "S"}
+    ],
+    "ProvisionedThroughput": {"ReadCapacityUnits": 5, "WriteCapacityUnits": 5}
+}
@@ -53,7 +53,8 @@ export default function SignIn() {
                 return;
             }
 
-            // Successful login
+            // Successful login, keep the session token for the authenticated requests
+            sessionStorage.setItem('token', result.token);
             alert("✅ Login success! Welcome " + result.username);
             console.log("Login result:", result);
             navigate('/main');
@@ -0,0 +1,255 @@
+"""
+Load test of the backend endpoints.
+
+Starts a local AWS stand-in (moto server), seeds it with the dummy users and data/2025a1.json,
+starts backend.main:app with uvicorn against it, then drives every endpoint with N concurrent
+clients and reports throughput, p50/p95/p99 latency and error rate per endpoint. Load-shed answers
+(503 from the password pool) are counted apart from real errors.
+
+Extra dependencies (not needed by the backend itself): pip install "moto[server]" httpx
+
+Run from the MusicList folder:
+    python -m scripts.benchmark --concurrency 50 --requests 2000
+    python -m scripts.benchmark --endpoints "POST /auth/login" --password-queue-depth 40
+    python -m scripts.benchmark --base-url http://my-backend   (an already running backend, no local stand-in)
+    python -m scripts.benchmark --compare bench_results/<previous run>.json
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+import httpx
+
+from scripts import seed_data
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+CATALOG_JSON = PROJECT_ROOT / "data" / "2025a1.json"
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_aws_stand_in() -> tuple:
+    """
+    Starts moto server and seeds the 'login' and 'music' tables.
+    :return: tuple (moto server, endpoint url)
+    """
+    from moto.server import ThreadedMotoServer
+    from backend.core.dynamo import DynamoManager
+    from backend.schemas import login_table_schema, music_table_schema
+
+    port = free_port()
+    server = ThreadedMotoServer(port=port, verbose=False)
+    server.start()
+    endpoint_url = f"http://127.0.0.1:{port}"
+
+    # Fake credentials, moto accepts anything
+    os.environ.setdefault("AWS_ACCESS_KEY_ID", "testing")
+    os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "testing")
+    os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+
+    db = DynamoManager(endpoint_url=endpoint_url)
+    db.create_table("login", login_table_schema)
+    for user in seed_data.generate_dummy_login_data():
+        db.insert_data("login", user)
+    db.create_table("music", music_table_schema)
+    db.load_data_from_json_into_table("music", str(CATALOG_JSON), "title", "album")
+
+    return server, endpoint_url
+
+
+def start_backend(endpoint_url: str, port: int, workers: int, password_queue_depth: int = None) -> subprocess.Popen:
+    env = dict(os.environ, AWS_ENDPOINT_URL=endpoint_url) # Picked up by boto3 and aioboto3
+    if password_queue_depth is not None:
+        env["PASSWORD_QUEUE_DEPTH"] = str(password_queue_depth)
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "backend.main:app", "--host", "127.0.0.1", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning"],
+        cwd=PROJECT_ROOT, env=env
+    )
+
+
+async def wait_until_ready(base_url: str, timeout: float = 60):
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient(base_url=base_url) as client:
+        while time.monotonic() < deadline:
+            try:
+                if (await client.get("/hello")).status_code == 200:
+                    return
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.2)
+    raise RuntimeError(f"Backend at {base_url} did not become ready in {timeout}s")
+
+
+def build_scenarios() -> dict:
+    """
+    Request factories per endpoint. Each call returns the kwargs of the next request,
+    cycling through the seeded users and the catalog artists.
+    :return: dict, endpoint name -> (method, path, factory)
+    """
+    users = itertools.cycle(seed_data.generate_dummy_login_data(hash_passwords=False))
+    with open(CATALOG_JSON, "r", encoding="utf-8") as file:
+        songs = json.load(file)["songs"]
+    artists = itertools.cycle(sorted({song["artist"] for song in songs}))
+
+    def login_payload():
+        user = next(users)
+        return {"json": {"email": user["email"], "password": user["password"]}}
+
+    return {
+        "GET /hello": ("GET", "/hello", lambda: {}),
+        "POST /auth/login": ("POST", "/auth/login", login_payload),
+        "GET /music/query": ("GET", "/music/query", lambda: {"params": {"artist": next(artists)}}),
+    }
+
+
+def percentile(sorted_values: list, percent: float) -> float:
+    # Nearest-rank percentile
+    if not sorted_values:
+        return 0.0
+    rank = max(1, round(percent / 100 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+async def run_endpoint(base_url: str, method: str, path: str, factory, concurrency: int, total_requests: int) -> dict:
+    """
+    Sends total_requests requests with `concurrency` clients in flight.
+    :return: dict with the throughput, latency percentiles (ms), error rate and shed rate (503s)
+    """
+    latencies = []
+    errors = 0
+    shed = 0
+    remaining = iter(range(total_requests))
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30) as client:
+        async def worker():
+            nonlocal errors, shed
+            for _ in remaining: # Shared iterator, so the workers split the requests between them
+                started = time.perf_counter()
+                try:
+                    response = await client.request(method, path, **factory())
+                    if response.status_code == 503:
+                        shed += 1 # Turned away by design (saturated password pool), not a failure
+                    elif response.status_code >= 400:
+                        errors += 1
+                except httpx.HTTPError:
+                    errors += 1
+                latencies.append((time.perf_counter() - started) * 1000)
+
+        started_at = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started_at
+
+    latencies.sort()
+    return {
+        "requests": total_requests,
+        "concurrency": concurrency,
+        "elapsed_seconds": round(elapsed, 3),
+        "throughput_rps": round(total_requests / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p95_ms": round(percentile(latencies, 95), 2),
+        "p99_ms": round(percentile(latencies, 99), 2),
+        "max_ms": round(latencies[-1], 2) if latencies else 0.0,
+        "error_rate": round(errors / total_requests, 4) if total_requests else 0.0,
+        "shed_rate": round(shed / total_requests, 4) if total_requests else 0.0,
+    }
+
+
+def print_results(results: dict, previous: dict = None):
+    print(f"password queue depth: {results['settings']['password_queue_depth']}")
+    print(f"{'endpoint':<20}{'rps':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'errors':>10}{'shed 503':>10}")
+    for endpoint, stats in results["endpoints"].items():
+        print(f"{endpoint:<20}{stats['throughput_rps']:>10}{stats['p50_ms']:>10}{stats['p95_ms']:>10}"
+              f"{stats['p99_ms']:>10}{stats['error_rate']:>10.2%}{stats.get('shed_rate', 0.0):>10.2%}")
+        old = (previous or {}).get("endpoints", {}).get(endpoint)
+        if old:
+            def delta(name):
+                return f"{(stats[name] - old[name]) / old[name]:+.1%}" if old[name] else "n/a"
+            print(f"{'  vs previous':<20}{delta('throughput_rps'):>10}{delta('p50_ms'):>10}"
+                  f"{delta('p95_ms'):>10}{delta('p99_ms'):>10}")
+
+
+async def run_benchmark(args) -> dict:
+    scenarios = build_scenarios()
+    selected = args.endpoints or list(scenarios)
+    await wait_until_ready(args.base_url)
+
+    results = {
+        "started_at": datetime.now().isoformat(timespec="seconds"),
+        "base_url": args.base_url,
+        "machine": {"python": platform.python_version(), "platform": platform.platform(), "cpus": os.cpu_count()},
+        "settings": {"concurrency": args.concurrency, "requests": args.requests, "warmup": args.warmup,
+                     "workers": args.workers,
+                     "password_queue_depth": args.password_queue_depth if args.password_queue_depth is not None else "auto"},
+        "endpoints": {}
+    }
+    for endpoint in selected:
+        method, path, factory = scenarios[endpoint]
+        if args.warmup:
+            await run_endpoint(args.base_url, method, path, factory, args.concurrency, args.warmup)
+        results["endpoints"][endpoint] = await run_endpoint(
+            args.base_url, method, path, factory, args.concurrency, args.requests
+        )
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the backend endpoints.")
+    parser.add_argument("--base-url", help="Benchmark an already running backend instead of starting one locally.")
+    parser.add_argument("--concurrency", type=int, default=20, help="Requests in flight at the same time.")
+    parser.add_argument("--requests", type=int, default=1000, help="Measured requests per endpoint.")
+    parser.add_argument("--warmup", type=int, default=100, help="Unmeasured requests per endpoint sent first.")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers of the local backend.")
+    parser.add_argument("--password-queue-depth", type=int,
+                        help="PASSWORD_QUEUE_DEPTH of the local backend (default: sized by the backend itself).")
+    parser.add_argument("--endpoints", nargs="*", help='Only these endpoints, e.g. "GET /hello".')
+    parser.add_argument("--output", help="Result file (default: bench_results/<timestamp>.json).")
+    parser.add_argument("--compare", help="A previous result file to compare with.")
+    args = parser.parse_args()
+
+    moto_server = backend = None
+    try:
+        if not args.base_url:
+            moto_server, endpoint_url = start_aws_stand_in()
+            port = free_port()
+            backend = start_backend(endpoint_url, port, args.workers, args.password_queue_depth)
+            args.base_url = f"http://127.0.0.1:{port}"
+
+        results = asyncio.run(run_benchmark(args))
+    finally:
+        if backend:
+            backend.terminate()
+            backend.wait(timeout=10)
+        if moto_server:
+            moto_server.stop()
+
+    previous = None
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as file:
+            previous = json.load(file)
+    print_results(results, previous)
+
+    output = Path(args.output) if args.output else \
+        PROJECT_ROOT / "bench_results" / f"{datetime.now():%Y%m%d-%H%M%S}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, "w", encoding="utf-8") as file:
+        json.dump(results, file, indent=2)
+    print(f"✅ Results saved to {output}")
+
+
+if __name__ == "__main__":
+    main()
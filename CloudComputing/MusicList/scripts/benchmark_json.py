@@ -0,0 +1,78 @@
+"""
+Microbenchmark of the JSON encoding cost per request, for the catalog responses.
+
+Compares, for the full catalog and for one artist's songs:
+    before:      FastAPI's default path, jsonable_encoder + stdlib json (JSONResponse)
+    orjson:      jsonable_encoder + orjson (ORJSONResponse, the default response class now)
+    pre-encoded: the bytes kept by CatalogPayloads, re-encoded only when the songs they hold change
+
+Run from the MusicList folder:
+    python -m scripts.benchmark_json --catalog-copies 50
+"""
+import argparse
+import json
+import timeit
+from pathlib import Path
+from fastapi.encoders import jsonable_encoder
+from backend.core.catalog_index import CatalogIndex
+from backend.core.payloads import CatalogPayloads, encode_json
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+CATALOG_JSON = PROJECT_ROOT / "data" / "2025a1.json"
+
+
+def build_catalog(copies: int) -> CatalogIndex:
+    # Copies of the sample catalog with distinct albums, to see how the cost grows with the catalog
+    with open(CATALOG_JSON, "r", encoding="utf-8") as file:
+        songs = json.load(file)["songs"]
+    catalog = CatalogIndex()
+    catalog.build({**song, "album": f"{song['album']} ({copy})" if copy else song["album"]}
+                  for copy in range(copies) for song in songs)
+    return catalog
+
+
+def per_call_us(function, repeat: int) -> float:
+    return min(timeit.repeat(function, number=repeat, repeat=5)) / repeat * 1_000_000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the JSON encoding of catalog responses.")
+    parser.add_argument("--catalog-copies", type=int, default=1, help="Size of the catalog, in copies of data/2025a1.json.")
+    parser.add_argument("--repeat", type=int, default=200, help="Calls per measurement.")
+    args = parser.parse_args()
+
+    catalog = build_catalog(args.catalog_copies)
+    payloads = CatalogPayloads(catalog)
+    artist = max(catalog.postings["artist"], key=lambda name: len(catalog.postings["artist"][name]))
+
+    artist_songs = catalog.query({"artist": artist})
+    cases = {
+        "full catalog": {"status": "ok", "count": len(catalog), "songs": catalog.songs},
+        f"artist '{artist}'": {"status": "ok", "count": len(artist_songs), "songs": artist_songs},
+    }
+    pre_encoded = {"full catalog": payloads.full_catalog, f"artist '{artist}'": lambda: payloads.artist(artist)}
+
+    print(f"{len(catalog)} songs, {args.repeat} calls per measurement (best of 5)")
+    print(f"{'response':<32}{'bytes':>10}{'before us':>12}{'orjson us':>12}{'pre-encoded us':>16}{'speed-up':>10}")
+    for name, content in cases.items():
+        def before():
+            return json.dumps(jsonable_encoder(content), ensure_ascii=False, separators=(",", ":")).encode()
+
+        def with_orjson():
+            return encode_json(jsonable_encoder(content))
+
+        before_us = per_call_us(before, args.repeat)
+        orjson_us = per_call_us(with_orjson, args.repeat)
+        pre_encoded_us = per_call_us(pre_encoded[name], args.repeat)
+        print(f"{name[:31]:<32}{len(with_orjson()):>10}{before_us:>12.1f}{orjson_us:>12.1f}{pre_encoded_us:>16.2f}"
+              f"{before_us / pre_encoded_us:>9.0f}x")
+
+    rebuild_us = per_call_us(lambda: (setattr(catalog, "version", catalog.version + 1), payloads.full_catalog()), 10)
+    print(f"Re-encoding the full catalog after a change: {rebuild_us / 1000:.1f} ms (in a worker thread, once per change)")
+    song = catalog.songs[next(iter(catalog.postings["artist"][artist]))]
+    artist_us = per_call_us(lambda: (catalog.add_song(dict(song)), payloads.artist(artist)), 10)
+    print(f"Re-encoding one artist after a change of its songs: {artist_us / 1000:.2f} ms (on its next request)")
+
+
+if __name__ == "__main__":
+    main()
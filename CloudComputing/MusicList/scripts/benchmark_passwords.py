@@ -0,0 +1,65 @@
+"""
+Benchmark of password verification, the CPU-bound part of /auth/login.
+
+Measures how many Argon2 verifications per second one core does, then how the PasswordPool scales
+with 1..N worker threads, to size PASSWORD_WORKERS / PASSWORD_QUEUE_DEPTH and the instance type.
+The end-to-end numbers (with DynamoDB and HTTP) come from: python -m scripts.benchmark --endpoints "POST /auth/login"
+
+Run from the MusicList folder:
+    python -m scripts.benchmark_passwords --verifications 400
+"""
+import argparse
+import asyncio
+import os
+import time
+from backend.core.passwords import PasswordPool, hash_password, hasher, verify_password
+
+
+def single_core(stored: str, password: str, verifications: int) -> float:
+    """
+    :return: float, verifications per second on the calling thread
+    """
+    started_at = time.perf_counter()
+    for _ in range(verifications):
+        verify_password(stored, password)
+    return verifications / (time.perf_counter() - started_at)
+
+
+async def through_pool(stored: str, password: str, verifications: int, workers: int) -> float:
+    """
+    Sends every verification at once through a PasswordPool, the way concurrent logins do.
+    :return: float, verifications per second
+    """
+    pool = PasswordPool(workers=workers, max_queue=verifications) # Big enough queue, nothing is rejected
+    try:
+        started_at = time.perf_counter()
+        await asyncio.gather(*(pool.verify(stored, password) for _ in range(verifications)))
+        return verifications / (time.perf_counter() - started_at)
+    finally:
+        pool.close()
+
+
+def main():
+    cpus = os.cpu_count() or 1
+    parser = argparse.ArgumentParser(description="Benchmark password verification.")
+    parser.add_argument("--verifications", type=int, default=200, help="Verifications per measurement.")
+    parser.add_argument("--max-workers", type=int, default=cpus, help="Largest pool size measured.")
+    args = parser.parse_args()
+
+    password = "012345"
+    stored = hash_password(password)
+    print(f"Argon2id time_cost={hasher.time_cost} memory_cost={hasher.memory_cost} KiB, {cpus} CPU(s)")
+
+    rate = single_core(stored, password, args.verifications)
+    print(f"Single thread: {rate:.1f} logins/s ({1000 / rate:.1f} ms each)")
+
+    print(f"{'workers':>8}{'logins/s':>12}{'per worker':>12}{'speed-up':>10}")
+    workers = 1
+    while workers <= args.max_workers:
+        pool_rate = asyncio.run(through_pool(stored, password, args.verifications, workers))
+        print(f"{workers:>8}{pool_rate:>12.1f}{pool_rate / workers:>12.1f}{pool_rate / rate:>10.2f}")
+        workers *= 2
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""
+Packages the backend and the frontend build into one deploy artifact and uploads it to S3.
+
+The artifact (musiclist-<git sha>.tar.gz) contains:
+    backend/, data/, scripts/deploy/   the application code and its service files
+    frontend/                          the React build (frontend-react-build/build)
+    wheelhouse/                        every Python dependency (and pip) as wheels for the EC2 platform
+    BUILD_INFO.json                    git commit, build time, target platform
+
+Instances booted from it (EC2Manager.artifact_user_data) only download and unpack it, install the
+wheels offline and start the services: no apt update, no git clone, no PyPI download at boot.
+
+Run from the MusicList folder:
+    python -m scripts.build_artifact --bucket media-storage-s4068959
+"""
+import argparse
+import hashlib
+import json
+import shutil
+import subprocess
+import sys
+import tarfile
+import tempfile
+from datetime import datetime, timezone
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+ARTIFACT_PREFIX = "artifacts/"
+# Ubuntu images on EC2 have a recent glibc, so both wheel tags install there
+DEFAULT_PLATFORMS = ["manylinux_2_28_x86_64", "manylinux2014_x86_64"]
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=PROJECT_ROOT, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return datetime.now(timezone.utc).strftime("%Y%m%d%H%M%S")
+
+
+def build_wheelhouse(wheelhouse: Path, python_version: str, platforms: list):
+    """
+    Downloads the wheels of backend/requirements.txt (and pip itself) for the target platform,
+    which may differ from the machine running the build.
+    """
+    platform_args = [arg for platform_tag in platforms for arg in ("--platform", platform_tag)]
+    subprocess.run(
+        [sys.executable, "-m", "pip", "download", "--quiet",
+         "-r", str(PROJECT_ROOT / "backend" / "requirements.txt"), "pip",
+         "--dest", str(wheelhouse), "--only-binary=:all:",
+         "--python-version", python_version, "--implementation", "cp", *platform_args],
+        check=True
+    )
+
+
+def build_artifact(output_dir: Path, python_version: str, platforms: list) -> Path:
+    """
+    Builds the artifact tarball.
+    :return: Path of the tarball
+    """
+    revision = git_revision()
+    ignore = shutil.ignore_patterns("venv", "__pycache__", "*.pyc", ".pytest_cache")
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        staging = Path(temp_dir) / "musiclist"
+        shutil.copytree(PROJECT_ROOT / "backend", staging / "backend", ignore=ignore)
+        shutil.copytree(PROJECT_ROOT / "data", staging / "data", ignore=ignore)
+        shutil.copytree(PROJECT_ROOT / "scripts" / "deploy", staging / "scripts" / "deploy", ignore=ignore)
+        shutil.copytree(PROJECT_ROOT / "frontend-react-build" / "build", staging / "frontend")
+        build_wheelhouse(staging / "wheelhouse", python_version, platforms)
+
+        with open(staging / "BUILD_INFO.json", "w", encoding="utf-8") as file:
+            json.dump({
+                "revision": revision,
+                "built_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+                "python_version": python_version,
+                "platforms": platforms
+            }, file, indent=2)
+
+        output_dir.mkdir(parents=True, exist_ok=True)
+        artifact_path = output_dir / f"musiclist-{revision}.tar.gz"
+        with tarfile.open(artifact_path, "w:gz") as tar:
+            tar.add(staging, arcname="musiclist")
+
+    return artifact_path
+
+
+def sha256_of(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def upload_artifact(artifact_path: Path, bucket_name: str) -> str:
+    """
+    Uploads the artifact to S3 with the large-file transfer profile.
+    :return: str, the S3 key
+    """
+    from backend.core.s3 import S3Manager
+
+    s3_key = f"{ARTIFACT_PREFIX}{artifact_path.name}"
+    report = S3Manager(transfer_profile="large_media").put_many(
+        [(str(artifact_path), s3_key)], bucket_name,
+        extra_args={"ContentType": "application/gzip", "Metadata": {"sha256": sha256_of(artifact_path)}}
+    )
+    if report["failed"]:
+        raise RuntimeError(f"Failed to upload {artifact_path} to s3://{bucket_name}/{s3_key}")
+    return s3_key
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the deploy artifact and upload it to S3.")
+    parser.add_argument("--bucket", help="Upload the artifact to this bucket (under artifacts/).")
+    parser.add_argument("--output-dir", default=str(PROJECT_ROOT / "dist"), help="Where the tarball is written.")
+    parser.add_argument("--python-version", default="3.12", help="Python version of the EC2 image.")
+    parser.add_argument("--platform", action="append", dest="platforms",
+                        help=f"Wheel platform tag of the EC2 image, repeatable (default: {' '.join(DEFAULT_PLATFORMS)}).")
+    args = parser.parse_args()
+
+    artifact_path = build_artifact(Path(args.output_dir), args.python_version, args.platforms or DEFAULT_PLATFORMS)
+    size_mb = artifact_path.stat().st_size / 1024 / 1024
+    print(f"✅ Built {artifact_path} ({size_mb:.1f} MB, sha256 {sha256_of(artifact_path)})")
+
+    if args.bucket:
+        s3_key = upload_artifact(artifact_path, args.bucket)
+        print(f"✅ Uploaded to s3://{args.bucket}/{s3_key}")
+
+
+if __name__ == "__main__":
+    main()
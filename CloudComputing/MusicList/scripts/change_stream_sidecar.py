@@ -0,0 +1,46 @@
+"""
+The one DynamoDB Streams reader of a backend instance.
+
+Tails the streams of the music and login tables and relays every change to the API workers of the
+instance over HTTP on 127.0.0.1 (ChangeRelay). The workers run with CHANGE_STREAM=relay and apply the
+changes to their catalog index and user cache. DynamoDB allows about 2 readers per shard, so the
+workers must not each tail the streams themselves.
+
+Run by scripts/deploy/musiclist-change-stream.service, or from the MusicList folder:
+    python -m scripts.change_stream_sidecar --port 8081
+"""
+import argparse
+import signal
+import threading
+from backend.core.change_stream import ChangeRelay, ChangeStreamConsumer, DynamoStreamSource
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Relay the table streams to the API workers of this instance.")
+    parser.add_argument("--tables", nargs="*", default=["music", "login"], help="Tables whose stream is relayed.")
+    parser.add_argument("--host", default="127.0.0.1", help="Address of the relay endpoint (keep it local).")
+    parser.add_argument("--port", type=int, default=8081, help="Port of the relay endpoint.")
+    parser.add_argument("--max-records", type=int, default=10000, help="Records kept for the workers.")
+    args = parser.parse_args()
+
+    relay = ChangeRelay(max_records=args.max_records)
+    consumer = ChangeStreamConsumer()
+    for table_name in args.tables:
+        consumer.register(DynamoStreamSource(table_name), relay.handler)
+
+    # The endpoint answers first, so the workers starting with us can take their position
+    server = relay.serve(args.host, args.port)
+    consumer.start()
+    print(f"✅ Relaying the streams of {', '.join(args.tables)} on http://{args.host}:{args.port}")
+
+    stop_event = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stop_event.set())
+    signal.signal(signal.SIGINT, lambda *_: stop_event.set())
+    try:
+        consumer.run_forever(stop_event)
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
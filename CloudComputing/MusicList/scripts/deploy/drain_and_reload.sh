@@ -0,0 +1,14 @@
+#!/bin/bash
+# Zero-downtime deploy of the backend on one instance:
+# 1. /readyz starts answering 503, so a load balancer stops sending new requests here
+# 2. wait for the load balancer to notice
+# 3. graceful reload: new workers start on the new code, old workers finish their in-flight requests
+set -e
+DRAIN_FILE=${DRAIN_FILE:-/tmp/musiclist.drain}
+DRAIN_SECONDS=${DRAIN_SECONDS:-10}
+
+touch "$DRAIN_FILE"
+sleep "$DRAIN_SECONDS"
+sudo systemctl reload musiclist-backend
+sleep 5
+rm -f "$DRAIN_FILE"
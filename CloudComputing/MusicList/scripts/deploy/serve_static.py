@@ -0,0 +1,37 @@
+# Minimal static file server for the React build, used by instances booted from a pre-built artifact
+# (no nginx to install). Unknown paths fall back to index.html so client-side routes (/main) work.
+#   python3 serve_static.py --root /opt/musiclist/frontend --port 80
+import argparse
+import functools
+import os
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+
+class SPARequestHandler(SimpleHTTPRequestHandler):
+    def send_head(self):
+        path = self.translate_path(self.path)
+        if not os.path.exists(path):
+            self.path = "/index.html" # Let the React router handle it
+        return super().send_head()
+
+    def end_headers(self):
+        # Files under /static/ have a content hash in their name, they can be cached forever
+        if self.path.startswith("/static/"):
+            self.send_header("Cache-Control", "public, max-age=31536000, immutable")
+        else:
+            self.send_header("Cache-Control", "no-cache")
+        super().end_headers()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the frontend build.")
+    parser.add_argument("--root", required=True, help="The build folder.")
+    parser.add_argument("--port", type=int, default=80)
+    args = parser.parse_args()
+
+    handler = functools.partial(SPARequestHandler, directory=args.root)
+    ThreadingHTTPServer(("0.0.0.0", args.port), handler).serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,36 @@
+"""
+Writes the backend's secrets from SSM Parameter Store to the systemd EnvironmentFile, at boot.
+Run by the EC2 user-data as root, from the MusicList folder:
+    venv/bin/python -m scripts.deploy.write_env_file
+
+The unit (musiclist-backend.service) requires this file: without it the service doesn't start,
+instead of signing sessions with a key the other instances don't know.
+"""
+import argparse
+import os
+from backend.core.ssm import SESSION_SECRET_PARAMETER, SSMManager
+
+ENV_FILE = '/etc/musiclist/backend.env'
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write the backend secrets to its systemd EnvironmentFile.")
+    parser.add_argument("--output", default=ENV_FILE, help="Path of the EnvironmentFile.")
+    parser.add_argument("--parameter", default=SESSION_SECRET_PARAMETER, help="SSM parameter of the session secret.")
+    parser.add_argument("--region", default="us-east-1")
+    args = parser.parse_args()
+
+    secret = SSMManager(region=args.region).get_parameter(args.parameter)
+    if not secret:
+        raise SystemExit(f"❌ SSM parameter '{args.parameter}' not found, run scripts/init_aws.py first.")
+
+    os.makedirs(os.path.dirname(args.output), exist_ok=True)
+    # Readable by root only: systemd reads it before dropping to the service user
+    descriptor = os.open(args.output, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(descriptor, "w") as file:
+        file.write(f"SESSION_SECRET={secret}\n")
+    print(f"✅ Wrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,85 +1,153 @@
+import argparse
+import os
+import time
+from dataclasses import replace
+from typing import Callable
+from backend.core.bootstrap import BootstrapRunner, BootstrapStep, per_thread
+from backend.core.bulk_load import iter_json_array
 from backend.core.dynamo import DynamoManager  # Import only the class
+from backend.core.image_sync import SyncManifest, default_manifest_path
 from backend.core.s3 import S3Manager
 from backend.core.ec2 import EC2Manager
+from backend.core.ssm import SESSION_SECRET_PARAMETER, SSMManager
 from scripts import seed_data
-from backend.schemas import login_table_schema, music_table_schema
+from backend.schemas import login_table_schema, music_table_schema, revoked_tokens_table_schema, subscription_table_schema
+
+JSON_FILE = '../data/2025a1.json'
+BUCKET_NAME = 'media-storage-s4068959'
+INSTANCE_SETTINGS = {
+    'ami_image': 'ami-084568db4383264d4', # Ubuntu 20.04
+    'instance_type': 't2.micro', # free tier
+    'key_name': 'vockey',
+    'security_group_ids': ['sg-097c28d8eac2a3446']
+}
+
+
+def build_steps(db: Callable[[], DynamoManager], s3_manager: S3Manager, ec2_manager: Callable[[], EC2Manager],
+                ssm_manager: SSMManager) -> list:
+    """
+    The bootstrap as a dependency graph. Every step checks the current state first (is_done),
+    so running the script again only does what is missing.
+    :param db: Callable returning the calling thread's DynamoManager (see per_thread): the steps run
+               on a thread pool and boto3 resources are not thread-safe.
+    :param ec2_manager: Callable returning the calling thread's EC2Manager, for the same reason.
+    The S3 and SSM managers only hold clients, which are thread-safe, so they are shared.
+    """
+    user_dummy_data = seed_data.generate_dummy_login_data()
+
+    # TASK 1.1 -- Create a 'login' table in DynamoDB and populate the user data
+    def seed_users():
+        failed = [user['email'] for user in user_dummy_data if not db().insert_data('login', user)]
+        if failed:
+            raise RuntimeError(f"Failed to insert user(s): {', '.join(failed)}")
+
+    def users_seeded():
+        login_table = db().dynamodb.Table('login')
+        return all('Item' in login_table.get_item(Key={'email': user['email']}, ProjectionExpression='email')
+                   for user in user_dummy_data)
+
+    # TASK1.3 -- Load data from json file
+    def music_loaded():
+        song_keys = {(song['title'], song['album']) for song in iter_json_array(JSON_FILE)}
+        return db().count_items('music') >= len(song_keys)
+
+    def tag_image_keys():
+        updated = db().set_image_keys('music', SyncManifest(default_manifest_path(JSON_FILE)).keys_by_url())
+        print(f"Image keys stored on {updated} song(s).")
 
+    # Task3 Create EC2 to host website
+    # Boot from a pre-built artifact when ARTIFACT_KEY is set (built by: python -m scripts.build_artifact --bucket ...)
+    # The instance downloads it with a presigned URL, no apt/git/pip work at boot
+    artifact_key = os.getenv('ARTIFACT_KEY')
+    artifact_url = s3_manager.presign_get(BUCKET_NAME, artifact_key, expires_in=6 * 3600) if artifact_key else None
+
+    def launch_instance(role: str, health_path: str):
+        user_data = EC2Manager.artifact_user_data(role, artifact_url) if artifact_url else None
+        launched_at = time.monotonic()
+        fleet = ec2_manager().launch_fleet(role, 1, user_data=user_data, **INSTANCE_SETTINGS)
+        public_dns = fleet['instances'][0]['public_dns']
+        print(f"{role.capitalize()} launched at http://{public_dns} (ID: {fleet['instances'][0]['id']})")
+        # Measured from the launch call to the first 200, so it includes the whole user-data script
+        ec2_manager().wait_until_serving(f"http://{public_dns}{health_path}")
+        print(f"⏱️ {role.capitalize()} boot-to-serving time: {time.monotonic() - launched_at:.0f}s")
+
+    return [
+        BootstrapStep('login_table', lambda: db().create_table('login', login_table_schema),
+                      is_done=lambda: db().table_exists('login')),
+        BootstrapStep('seed_users', seed_users, is_done=users_seeded, depends_on=('login_table',)),
+
+        # TASK 1.2 -- create a table titled 'music'
+        BootstrapStep('music_table', lambda: db().create_table('music', music_table_schema),
+                      is_done=lambda: db().table_exists('music')),
+        BootstrapStep('load_music', lambda: db().load_data_from_json_into_table('music', JSON_FILE, 'title', 'album'),
+                      is_done=music_loaded, depends_on=('music_table',)),
+
+        # Change streams read by the instance's sidecar and relayed to the API workers to keep their caches exact.
+        # New tables get them from their schema, this covers tables created before
+        BootstrapStep('login_stream', lambda: db().enable_stream('login', 'KEYS_ONLY'),
+                      is_done=lambda: db().get_stream_arn('login', refresh=True) is not None, depends_on=('login_table',)),
+        BootstrapStep('music_stream', lambda: db().enable_stream('music', 'NEW_AND_OLD_IMAGES'),
+                      is_done=lambda: db().get_stream_arn('music', refresh=True) is not None, depends_on=('music_table',)),
+
+        # Users' song subscriptions, read by the main page
+        BootstrapStep('subscriptions_table', lambda: db().create_table('subscriptions', subscription_table_schema),
+                      is_done=lambda: db().table_exists('subscriptions')),
+
+        # Session tokens revoked by logout/refresh, checked by every worker. Items expire with the tokens (TTL)
+        BootstrapStep('revoked_tokens_table', lambda: db().create_table('revoked_tokens', revoked_tokens_table_schema),
+                      is_done=lambda: db().table_exists('revoked_tokens')),
+        BootstrapStep('revoked_tokens_ttl', lambda: db().enable_ttl('revoked_tokens', 'expires_at'),
+                      is_done=lambda: db().ttl_enabled('revoked_tokens'), depends_on=('revoked_tokens_table',)),
+
+        # TASK 2 -- Create S3 -- Download from img_url and upload images to S3
+        BootstrapStep('bucket', lambda: s3_manager.create_s3_bucket(BUCKET_NAME),
+                      is_done=lambda: s3_manager.bucket_exists(BUCKET_NAME)),
+        ## completely block public access to prevent any accidental public exposure
+        BootstrapStep('block_public_access', lambda: s3_manager.enable_block_public_access(BUCKET_NAME),
+                      is_done=lambda: s3_manager.is_public_access_blocked(BUCKET_NAME), depends_on=('bucket',)),
+        ## set a more detailed bucket policy (e.g., enforcing HTTPS access)
+        BootstrapStep('bucket_policy', lambda: s3_manager.set_bucket_policy_block_public_access(BUCKET_NAME),
+                      is_done=lambda: s3_manager.has_bucket_policy(BUCKET_NAME), depends_on=('bucket',)),
+        ## Download and Upload images to S3. No is_done: the sync manifest already skips unchanged images
+        BootstrapStep('images', lambda: s3_manager.upload_img_from_json(JSON_FILE, BUCKET_NAME)[0],
+                      depends_on=('block_public_access', 'bucket_policy')),
+        ## Tag every song with the S3 key of its image, the API serves it with the song (img_key)
+        BootstrapStep('image_keys', tag_image_keys, depends_on=('images', 'load_music')),
+
+        # Key signing the session tokens and page cursors, read by every backend instance at boot
+        BootstrapStep('session_secret', lambda: ssm_manager.ensure_secret(SESSION_SECRET_PARAMETER),
+                      is_done=lambda: ssm_manager.get_parameter(SESSION_SECRET_PARAMETER) is not None),
+
+        # The backend loads the catalog and logs users in, its tables must be ready
+        BootstrapStep('backend_instance', lambda: launch_instance('backend', '/readyz'),
+                      is_done=lambda: bool(ec2_manager().list_role_instances('backend')),
+                      depends_on=('seed_users', 'load_music', 'image_keys', 'subscriptions_table', 'login_stream',
+                                  'music_stream', 'session_secret', 'revoked_tokens_ttl')),
+        BootstrapStep('frontend_instance', lambda: launch_instance('frontend', '/'),
+                      is_done=lambda: bool(ec2_manager().list_role_instances('frontend'))),
+    ]
 
-def main():
-    db = DynamoManager()
-    json_file = '../data/2025a1.json'
-
-    # # TASK 1.1 -- Create a 'login' table in DynamoDB and populate the user data
-    # if db.create_table('login', login_table_schema):
-    #     print("✅ Login table created.")
-    # else:
-    #     print("⚠️ Login table already exists or failed to create.")
-    #
-    # user_dummy_data = seed_data.generate_dummy_login_data()
-    # for user in user_dummy_data:
-    #     if db.insert_data("login", user):
-    #         print(f"✅ Inserted user: {user['email']}")
-    #     else:
-    #         print(f"❌ Failed to insert user: {user['email']}")
-    #
-    # # TASK 1.2 -- create a table titled 'music'
-    # if db.create_table('music', music_table_schema):
-    #     print("✅ Music table created.")
-    # else:
-    #     print("⚠️ Music table already exists or failed to create.")
-    #
-    # # TASK1.3 -- Load data from json file
-    # if db.load_data_from_json_into_table('music', json_file, 'title', 'album'):
-    #     print(f"✅ Loaded data from {json_file} into the 'music' table.")
-    # else:
-    #     print(f"⚠️ Failed to load data from {json_file} into the 'music' table.")
-    #
-    # # TASK 2 -- Create S3 -- Download from img_url and upload images to S3
-    # s3_manager = S3Manager()
-    # bucket_name = 'media-storage-s4068959'
-    # ## Create a bucket
-    # if s3_manager.create_s3_bucket(bucket_name):
-    #     print(f"✅ Created bucket: {bucket_name}")
-    # else:
-    #     print(f"⚠️ Bucket '{bucket_name}' already exists or failed to create.")
-    #
-    # ## completely block public access to prevent any accidental public exposure
-    # if s3_manager.enable_block_public_access(bucket_name):
-    #     print(f"✅ Enabled block public access for bucket: {bucket_name}")
-    # else:
-    #     print(f"⚠️ Failed to enable block public access for bucket: {bucket_name}")
-    #
-    # ## set a more detailed bucket policy (e.g., enforcing HTTPS access)
-    # if s3_manager.set_bucket_policy_block_public_access(bucket_name):
-    #     print(f"✅ Set bucket policy to block public access for bucket: {bucket_name}")
-    # else:
-    #     print(f"⚠️ Failed to set bucket policy to block public access for bucket: {bucket_name}")
-    #
-    # ## Download and Upload images to S3
-    # succeed_upload, skipped_count = s3_manager.upload_img_from_json(json_file, bucket_name)
-    # if succeed_upload:
-    #     print(f"✅ Uploaded images from {json_file} to S3 bucket: {bucket_name}")
-    #     print(f"Skipped {skipped_count} images.")
-    # else:
-    #     print(f"⚠️ Failed to upload images from {json_file} to S3 bucket: {bucket_name}")
 
-    # Task3 Create EC2 to host website
-    ec2_manager = EC2Manager()
-    # backend_instance_id, backend_public_dns = ec2_manager.create_backend_instance(
-    #     ami_image= 'ami-084568db4383264d4', # Ubuntu 20.04
-    #     instance_type = 't2.micro', # free tier
-    #     key_name='vockey',
-    #     security_group_ids=['sg-097c28d8eac2a3446']
-    # )
-    # print(f"Backend launched at http://{backend_public_dns} (ID: {backend_instance_id})")
-
-    frontend_instance_id, frontend_public_dns = ec2_manager.create_frontend_instance(
-        ami_image='ami-084568db4383264d4',
-        instance_type='t2.micro',
-        key_name='vockey',
-        security_group_ids=['sg-097c28d8eac2a3446'],
-    )
-    print(f"Frontend launched at http://{frontend_public_dns} (ID: {frontend_instance_id})")
+def main():
+    parser = argparse.ArgumentParser(description="Create (or complete) the MusicList infrastructure.")
+    parser.add_argument("--skip", nargs="*", default=[], metavar="STEP",
+                        help="Steps to leave out, e.g. --skip backend_instance images.")
+    parser.add_argument("--workers", type=int, default=8, help="Maximum number of steps running at once.")
+    args = parser.parse_args()
+
+    steps = build_steps(per_thread(DynamoManager), S3Manager(), per_thread(EC2Manager), SSMManager())
+    unknown = set(args.skip) - {step.name for step in steps}
+    if unknown:
+        parser.error(f"Unknown step(s): {', '.join(sorted(unknown))}")
+
+    # Skipped steps count as done for the steps depending on them
+    steps = [replace(step, is_done=lambda: True) if step.name in args.skip else step for step in steps]
+
+    runner = BootstrapRunner(steps, max_workers=args.workers)
+    results = runner.run()
+    runner.print_report(results)
+    if not all(result.ok for result in results.values()):
+        raise SystemExit(1)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,94 @@
+"""
+Migrates the 'login' table to Argon2 password hashes.
+
+Every plaintext password is hashed and written back with a conditional update, so a password
+changed meanwhile by the API is never overwritten. Safe to run again: already migrated users are skipped.
+Hashes made with older Argon2 parameters can't be re-hashed without the password: they are only
+counted here, /auth/login upgrades them at the user's next login (as it does for plaintext ones).
+
+Run from the MusicList folder:
+    python -m scripts.rehash_passwords --dry-run
+    python -m scripts.rehash_passwords --workers 4
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from botocore.exceptions import ClientError
+from backend.core.dynamo import DynamoManager
+from backend.core.passwords import hash_password, is_password_hash, needs_rehash
+
+
+def rehash_user(table, item: dict) -> str:
+    """
+    Re-hashes the password of one user.
+    :return: str, 'rehashed' or 'changed' (the password was updated by someone else first)
+    """
+    stored = item['password']
+    # A plaintext password is hashed as is; an old hash can't be reversed and is upgraded at the next login
+    new_hash = hash_password(stored)
+    try:
+        table.update_item(
+            Key={'email': item['email']},
+            UpdateExpression='SET password = :new',
+            ConditionExpression='password = :old',
+            ExpressionAttributeValues={':new': new_hash, ':old': stored}
+        )
+        return 'rehashed'
+    except ClientError as e:
+        if e.response['Error']['Code'] == 'ConditionalCheckFailedException':
+            return 'changed'
+        raise
+
+
+def migrate(db: DynamoManager, table_name: str, workers: int, dry_run: bool = False) -> dict:
+    """
+    Scans the table in parallel and re-hashes the plaintext passwords on `workers` threads
+    (argon2 releases the GIL, so they use as many cores).
+    :return: dict of counters
+    """
+    table = db.dynamodb.Table(table_name)
+    report = {'scanned': 0, 'already_hashed': 0, 'outdated_hash': 0, 'rehashed': 0, 'changed': 0, 'failed': 0}
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = []
+        for item in db.parallel_scan(table_name, projection=['email', 'password']):
+            report['scanned'] += 1
+            if not needs_rehash(item['password']):
+                report['already_hashed'] += 1
+            elif is_password_hash(item['password']):
+                report['outdated_hash'] += 1
+            elif not dry_run:
+                futures.append((item['email'], executor.submit(rehash_user, table, item)))
+            else:
+                report['rehashed'] += 1 # Would be
+
+        for email, future in futures:
+            try:
+                report[future.result()] += 1
+            except ClientError as e:
+                report['failed'] += 1
+                print(f"❌ Failed to re-hash the password of {email}: {e}")
+
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-hash the plaintext passwords of the login table.")
+    parser.add_argument("--table", default="login")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Hashing threads.")
+    parser.add_argument("--endpoint-url", help="A local DynamoDB stand-in instead of AWS.")
+    parser.add_argument("--dry-run", action="store_true", help="Only count what would be re-hashed.")
+    args = parser.parse_args()
+
+    started_at = time.perf_counter()
+    report = migrate(DynamoManager(endpoint_url=args.endpoint_url), args.table, args.workers, args.dry_run)
+    print(f"{'Dry run' if args.dry_run else 'Migration'} done in {time.perf_counter() - started_at:.1f}s: {report}")
+    if report['outdated_hash']:
+        print(f"⚠️ {report['outdated_hash']} hash(es) use older parameters, they are upgraded at the next login.")
+    if report['failed']:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
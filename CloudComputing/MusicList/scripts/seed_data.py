@@ -1,11 +1,13 @@
+from backend.core.passwords import hash_password
 
 
-def generate_dummy_login_data(student_id="s4068959", name="JordanChiou", count=10) -> list:
+def generate_dummy_login_data(student_id="s4068959", name="JordanChiou", count=10, hash_passwords=True) -> list:
     """
     According to Assignment Spec - COSC2626_2640_2025S1_A1, generate dummy login data for the login table
     :param student_id: the student id
     :param name: the name of the student
     :param count: the number of dummy data
+    :param hash_passwords: store Argon2 hashes; False returns the plaintext passwords (e.g. to log in with them)
     :return: a list of dictionaries
     """
     data = []
@@ -13,6 +15,8 @@ def generate_dummy_login_data(student_id="s4068959", name="JordanChiou", count=1
         email = f"{student_id}{i}@student.rmit.edu.au"
         username = f"{name}{i}"
         password = "".join(str((i+j)%10) for j in range(6))
+        if hash_passwords:
+            password = hash_password(password)
 
         data.append({
             "email": email,
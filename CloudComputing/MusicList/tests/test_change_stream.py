@@ -0,0 +1,159 @@
+import threading
+from botocore.exceptions import ClientError
+from backend.core.cache import MISSING, TTLCache
+from backend.core.catalog_index import CatalogIndex
+from backend.core.change_stream import (ChangeRelay, ChangeStreamConsumer, DynamoStreamSource, FakeStreamSource,
+                                        RelayStreamSource, cache_invalidation_handler, catalog_handler)
+
+SONG = {"title": "Hey Jude", "artist": "The Beatles", "year": "1968", "album": "Hey Jude"}
+
+
+def make_consumer():
+    catalog = CatalogIndex()
+    catalog.build([SONG])
+    users = TTLCache()
+    music_source = FakeStreamSource("music")
+    login_source = FakeStreamSource("login")
+    consumer = ChangeStreamConsumer(poll_interval=0.01)
+    consumer.register(music_source, catalog_handler(catalog))
+    consumer.register(login_source, cache_invalidation_handler(users, "email"))
+    consumer.start()
+    return consumer, catalog, users, music_source, login_source
+
+
+def test_changes_are_applied_to_the_catalog_and_the_cache():
+    consumer, catalog, users, music_source, login_source = make_consumer()
+    users.set("a@b.c", {"email": "a@b.c"})
+
+    new_song = {"title": "Let It Be", "artist": "The Beatles", "year": "1970", "album": "Let It Be"}
+    music_source.record_put(("title", "album"), new_song)
+    music_source.record_put(("title", "album"), {**SONG, "year": "1969"}, old_item=SONG)
+    music_source.record_delete({"title": "Let It Be", "album": "Let It Be"}, old_item=new_song)
+    login_source.put("MODIFY", {"email": "a@b.c"})
+
+    assert consumer.poll_once() == 4
+    assert catalog.query({"artist": "the beatles"}) == [{**SONG, "year": "1969"}]
+    assert users.get("a@b.c") is MISSING
+    assert consumer.stats["records"] == 4 and consumer.stats["handler_errors"] == 0
+    assert consumer.poll_once() == 0
+
+
+def test_a_failing_source_does_not_lose_the_records_of_the_others():
+    consumer, catalog, _, music_source, login_source = make_consumer()
+    login_source.poll = lambda: (_ for _ in ()).throw(ConnectionError("network down"))
+    music_source.record_delete({"title": "Hey Jude", "album": "Hey Jude"}, old_item=SONG)
+
+    assert consumer.poll_once() == 1
+    assert len(catalog) == 0
+    assert consumer.stats["poll_errors"] == 1
+
+
+def test_a_failing_handler_is_counted_and_skipped():
+    consumer, catalog, _, music_source, _ = make_consumer()
+    consumer.register(music_source, lambda record: 1 / 0)
+    music_source.record_delete({"title": "Hey Jude", "album": "Hey Jude"}, old_item=SONG)
+
+    consumer.poll_once()
+    assert len(catalog) == 0
+    assert consumer.stats["handler_errors"] == 1
+
+
+def test_run_forever_applies_changes_until_stopped():
+    consumer, catalog, _, music_source, _ = make_consumer()
+    stop_event = threading.Event()
+    thread = threading.Thread(target=consumer.run_forever, args=(stop_event,))
+    thread.start()
+    music_source.record_delete({"title": "Hey Jude", "album": "Hey Jude"}, old_item=SONG)
+    for _ in range(200):
+        if len(catalog) == 0:
+            break
+        stop_event.wait(0.01)
+    stop_event.set()
+    thread.join(5)
+    assert len(catalog) == 0 and not thread.is_alive()
+
+
+def test_workers_get_the_changes_from_the_relay():
+    relay = ChangeRelay(max_records=2)
+    server = relay.serve(port=0)
+    url = f"http://127.0.0.1:{server.server_address[1]}"
+    try:
+        music_source = FakeStreamSource("music")
+        sidecar = ChangeStreamConsumer()
+        sidecar.register(music_source, relay.handler)
+        sidecar.register(FakeStreamSource("login"), relay.handler)
+        sidecar.start()
+
+        catalog = CatalogIndex()
+        worker = ChangeStreamConsumer()
+        worker.register(RelayStreamSource("music", url), catalog_handler(catalog))
+        worker.start()
+
+        music_source.record_put(("title", "album"), SONG)
+        sidecar.poll_once()
+        assert worker.poll_once() == 1
+        assert catalog.query({"artist": "the beatles"}) == [SONG]
+        assert worker.poll_once() == 0
+
+        # Records dropped by the relay before the worker read them are reported, the rest still applied
+        for year in ("1969", "1970", "1971"):
+            music_source.record_put(("title", "album"), {**SONG, "year": year})
+        sidecar.poll_once()
+        assert worker.poll_once() == 2
+        assert catalog.query({"year": "1971"}) == [{**SONG, "year": "1971"}]
+    finally:
+        server.shutdown()
+
+
+class StubStreams:
+    """
+    Two shards: 'parent' still open with one record, then closed; 'child' split from it.
+    """
+
+    def __init__(self):
+        self.records = {"parent": [["MODIFY 1"], ["MODIFY 2"]], "child": [["MODIFY 3"]]}
+        self.fail_on = set()
+
+    def get_records(self, ShardIterator, Limit):
+        if ShardIterator in self.fail_on:
+            raise ClientError({"Error": {"Code": "LimitExceededException", "Message": ""}}, "GetRecords")
+        shard, position = ShardIterator.split(":")
+        pages = self.records[shard]
+        position = int(position)
+        records = [{"eventName": "MODIFY", "dynamodb": {"Keys": {"id": {"S": value}}, "SequenceNumber": value}}
+                   for value in (pages[position] if position < len(pages) else [])]
+        next_iterator = f"{shard}:{position + 1}" if position + 1 < len(pages) else None
+        return {"Records": records, "NextShardIterator": next_iterator}
+
+
+def make_stream_source(streams):
+    source = object.__new__(DynamoStreamSource) # No AWS client: the shards are set up by hand
+    source.table_name = "music"
+    source.streams = streams
+    source.max_records = 1000
+    source.shard_refresh = float("inf")
+    source._refreshed_at = float("inf")
+    source._iterators = {"parent": "parent:0", "child": "child:0"}
+    source._parents = {"parent": None, "child": "parent"}
+    return source
+
+
+def test_a_child_shard_is_read_after_its_parent():
+    source = make_stream_source(StubStreams())
+    assert [record.keys["id"] for record in source.poll()] == ["MODIFY 1"]
+    # The parent is fully read in this poll, its child right after it
+    assert [record.keys["id"] for record in source.poll()] == ["MODIFY 2", "MODIFY 3"]
+
+
+def test_a_failing_shard_is_read_again_from_the_same_position():
+    streams = StubStreams()
+    streams.records["other"] = [["OTHER 1"]]
+    source = make_stream_source(streams)
+    source._iterators["other"] = "other:0"
+    source._parents["other"] = None
+    streams.fail_on = {"parent:0"}
+
+    assert [record.keys["id"] for record in source.poll()] == ["OTHER 1"]
+    assert source._iterators["parent"] == "parent:0"
+    streams.fail_on = set()
+    assert [record.keys["id"] for record in source.poll()] == ["MODIFY 1"]
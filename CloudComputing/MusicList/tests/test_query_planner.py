@@ -0,0 +1,96 @@
+import copy
+import pytest
+from moto import mock_aws
+from backend.core.dynamo import DynamoManager
+from backend.schemas import music_table_schema
+
+SONGS = [
+    {"title": "Santeria", "artist": "Sublime", "year": "1996", "album": "Sublime"},
+    {"title": "What I Got", "artist": "Sublime", "year": "1996", "album": "Sublime"},
+    {"title": "Badfish", "artist": "Sublime", "year": "1992", "album": "40oz. to Freedom"},
+    {"title": "Hey Jude", "artist": "The Beatles", "year": "1968", "album": "Hey Jude"},
+    {"title": "Hey Jude", "artist": "The Beatles", "year": "1970", "album": "Past Masters"},
+]
+
+
+@pytest.fixture
+def dynamo(monkeypatch):
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "testing")
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "testing")
+    with mock_aws():
+        manager = DynamoManager()
+        assert manager.create_table("music", music_table_schema)
+        for song in SONGS:
+            assert manager.insert_data("music", song)
+        yield manager
+
+
+def titles(result):
+    return sorted((item["title"], item["album"]) for item in result["items"])
+
+
+def test_full_primary_key_is_a_get_item(dynamo):
+    plan = dynamo.plan_query("music", {"title": "Hey Jude", "album": "Past Masters"})
+    assert plan == {"access_path": "get_item", "index_name": None,
+                    "key": {"title": "Hey Jude", "album": "Past Masters"}, "filter": {}}
+
+    result = dynamo.query_items("music", {"title": "Hey Jude", "album": "Past Masters", "year": "1968"})
+    assert result["access_path"] == "get_item" and result["items"] == [] # The year filter still applies
+
+
+def test_partition_key_is_a_query_on_the_table(dynamo):
+    plan = dynamo.plan_query("music", {"title": "Hey Jude", "year": "1970"})
+    assert plan["access_path"] == "query" and plan["index_name"] is None
+    assert plan["key"] == {"title": "Hey Jude"} and plan["filter"] == {"year": "1970"}
+
+    result = dynamo.query_items("music", {"title": "Hey Jude"})
+    assert result["access_path"] == "query"
+    assert titles(result) == [("Hey Jude", "Hey Jude"), ("Hey Jude", "Past Masters")]
+
+
+def test_gsi_partition_key_is_a_query_on_the_index(dynamo):
+    plan = dynamo.plan_query("music", {"artist": "Sublime"})
+    assert plan["access_path"] == "query_index" and plan["index_name"] == "artist-year-index"
+    assert plan["key"] == {"artist": "Sublime"}
+
+    # Both indexes could serve artist + year, the one using both filters as its key wins
+    plan = dynamo.plan_query("music", {"year": "1996", "artist": "Sublime"})
+    assert plan["index_name"] == "artist-year-index" and plan["key"] == {"artist": "Sublime", "year": "1996"}
+    assert dynamo.plan_query("music", {"year": "1996"})["index_name"] == "year-title-index"
+
+    result = dynamo.query_items("music", {"artist": "Sublime", "year": "1996"})
+    assert result["access_path"] == "query_index"
+    assert titles(result) == [("Santeria", "Sublime"), ("What I Got", "Sublime")]
+
+
+def test_no_usable_key_is_a_scan(dynamo):
+    plan = dynamo.plan_query("music", {"album": "Sublime"})
+    assert plan == {"access_path": "scan", "index_name": None, "key": {}, "filter": {"album": "Sublime"}}
+
+    result = dynamo.query_items("music", {"album": "Sublime"})
+    assert result["access_path"] == "scan"
+    assert titles(result) == [("Santeria", "Sublime"), ("What I Got", "Sublime")]
+
+
+def test_an_index_without_all_attributes_is_not_used(dynamo):
+    schema = copy.deepcopy(music_table_schema)
+    schema["GlobalSecondaryIndexes"][0]["Projection"] = {"ProjectionType": "KEYS_ONLY"}
+    schema.pop("StreamSpecification")
+    assert dynamo.create_table("music_keys_only", schema)
+    for song in SONGS:
+        assert dynamo.insert_data("music_keys_only", song)
+
+    # artist-year-index only holds the keys, the songs would come back without their other attributes
+    plan = dynamo.plan_query("music_keys_only", {"artist": "Sublime"})
+    assert plan["access_path"] == "scan"
+    # The other index still projects everything
+    assert dynamo.plan_query("music_keys_only", {"artist": "Sublime", "year": "1992"})["index_name"] == "year-title-index"
+
+    result = dynamo.query_items("music_keys_only", {"artist": "Sublime"})
+    assert result["access_path"] == "scan"
+    assert all("album" in item for item in result["items"]) and len(result["items"]) == 3
+
+
+def test_empty_filters_are_rejected(dynamo):
+    with pytest.raises(ValueError):
+        dynamo.plan_query("music", {"artist": "", "year": None})